@@ -0,0 +1,52 @@
+"""
+Re-classifying a stored column of affiliations: one call per row vs `classify_many`.
+
+Run from the repository root:
+
+    python -m benchmarks.classify_bulk [--rows 1000000] [--distinct 50000]
+
+Rows are drawn from `--distinct` synthetic affiliations, the way stored
+affiliations repeat across authors and articles. "per row" calls
+`classify` on each row with a cold verdict cache of the default size;
+"bulk" classifies the whole column with `classify_many`.
+"""
+import argparse
+import random
+import time
+from get_papers.src.filters import AffiliationClassifier
+from .classify_dictionary import make_affiliations
+
+
+def main() -> None:
+    args = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args.add_argument("--rows", type=int, default=1_000_000)
+    args.add_argument("--distinct", type=int, default=50_000)
+    args.add_argument("--seed", type=int, default=1)
+    options = args.parse_args()
+
+    rng = random.Random(options.seed)
+    pool = make_affiliations(options.distinct, rng)
+    # Mix in real keywords so both verdicts occur.
+    pool = [f"{a}, Pfizer Inc." if i % 7 == 0 else a for i, a in enumerate(pool)]
+    column = [rng.choice(pool) for _ in range(options.rows)]
+
+    classifier = AffiliationClassifier()
+    start = time.perf_counter()
+    per_row = [classifier.classify(affiliation) for affiliation in column]
+    per_row_seconds = time.perf_counter() - start
+
+    classifier = AffiliationClassifier()
+    start = time.perf_counter()
+    masks = classifier.classify_many(column)
+    bulk_seconds = time.perf_counter() - start
+
+    assert [verdict.is_academic for verdict in per_row] == masks.is_academic
+    assert [verdict.is_company for verdict in per_row] == masks.is_company
+    print(f"{options.rows} rows, {len(set(column))} distinct")
+    print(f"per row: {per_row_seconds:.2f}s ({options.rows / per_row_seconds:,.0f} rows/s)")
+    print(f"bulk:    {bulk_seconds:.2f}s ({options.rows / bulk_seconds:,.0f} rows/s), "
+          f"{per_row_seconds / bulk_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
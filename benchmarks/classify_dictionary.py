@@ -0,0 +1,77 @@
+"""
+Affiliation classification cost as the company dictionary grows: flat alternation vs trie regex.
+
+Run from the repository root:
+
+    python -m benchmarks.classify_dictionary [--sizes 10,100,1000,10000] [--affiliations 2000]
+
+The flat pattern is the single "word1|word2|..." alternation the classifier
+compiled before; the trie pattern is what `AffiliationClassifier` builds now.
+Caching is disabled so every affiliation is scanned.
+"""
+import argparse
+import random
+import re
+import time
+from typing import Dict, List
+from get_papers.src.filters import AffiliationClassifier, normalize_affiliation
+
+SYLLABLES = ["ba", "co", "de", "fi", "gen", "ka", "lo", "mo", "nex", "pha", "ra", "si", "tec", "vo", "zy", "bio"]
+SUFFIXES = ["Inc.", "Ltd", "University", "Institute", "Labs", "Therapeutics"]
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def make_dictionary(size: int, rng: random.Random) -> Dict[str, str]:
+    """Returns `size` synthetic company aliases mapped to canonical names."""
+    return {_word(rng): f"Company {i}" for i in range(size)}
+
+
+def make_affiliations(count: int, rng: random.Random) -> List[str]:
+    return [f"{_word(rng).title()} {rng.choice(SUFFIXES)}, {_word(rng).title()} City" for _ in range(count)]
+
+
+def _flat_pattern(words: List[str]) -> "re.Pattern[str]":
+    alternatives = "|".join(re.escape(word) for word in sorted(words, key=lambda w: (-len(w), w)))
+    return re.compile("(?=(" + alternatives + "))")
+
+
+def main() -> None:
+    args = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args.add_argument("--sizes", default="10,100,1000,10000")
+    args.add_argument("--affiliations", type=int, default=2000)
+    args.add_argument("--seed", type=int, default=1)
+    options = args.parse_args()
+
+    rng = random.Random(options.seed)
+    affiliations = [normalize_affiliation(a) for a in make_affiliations(options.affiliations, rng)]
+    print(f"{options.affiliations} affiliations per run")
+    print(f"{'aliases':>8} {'flat build':>11} {'flat match':>11} {'trie build':>11} {'trie match':>11}")
+    for size in (int(s) for s in options.sizes.split(",")):
+        names = make_dictionary(size, rng)
+
+        start = time.perf_counter()
+        flat = _flat_pattern(list(names))
+        flat_build = time.perf_counter() - start
+        start = time.perf_counter()
+        for affiliation in affiliations:
+            for _ in flat.finditer(affiliation):
+                pass
+        flat_match = (time.perf_counter() - start) / len(affiliations)
+
+        start = time.perf_counter()
+        classifier = AffiliationClassifier(company_keywords=list(names), company_names=names, cache_size=0)
+        trie_build = time.perf_counter() - start
+        start = time.perf_counter()
+        for affiliation in affiliations:
+            classifier.company_names(affiliation)
+        trie_match = (time.perf_counter() - start) / len(affiliations)
+
+        print(f"{size:>8} {flat_build * 1e3:>9.1f}ms {flat_match * 1e6:>9.1f}us "
+              f"{trie_build * 1e3:>9.1f}ms {trie_match * 1e6:>9.1f}us")
+
+
+if __name__ == "__main__":
+    main()
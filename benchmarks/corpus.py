@@ -0,0 +1,175 @@
+"""
+Synthetic EFetch XML shaped like real PubMed records.
+
+`SyntheticCorpus` renders any article on demand from its PMID, so corpora of a
+million articles can be served without holding them in memory. Author counts,
+affiliations and emails follow rough PubMed-like distributions: most papers
+have a handful of authors with a long tail, affiliations repeat with a Zipf
+skew, and about one author in seven is at a company.
+"""
+import random
+from typing import Any, List, Optional
+from xml.sax.saxutils import escape
+
+COMPANY_AFFILIATIONS = [
+    "Genentech Inc., South San Francisco, CA, USA.",
+    "Pfizer Ltd, Sandwich, UK.",
+    "Novartis Institutes for BioMedical Research, Basel, Switzerland.",
+    "Moderna Therapeutics, Cambridge, MA, USA.",
+    "AstraZeneca R&D, Gothenburg, Sweden.",
+    "Roche Diagnostics GmbH, Penzberg, Germany.",
+    "Amgen Inc., Thousand Oaks, CA, USA.",
+    "Takeda Pharmaceutical Company Limited, Osaka, Japan.",
+]
+ACADEMIC_AFFILIATIONS = [
+    "Department of Biology, Harvard University, Cambridge, MA, USA.",
+    "School of Medicine, Stanford University, Stanford, CA, USA.",
+    "Institute of Genetics, University College London, London, UK.",
+    "Karolinska Institutet, Stockholm, Sweden.",
+    "Department of Oncology, Johns Hopkins Hospital, Baltimore, MD, USA.",
+    "Max Planck Institute for Molecular Genetics, Berlin, Germany.",
+    "Faculty of Medicine, University of Tokyo, Tokyo, Japan.",
+    "Broad Institute of MIT and Harvard, Cambridge, MA, USA.",
+    "Department of Pharmacology, Peking University, Beijing, China.",
+    "Centre for Cancer Research, University of Melbourne, Melbourne, Australia.",
+]
+
+DEFAULT_SEED = 1
+COMPANY_SHARE = 0.15
+
+
+def _zipf_weights(count: int) -> List[float]:
+    return [1.0 / rank for rank in range(1, count + 1)]
+
+
+_COMPANY_WEIGHTS = _zipf_weights(len(COMPANY_AFFILIATIONS))
+_ACADEMIC_WEIGHTS = _zipf_weights(len(ACADEMIC_AFFILIATIONS))
+
+
+def _affiliation(rng: random.Random, company_share: float) -> str:
+    if rng.random() < company_share:
+        return rng.choices(COMPANY_AFFILIATIONS, _COMPANY_WEIGHTS)[0]
+    return rng.choices(ACADEMIC_AFFILIATIONS, _ACADEMIC_WEIGHTS)[0]
+
+
+def _author(pmid: int, index: int, rng: random.Random, company_share: float, email: bool) -> str:
+    infos = []
+    # ~10% of authors have no affiliation, ~10% have two.
+    roll = rng.random()
+    count = 0 if roll < 0.1 else 2 if roll > 0.9 else 1
+    for i in range(count):
+        affiliation = _affiliation(rng, company_share)
+        if email and i == 0:
+            affiliation += f" author{index}.{pmid}@example.org"
+        infos.append(f"<AffiliationInfo><Affiliation>{escape(affiliation)}</Affiliation></AffiliationInfo>")
+    return (
+        f'<Author ValidYN="Y"><LastName>Author{pmid}x{index}</LastName><ForeName>Name{index}</ForeName>'
+        f"<Initials>N</Initials>{''.join(infos)}</Author>"
+    )
+
+
+def make_article(
+    pmid: int,
+    authors: Optional[int] = None,
+    references: Optional[int] = None,
+    mesh_terms: Optional[int] = None,
+    rng: Optional[random.Random] = None,
+    company_share: float = COMPANY_SHARE,
+) -> str:
+    """
+    Builds one PubmedArticle with an abstract, MeSH headings and a reference list.
+
+    Counts left as None are drawn from the corpus distributions.
+    """
+    rng = rng or random.Random(pmid)
+    if authors is None:
+        authors = min(60, 1 + int(rng.expovariate(1 / 5)))
+    if references is None:
+        references = rng.randint(0, 60)
+    if mesh_terms is None:
+        mesh_terms = rng.randint(0, 20)
+    # Roughly a third of papers list a contact email.
+    email_author = rng.randrange(authors) if rng.random() < 0.35 else -1
+
+    author_xml = "".join(
+        _author(pmid, i, rng, company_share, email=i == email_author) for i in range(authors)
+    )
+    mesh_xml = "".join(
+        f'<MeshHeading><DescriptorName UI="D{i:06d}">Term {i}</DescriptorName></MeshHeading>'
+        for i in range(mesh_terms)
+    )
+    reference_xml = "".join(
+        f"""<Reference><Citation>Ref {i}. J Synth. 2020;{i}:1-10.</Citation>
+          <ArticleIdList><ArticleId IdType="pubmed">{pmid * 100 + i}</ArticleId></ArticleIdList></Reference>"""
+        for i in range(references)
+    )
+    year = rng.randint(1990, 2024)
+    abstract = "Lorem ipsum dolor sit amet. " * rng.randint(10, 60)
+    return f"""<PubmedArticle>
+  <MedlineCitation Status="MEDLINE" Owner="NLM">
+    <PMID Version="1">{pmid}</PMID>
+    <DateCompleted><Year>{year}</Year><Month>05</Month><Day>01</Day></DateCompleted>
+    <Article PubModel="Print">
+      <Journal><ISSN IssnType="Electronic">1234-5678</ISSN>
+        <JournalIssue CitedMedium="Internet"><Volume>12</Volume><Issue>3</Issue>
+          <PubDate><Year>{year}</Year><Month>Mar</Month></PubDate></JournalIssue>
+        <Title>Journal of Synthetic Results</Title></Journal>
+      <ArticleTitle>Synthetic paper {pmid} on targeted therapies</ArticleTitle>
+      <Abstract><AbstractText>{abstract}</AbstractText></Abstract>
+      <AuthorList CompleteYN="Y">{author_xml}</AuthorList>
+      <Language>eng</Language>
+      <ArticleDate DateType="Electronic"><Year>{year}</Year><Month>01</Month><Day>15</Day></ArticleDate>
+    </Article>
+    <MeshHeadingList>{mesh_xml}</MeshHeadingList>
+  </MedlineCitation>
+  <PubmedData>
+    <History><PubMedPubDate PubStatus="received"><Year>{year - 1}</Year></PubMedPubDate></History>
+    <PublicationStatus>ppublish</PublicationStatus>
+    <ReferenceList>{reference_xml}</ReferenceList>
+  </PubmedData>
+</PubmedArticle>"""
+
+
+def make_articles(count: int, start: int = 1, **options: Any) -> List[str]:
+    return [make_article(pmid, **options) for pmid in range(start, start + count)]
+
+
+def make_efetch_xml(count: int, start: int = 1, **options: Any) -> str:
+    """
+    Builds an EFetch response body with `count` articles.
+    """
+    return "<PubmedArticleSet>" + "".join(make_articles(count, start, **options)) + "</PubmedArticleSet>"
+
+
+class SyntheticCorpus:
+    """
+    A deterministic corpus of `size` articles with PMIDs `first_pmid` onwards.
+
+    Every article is rendered from its PMID and the seed, so the same corpus
+    can be regenerated in another process without shipping any XML.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        seed: int = DEFAULT_SEED,
+        first_pmid: int = 1,
+        company_share: float = COMPANY_SHARE,
+    ) -> None:
+        self.size = size
+        self.seed = seed
+        self.first_pmid = first_pmid
+        self.company_share = company_share
+
+    def pmids(self, start: int = 0, stop: Optional[int] = None) -> List[str]:
+        stop = self.size if stop is None else min(stop, self.size)
+        return [str(self.first_pmid + i) for i in range(start, stop)]
+
+    def article(self, pmid: int) -> str:
+        rng = random.Random(self.seed * 1_000_003 + pmid)
+        return make_article(pmid, rng=rng, company_share=self.company_share)
+
+    def efetch_xml(self, pmids: List[str]) -> str:
+        last = self.first_pmid + self.size
+        articles = (self.article(int(pmid)) for pmid in pmids if self.first_pmid <= int(pmid) < last)
+        return "<PubmedArticleSet>" + "".join(articles) + "</PubmedArticleSet>"
@@ -0,0 +1,228 @@
+"""
+Fetch -> parse -> filter -> export throughput against a local mock E-utilities server.
+
+Run from the repository root:
+
+    python -m benchmarks.end_to_end --articles 10000 --latency 0.05 --error-rate 0.02
+
+Reports articles/s, peak RSS, and the time spent in each stage. Stage times
+are measured in the consuming thread: "efetch" is time spent waiting for
+the next downloaded batch, so it shrinks as concurrency hides latency.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, TypeVar
+from get_papers.src import fetcher, parser
+from get_papers.src.client import PubMedClient
+from get_papers.src.exporter import WRITERS, open_writer
+from get_papers.src.pipeline import iter_parsed_batches
+from .server import MockEutilsServer
+
+T = TypeVar("T")
+
+STAGES = ("esearch", "efetch", "parse", "filter", "export")
+
+
+class StageTimer:
+    """Accumulates wall time per pipeline stage."""
+
+    def __init__(self) -> None:
+        self.seconds: Dict[str, float] = defaultdict(float)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+
+    def iterate(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        """Yields from `items`, charging the time spent producing each item to `name`."""
+        iterator = iter(items)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def wrap(self, name: str, func: Callable[..., T]) -> Callable[..., T]:
+        @wraps(func)
+        def timed(*args: Any, **kwargs: Any) -> T:
+            with self.stage(name):
+                return func(*args, **kwargs)
+        return timed
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+@contextmanager
+def _patched(target: Any, **attributes: Any) -> Iterator[None]:
+    saved = {name: getattr(target, name) for name in attributes}
+    for name, value in attributes.items():
+        setattr(target, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(target, name, value)
+
+
+def run_benchmark(
+    server: MockEutilsServer,
+    output: str,
+    mode: str = "history",
+    batch_size: int = 500,
+    concurrency: int = 3,
+    workers: int = 1,
+    rate_limit: Optional[float] = None,
+    format: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Runs the CLI's fetch/parse/export pipeline against `server` and times each stage.
+
+    Args:
+        server (MockEutilsServer): A started mock server.
+        output (str): Export file path.
+        mode (str): "history" fetches via WebEnv windows; "ids" pages ESearch
+            for PMIDs first (capped at 10,000 like the real service).
+        batch_size (int): Records per EFetch request.
+        concurrency (int): EFetch requests in flight.
+        workers (int): Parser processes. With more than one, parse and filter
+            time is reported together as "parse".
+        rate_limit (Optional[float]): Requests per second, or None for no limit.
+        format (Optional[str]): Export format; detected from `output` when omitted.
+
+    Returns:
+        Dict[str, Any]: The benchmark report.
+    """
+    timer = StageTimer()
+    client = PubMedClient(pool_size=concurrency)
+    filter_hooks: Dict[str, Any] = {}
+    if workers == 1:
+        filter_hooks = {
+            "classify_affiliation": timer.wrap("filter", parser.classify_affiliation),
+            "extract_email": timer.wrap("filter", parser.extract_email),
+        }
+    limit = (lambda api_key=None: rate_limit) if rate_limit else (lambda api_key=None: 1e9)
+
+    start = time.perf_counter()
+    with _patched(fetcher, ESEARCH_URL=server.esearch_url, EFETCH_URL=server.efetch_url, ncbi_rate_limit=limit), \
+            _patched(parser, **filter_hooks):
+        if mode == "history":
+            with timer.stage("esearch"):
+                history = fetcher.search_pubmed_history("benchmark", client=client)
+            batches = fetcher.iter_history_details(
+                history, batch_size=batch_size, concurrency=concurrency, client=client,
+            )
+        else:
+            ids = list(timer.iterate("esearch", fetcher.iter_pubmed_ids("benchmark", client=client)))
+            batches = fetcher.iter_pubmed_details(
+                ids, batch_size=batch_size, concurrency=concurrency, client=client,
+            )
+
+        parsed = iter_parsed_batches(timer.iterate("efetch", batches), workers=workers)
+        papers = 0
+        with open_writer(output, format) as writer:
+            for batch in timer.iterate("parse", parsed):
+                with timer.stage("export"):
+                    papers += writer.write_batch(batch)
+    wall = time.perf_counter() - start
+    client.close()
+
+    stats = server.stats()
+    seconds = dict(timer.seconds)
+    # Parsing is timed around the filter calls it makes, and around waiting
+    # for the batches it consumes; report each stage's own time.
+    seconds["parse"] = seconds.get("parse", 0.0) - seconds.get("filter", 0.0) - seconds.get("efetch", 0.0)
+    return {
+        "articles": stats["articles"],
+        "papers": papers,
+        "wall_seconds": wall,
+        "articles_per_second": stats["articles"] / wall if wall else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {name: seconds.get(name, 0.0) for name in STAGES},
+        "server": stats,
+    }
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    print(f"articles     {report['articles']:>10}")
+    print(f"papers       {report['papers']:>10}")
+    print(f"wall         {report['wall_seconds']:>10.2f} s")
+    print(f"throughput   {report['articles_per_second']:>10.0f} articles/s")
+    if report["peak_rss_mb"] is not None:
+        print(f"peak RSS     {report['peak_rss_mb']:>10.1f} MB")
+    print("stages:")
+    for name, seconds in report["stages"].items():
+        share = seconds / report["wall_seconds"] if report["wall_seconds"] else 0.0
+        print(f"  {name:<10} {seconds:>10.2f} s  {share:6.1%}")
+    server = report["server"]
+    print(f"server       {server['requests']} requests, {server['throttled']} answered 429")
+
+
+def main() -> None:
+    args = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args.add_argument("--articles", type=int, default=10000, help="Corpus size (default: %(default)s).")
+    args.add_argument("--seed", type=int, default=1)
+    args.add_argument("--mode", choices=["history", "ids"], default="history")
+    args.add_argument("--batch-size", type=int, default=500)
+    args.add_argument("--concurrency", type=int, default=3)
+    args.add_argument("--workers", type=int, default=1)
+    args.add_argument("--rate-limit", type=float, help="Requests per second (default: unlimited).")
+    args.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response.")
+    args.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, up to this many seconds.")
+    args.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429.")
+    args.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with each 429.")
+    args.add_argument("--format", choices=sorted(WRITERS), default="csv")
+    args.add_argument("--xml-backend", choices=["auto", *parser.XML_BACKENDS], default="auto")
+    args.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    options = args.parse_args()
+
+    parser.set_parser_backend(options.xml_backend)
+    with MockEutilsServer(
+        options.articles,
+        seed=options.seed,
+        latency=options.latency,
+        jitter=options.jitter,
+        error_rate=options.error_rate,
+        retry_after=options.retry_after,
+    ) as server, tempfile.TemporaryDirectory() as tmp:
+        report = run_benchmark(
+            server,
+            os.path.join(tmp, f"papers.{options.format}"),
+            mode=options.mode,
+            batch_size=options.batch_size,
+            concurrency=options.concurrency,
+            workers=options.workers,
+            rate_limit=options.rate_limit,
+            format=options.format,
+        )
+
+    report["config"] = vars(options)
+    report["config"]["xml_backend"] = parser.get_parser_backend()
+    if options.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
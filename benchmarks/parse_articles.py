@@ -0,0 +1,53 @@
+"""
+Per-article cost of field extraction: descendant XPath searches vs the single-pass walk.
+
+Run from the repository root:
+
+    python -m benchmarks.parse_articles [--articles 2000] [--repeat 5]
+"""
+import argparse
+import timeit
+from functools import partial
+import xml.etree.ElementTree as ET
+from typing import List, Optional, Tuple
+from get_papers.src import parser
+from .corpus import make_efetch_xml
+
+
+def xpath_extract(article: ET.Element) -> Tuple[str, str, str, List[Tuple[str, Optional[str]]]]:
+    """
+    The extraction `parse_article` used before the single-pass walk.
+    """
+    title = article.findtext(".//ArticleTitle") or "N/A"
+    pubmed_id = article.findtext(".//PMID") or "N/A"
+    pub_date = parser.extract_pub_year(article)
+    authors = []
+    for author in article.findall(".//Author"):
+        fore_name = author.findtext("ForeName") or ""
+        last_name = author.findtext("LastName") or ""
+        name = " ".join([fore_name, last_name]).strip()
+        authors.append((name, author.findtext(".//AffiliationInfo/Affiliation")))
+    return pubmed_id, title, pub_date, authors
+
+
+def main() -> None:
+    args = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args.add_argument("--articles", type=int, default=2000)
+    args.add_argument("--repeat", type=int, default=5)
+    options = args.parse_args()
+
+    articles = list(ET.fromstring(make_efetch_xml(options.articles)))
+    single_pass = partial(parser._scan_article, scan_author=parser._scan_author)
+    assert [xpath_extract(a) for a in articles] == [single_pass(a) for a in articles]
+
+    print(f"{options.articles} synthetic articles, best of {options.repeat} runs")
+    results = {}
+    for name, extract in (("xpath", xpath_extract), ("single-pass", single_pass)):
+        best = min(timeit.repeat(lambda: [extract(a) for a in articles], number=1, repeat=options.repeat))
+        results[name] = best
+        print(f"  {name:<12} {best / options.articles * 1e6:8.2f} us/article")
+    print(f"  speedup      {results['xpath'] / results['single-pass']:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
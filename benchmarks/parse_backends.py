@@ -0,0 +1,39 @@
+"""
+End-to-end `parse_pubmed_xml` throughput for each XML backend.
+
+Run from the repository root:
+
+    python -m benchmarks.parse_backends [--articles 5000] [--repeat 3]
+"""
+import argparse
+import timeit
+from get_papers.src import parser
+from .corpus import make_efetch_xml
+
+
+def main() -> None:
+    args = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args.add_argument("--articles", type=int, default=5000)
+    args.add_argument("--repeat", type=int, default=3)
+    options = args.parse_args()
+
+    xml_data = make_efetch_xml(options.articles)
+    print(f"{options.articles} synthetic articles ({len(xml_data) / 1e6:.1f} MB), best of {options.repeat} runs")
+
+    results = {}
+    for backend in parser.XML_BACKENDS:
+        try:
+            parser.set_parser_backend(backend)
+        except ImportError:
+            print(f"  {backend:<6} not installed")
+            continue
+        results[backend] = parser.parse_pubmed_xml(xml_data)
+        best = min(timeit.repeat(lambda: parser.parse_pubmed_xml(xml_data), number=1, repeat=options.repeat))
+        print(f"  {backend:<6} {options.articles / best:10.0f} articles/s")
+
+    if len(results) == len(parser.XML_BACKENDS):
+        assert results["lxml"] == results["etree"], "backends disagree"
+
+
+if __name__ == "__main__":
+    main()
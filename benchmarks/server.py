@@ -0,0 +1,212 @@
+"""
+A local stand-in for the E-utilities ESearch/EFetch endpoints.
+
+The server runs in its own process, so rendering synthetic XML does not
+compete with the pipeline under test for the GIL. Latency and HTTP 429
+responses can be injected to exercise the client's concurrency and retries.
+"""
+import gzip
+import json
+import multiprocessing
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+from .corpus import DEFAULT_SEED, SyntheticCorpus
+
+WEBENV = "MCID_benchmark"
+QUERY_KEY = "1"
+
+
+class _Options:
+    """Picklable server settings handed to the server process."""
+
+    def __init__(
+        self,
+        corpus_size: int,
+        seed: int,
+        latency: float,
+        jitter: float,
+        error_rate: float,
+        retry_after: Optional[int],
+    ) -> None:
+        self.corpus_size = corpus_size
+        self.seed = seed
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+
+
+def _make_handler(options: _Options) -> type:
+    corpus = SyntheticCorpus(options.corpus_size, seed=options.seed)
+    rng = random.Random(options.seed)
+    lock = threading.Lock()
+    stats = {"requests": 0, "esearch": 0, "efetch": 0, "throttled": 0, "articles": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, like NCBI
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            self._handle(parse_qs(urlsplit(self.path).query))
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length", 0))
+            params = parse_qs(urlsplit(self.path).query)
+            params.update(parse_qs(self.rfile.read(length).decode("utf-8")))
+            self._handle(params)
+
+        def _handle(self, params: Dict[str, List[str]]) -> None:
+            path = urlsplit(self.path).path
+            if path == "/stats":
+                with lock:
+                    self._send(200, json.dumps(stats), "application/json")
+                return
+
+            with lock:
+                stats["requests"] += 1
+                throttle = rng.random() < options.error_rate
+                delay = options.latency + rng.uniform(0, options.jitter)
+            time.sleep(delay)
+
+            if throttle:
+                with lock:
+                    stats["throttled"] += 1
+                headers = {} if options.retry_after is None else {"Retry-After": str(options.retry_after)}
+                self._send(429, '{"error":"API rate limit exceeded"}', "application/json", headers)
+            elif path.endswith("/esearch.fcgi"):
+                self._esearch(params)
+            elif path.endswith("/efetch.fcgi"):
+                self._efetch(params)
+            else:
+                self._send(404, "not found", "text/plain")
+
+        def _esearch(self, params: Dict[str, List[str]]) -> None:
+            retstart = int(params.get("retstart", ["0"])[0])
+            retmax = int(params.get("retmax", ["20"])[0])
+            result: Dict[str, Any] = {
+                "count": str(corpus.size),
+                "retstart": str(retstart),
+                "idlist": corpus.pmids(retstart, retstart + retmax),
+            }
+            if params.get("usehistory", ["n"])[0] == "y":
+                result.update(webenv=WEBENV, querykey=QUERY_KEY)
+            with lock:
+                stats["esearch"] += 1
+            self._send(200, json.dumps({"esearchresult": result}), "application/json")
+
+        def _efetch(self, params: Dict[str, List[str]]) -> None:
+            if "id" in params:
+                pmids = params["id"][0].split(",")
+            else:
+                retstart = int(params.get("retstart", ["0"])[0])
+                retmax = int(params.get("retmax", ["20"])[0])
+                pmids = corpus.pmids(retstart, retstart + retmax)
+            with lock:
+                stats["efetch"] += 1
+                stats["articles"] += len(pmids)
+            self._send(200, corpus.efetch_xml(pmids), "text/xml")
+
+        def _send(self, status: int, body: str, content_type: str, headers: Optional[Dict[str, str]] = None) -> None:
+            data = body.encode("utf-8")
+            self.send_response(status)
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                data = gzip.compress(data, compresslevel=1)
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+def _serve(options: _Options, host: str, conn: Any) -> None:
+    server = ThreadingHTTPServer((host, 0), _make_handler(options))
+    server.daemon_threads = True
+    conn.send(server.server_address[1])
+    server.serve_forever()
+
+
+class MockEutilsServer:
+    """
+    Serves a `SyntheticCorpus` over HTTP the way ESearch/EFetch would.
+
+    Every query matches the whole corpus. ESearch supports `retstart`/`retmax`
+    paging and `usehistory`; EFetch accepts an `id` list or a history
+    `retstart` window. Use as a context manager:
+
+        with MockEutilsServer(10000, latency=0.05, error_rate=0.02) as server:
+            ...  # point the fetcher at server.esearch_url / server.efetch_url
+
+    Args:
+        corpus_size (int): Number of articles the query matches.
+        seed (int): Seed for the corpus and for 429 injection.
+        latency (float): Seconds added to every response.
+        jitter (float): Extra random latency, uniform in [0, jitter] seconds.
+        error_rate (float): Fraction of requests answered with HTTP 429.
+        retry_after (Optional[int]): `Retry-After` seconds sent with a 429, or None to omit it.
+        host (str): Interface to bind.
+    """
+
+    def __init__(
+        self,
+        corpus_size: int,
+        seed: int = DEFAULT_SEED,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        retry_after: Optional[int] = 1,
+        host: str = "127.0.0.1",
+    ) -> None:
+        self.options = _Options(corpus_size, seed, latency, jitter, error_rate, retry_after)
+        self.host = host
+        self.port: Optional[int] = None
+        self._process: Optional[Any] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/entrez/eutils/"
+
+    @property
+    def esearch_url(self) -> str:
+        return self.base_url + "esearch.fcgi"
+
+    @property
+    def efetch_url(self) -> str:
+        return self.base_url + "efetch.fcgi"
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns request counters from the server process.
+        """
+        import urllib.request
+        with urllib.request.urlopen(f"http://{self.host}:{self.port}/stats") as response:
+            return json.load(response)
+
+    def start(self) -> "MockEutilsServer":
+        context = multiprocessing.get_context("spawn")
+        receiver, sender = context.Pipe(duplex=False)
+        self._process = context.Process(target=_serve, args=(self.options, self.host, sender), daemon=True)
+        self._process.start()
+        self.port = receiver.recv()
+        return self
+
+    def stop(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def __enter__(self) -> "MockEutilsServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
@@ -0,0 +1,112 @@
+"""
+CLI startup cost: `python -X importtime` on the entry point, with a regression threshold.
+
+Run from the repository root:
+
+    python -m benchmarks.startup [--runs 5] [--threshold-ms 120] [--top 10]
+
+Imports `get_papers.cli` in fresh interpreters and reports the median
+cumulative import time, the slowest modules it pulled in, and the wall time
+of `get-papers-list --help`. Exits non-zero if the median exceeds the
+threshold or if a module that should load lazily (requests, asyncio, the
+process pool, ...) was imported at startup.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+ENTRY_POINT = "get_papers.cli"
+
+# Only the stages that need them may import these.
+LAZY_MODULES = ("requests", "urllib3", "asyncio", "concurrent.futures", "multiprocessing", "lxml", "pyarrow", "httpx")
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+    return env
+
+
+def parse_importtime(stderr: str, module: str = ENTRY_POINT) -> Dict[str, Tuple[int, int]]:
+    """
+    Maps `module` and everything it imported to (self, cumulative) microseconds.
+
+    `-X importtime` lists a module after its own imports, indented one level
+    deeper, so the subtree is the run of deeper lines just above `module`.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        fields = line[len("import time:"):].split("|")
+        if not line.startswith("import time:") or len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # Other output, or the header row
+        name = fields[2].rstrip()
+        rows.append((name.strip(), len(name) - len(name.strip()), int(fields[0]), int(fields[1])))
+
+    for end, (name, depth, _, _) in enumerate(rows):
+        if name == module:
+            start = end
+            while start > 0 and rows[start - 1][1] > depth:
+                start -= 1
+            return {row[0]: (row[2], row[3]) for row in rows[start:end + 1]}
+    raise ValueError(f"{module} does not appear in the importtime output.")
+
+
+def measure_import() -> Dict[str, Tuple[int, int]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {ENTRY_POINT}"],
+        capture_output=True, text=True, env=_env(), check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def measure_help() -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", ENTRY_POINT, "--help"],
+        stdout=subprocess.DEVNULL, env=_env(), check=True,
+    )
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    args = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args.add_argument("--runs", type=int, default=5)
+    args.add_argument("--threshold-ms", type=float, default=120.0,
+                      help="Fail if the median cumulative import time of the CLI exceeds this.")
+    args.add_argument("--top", type=int, default=10, help="Number of slowest imports to list.")
+    options = args.parse_args()
+
+    runs = [measure_import() for _ in range(options.runs)]
+    cumulative = statistics.median(run[ENTRY_POINT][1] for run in runs) / 1e3
+    help_wall = statistics.median(measure_help() for _ in range(options.runs)) * 1e3
+
+    last = runs[-1]
+    slowest: List[Tuple[str, Tuple[int, int]]] = sorted(
+        last.items(), key=lambda item: item[1][0], reverse=True
+    )[:options.top]
+
+    print(f"import {ENTRY_POINT}: {cumulative:.1f}ms cumulative (median of {options.runs}), "
+          f"threshold {options.threshold_ms:.0f}ms")
+    print(f"{ENTRY_POINT} --help: {help_wall:.1f}ms wall")
+    print(f"{'self':>9} {'cumulative':>11}  module")
+    for name, (own_us, cumulative_us) in slowest:
+        print(f"{own_us / 1e3:>7.1f}ms {cumulative_us / 1e3:>9.1f}ms  {name}")
+
+    eager = [name for name in LAZY_MODULES if name in last]
+    failed = False
+    if eager:
+        print(f"FAIL: imported at startup: {', '.join(eager)}")
+        failed = True
+    if cumulative > options.threshold_ms:
+        print(f"FAIL: startup {cumulative:.1f}ms exceeds {options.threshold_ms:.0f}ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,590 @@
 import argparse
-from get_papers.src.fetcher import fetch_pubmed_ids, fetch_pubmed_details
-from get_papers.src.parser import parse_pubmed_xml
-from get_papers.src.exporter import export_to_csv
+import os
+import re
+import sys
+import time
+from datetime import date
+from collections import deque
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from get_papers.src.archive import ARCHIVE_CODECS, DEFAULT_ARCHIVE_CODEC, ArchiveWriter, ArticleArchive
+from get_papers.src.cache import ArticleCache, default_cache_dir
+from get_papers.src.checkpoint import Checkpoint, default_checkpoint_path
+from get_papers.src.delta import DELTA_STATE_FILENAME, DeltaState, format_date, iter_delta_ids, parse_date
+from get_papers.src.fetcher import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CONCURRENCY,
+    fetch_pubmed_ids,
+    iter_history_details,
+    iter_pubmed_details,
+    iter_pubmed_ids,
+    search_pubmed_history,
+)
+from get_papers.src.filters import (
+    DEFAULT_AFFILIATION_CACHE_SIZE,
+    affiliation_cache_stats,
+    configure_affiliation_cache,
+    set_affiliation_dictionary,
+)
+from get_papers.src.index import INDEX_FILENAME, PaperIndex
+from get_papers.src.metrics import Metrics, enable_metrics
+from get_papers.src.parser import XML_BACKENDS, set_parser_backend
+from get_papers.src.pipeline import iter_parsed_batches
+from get_papers.src.ratelimit import TokenBucket, ncbi_rate_limit
+from get_papers.src.resilience import DEFAULT_MAX_ATTEMPTS, FetchPolicy
+from get_papers.src.exporter import (
+    FORMAT_EXTENSIONS,
+    WRITERS,
+    PaperWriter,
+    detect_format,
+    merge_papers,
+    open_writer,
+    read_papers,
+)
+from get_papers.src.types import CheckpointPlan
 
-def main():
+# Suffix of the scratch file a delta run exports to before merging into --file
+DELTA_SUFFIX = ".delta"
+
+# Names given in --queries files; they become file names in --output-dir.
+QUERY_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]{0,99}")
+
+def year_range(text: str) -> Tuple[Optional[int], Optional[int]]:
+    """Parses "2023", "2020-2023", "2020-" or "-2023" into inclusive bounds."""
+    first, sep, last = text.partition("-")
+    try:
+        low = int(first) if first else None
+        high = (int(last) if last else None) if sep else low
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid year or range: {text!r}")
+    return low, high
+
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Fetch PubMed papers with non-academic authors.")
-    parser.add_argument("query", type=str, help="PubMed query string.")
+    parser.add_argument("query", type=str, nargs="?", help="PubMed query string.")
     parser.add_argument("-d", "--debug", action="store_true", help="Enable debug output.")
-    parser.add_argument("-f", "--file", type=str, help="Output CSV filename.")
-    args = parser.parse_args()
+    parser.add_argument("-f", "--file", type=str, help="Output filename.")
+    parser.add_argument("--format", choices=sorted(WRITERS),
+                        help="Output format for --file (default: from the file extension, else csv).")
+    parser.add_argument("--queries", type=str, metavar="FILE",
+                        help="Run many queries in one pass: one query per line, optionally as "
+                             "'name<TAB>query'. Each query pages through up to 10,000 matches; PMIDs "
+                             "shared between queries are fetched once.")
+    parser.add_argument("--output-dir", type=str,
+                        help="With --queries: directory for the per-query output files.")
+    parser.add_argument("--all", action="store_true",
+                        help="Fetch every matching paper via the E-utilities history server.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Records per EFetch request (default: {DEFAULT_BATCH_SIZE}).")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Maximum EFetch requests in flight (default: {DEFAULT_CONCURRENCY}).")
+    parser.add_argument("--api-key", type=str, default=os.environ.get("NCBI_API_KEY"),
+                        help="NCBI API key (default: $NCBI_API_KEY). Raises the rate limit to 10 req/s.")
+    parser.add_argument("--cache-dir", type=str, default=default_cache_dir(),
+                        help="Directory for the per-PMID article cache (default: %(default)s).")
+    parser.add_argument("--no-cache", action="store_true", help="Always download articles from PubMed.")
+    parser.add_argument("--affiliation-cache-size", type=int, default=DEFAULT_AFFILIATION_CACHE_SIZE,
+                        help="Distinct affiliations memoized during classification; 0 disables "
+                             f"(default: {DEFAULT_AFFILIATION_CACHE_SIZE}).")
+    parser.add_argument("--dictionary", type=str, metavar="PATH",
+                        help="JSON file (or package:resource) with academic keywords, company indicators and "
+                             "company names with aliases; reloaded if it changes during a run.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes used to parse and classify fetched batches (default: 1).")
+    parser.add_argument("--xml-backend", choices=["auto", *XML_BACKENDS], default="auto",
+                        help="XML parser: lxml if installed, else the standard library (default: %(default)s).")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run from the checkpoint next to --file.")
+    parser.add_argument("--delta", action="store_true",
+                        help="Only fetch papers added or modified since the query's last --delta run "
+                             "and merge them into --file.")
+    parser.add_argument("--delta-datetype", choices=["mdat", "edat"], default="mdat",
+                        help="Date field for --delta: mdat catches new and revised records, "
+                             "edat only new ones (default: %(default)s).")
+    parser.add_argument("--state-file", type=str,
+                        help=f"Where --delta remembers each query's last run "
+                             f"(default: {DELTA_STATE_FILENAME} in --cache-dir).")
+    parser.add_argument("--index", nargs="?", const="", metavar="PATH",
+                        help="Keep every fetched article, with all authors and affiliations, in a local "
+                             f"full-text index (default PATH: {INDEX_FILENAME} in --cache-dir).")
+    parser.add_argument("--offline", action="store_true",
+                        help="Answer from the --index file instead of PubMed; the query is then "
+                             "an FTS5 query over title terms ('' matches everything).")
+    parser.add_argument("--company", type=str, help="With --offline: only papers with this company affiliation.")
+    parser.add_argument("--year", type=year_range, metavar="YYYY[-YYYY]",
+                        help="With --offline: only papers published in this year or range of years.")
+    parser.add_argument("--archive", type=str, metavar="PATH",
+                        help="Append the raw XML of every fetched article to a compressed archive at PATH.")
+    parser.add_argument("--archive-codec", choices=ARCHIVE_CODECS,
+                        help=f"Block compression for a new --archive (default: {DEFAULT_ARCHIVE_CODEC}; "
+                             "an existing archive keeps its own).")
+    parser.add_argument("--from-archive", type=str, metavar="PATH",
+                        help="Parse every article in this archive instead of querying PubMed.")
+    parser.add_argument("--metrics", type=str, metavar="PATH",
+                        help="Write per-stage request, parse and export metrics to PATH ('-' for stderr).")
+    parser.add_argument("--metrics-format", choices=["json", "prometheus"], default="json",
+                        help="Format for --metrics (default: %(default)s).")
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help="Attempts per EFetch request on 429/5xx or connection errors before its batch "
+                             "is set aside for --resume (default: %(default)s).")
+    parser.add_argument("--fail-fast", action="store_true",
+                        help="Abort the run on the first failed request instead of retrying and setting "
+                             "failed batches aside.")
+    return parser
+
+def read_queries(path: str) -> List[Tuple[str, str]]:
+    """Reads (name, query) pairs, skipping blank lines and # comments.
+
+    Unnamed queries are named after their text, e.g. "CRISPR AND 2023[dp]"
+    becomes "CRISPR_AND_2023_dp", with a numeric suffix on collisions.
+    Names become file names in --output-dir, so a given name must be a plain
+    file name (letters, digits, ".", "_" and "-", not starting with ".") and
+    may only be used once.
+
+    Raises:
+        ValueError: If a given name is not a plain file name or is already taken.
+    """
+    queries = []
+    # Case-folded, since the output files may live on a case-insensitive filesystem
+    taken: Set[str] = set()
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            name, sep, query = line.partition("\t")
+            name, query = name.strip(), query.strip()
+            if sep:
+                if not QUERY_NAME.fullmatch(name):
+                    raise ValueError(f"line {number}: query name {name!r} is not a plain file name "
+                                     "(up to 100 letters, digits, '.', '_' and '-').")
+                if name.casefold() in taken:
+                    raise ValueError(f"line {number}: query name {name!r} is used more than once.")
+            else:
+                query = line
+                base = name = re.sub(r"[^A-Za-z0-9]+", "_", query).strip("_")[:60] or "query"
+                suffix = 1
+                while name.casefold() in taken:
+                    suffix += 1
+                    name = f"{base}_{suffix}"
+            taken.add(name.casefold())
+            queries.append((name, query))
+    return queries
+
+def index_path(args: argparse.Namespace) -> str:
+    return args.index or os.path.join(args.cache_dir, INDEX_FILENAME)
+
+def open_archive(parser: argparse.ArgumentParser, args: argparse.Namespace) -> Optional[ArchiveWriter]:
+    if not args.archive:
+        return None
+    try:
+        return ArchiveWriter(args.archive, codec=args.archive_codec)
+    except (OSError, ValueError, ImportError) as e:
+        parser.error(f"Could not open archive {args.archive}: {e}")
+
+def delta_state(args: argparse.Namespace) -> DeltaState:
+    return DeltaState(args.state_file or os.path.join(args.cache_dir, DELTA_STATE_FILENAME))
+
+def fetch_policy(parser: argparse.ArgumentParser, args: argparse.Namespace) -> Optional[FetchPolicy]:
+    if args.fail_fast:
+        return None
+    if args.max_attempts <= 0:
+        parser.error("--max-attempts must be a positive integer.")
+    return FetchPolicy(max_attempts=args.max_attempts, debug=args.debug)
+
+def write_metrics(path: str, metrics: Metrics, format: str) -> None:
+    """Writes the collected metrics to `path`, or to stderr for '-'."""
+    text = metrics.to_prometheus() if format == "prometheus" else metrics.to_json() + "\n"
+    if path == "-":
+        sys.stderr.write(text)
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
 
-    ids = fetch_pubmed_ids(args.query, debug=args.debug)
-    xml_data = fetch_pubmed_details(ids, debug=args.debug)
-    papers = parse_pubmed_xml(xml_data)
+def build_plan(args: argparse.Namespace, limiter: Optional[TokenBucket] = None) -> CheckpointPlan:
+    """Runs the search and records what the rest of the run has to fetch."""
+    plan: CheckpointPlan = {
+        "query": args.query,
+        "ids": None,
+        "history": None,
+        "batch_size": args.batch_size,
+        "format": args.format or (detect_format(args.file) if args.file else "csv"),
+        "maxdate": None,
+    }
+    if args.delta:
+        # The window starts on the last run's day again, so records modified
+        # later that day are not missed; the merge drops the duplicates.
+        until = date.today()
+        since = delta_state(args).last_run(args.query)
+        if args.debug:
+            print(f"Delta window: {format_date(since) if since else 'beginning'} to {format_date(until)}")
+        plan["ids"] = list(iter_delta_ids(
+            args.query, since, until,
+            datetype=args.delta_datetype, debug=args.debug, api_key=args.api_key, limiter=limiter,
+        ))
+        plan["maxdate"] = format_date(until)
+    elif args.all:
+        plan["history"] = search_pubmed_history(args.query, debug=args.debug, api_key=args.api_key, limiter=limiter)
+    else:
+        plan["ids"] = fetch_pubmed_ids(args.query, debug=args.debug, api_key=args.api_key, limiter=limiter)
+    return plan
+
+def fetch_batches(
+    checkpoint: Checkpoint,
+    indices: List[int],
+    args: argparse.Namespace,
+    cache: Optional[ArticleCache],
+    track: bool = True,
+    index: Optional[PaperIndex] = None,
+    archive: Optional[ArchiveWriter] = None,
+    policy: Optional[FetchPolicy] = None,
+    fetched: Optional[Deque[int]] = None,
+    limiter: Optional[TokenBucket] = None,
+) -> Iterator[str]:
+    """Fetches the given batches of a plan, optionally marking each one as fetched, indexing and archiving it.
+
+    Batches the policy quarantines are skipped and stay pending in the
+    checkpoint; the index of every batch that is yielded is appended to
+    `fetched`, so callers can tell which batch each result belongs to.
+    """
+    fetch_options = dict(
+        batch_size=checkpoint.plan["batch_size"],
+        concurrency=args.concurrency,
+        api_key=args.api_key,
+        debug=args.debug,
+        limiter=limiter,
+    )
+    if policy is not None:
+        fetch_options["policy"] = policy
+    history = checkpoint.plan["history"]
+    if history is not None:
+        batches = iter_history_details(
+            history, retstarts=[checkpoint.batch_retstart(i) for i in indices], **fetch_options
+        )
+    else:
+        # Every batch but the last is full, so the pending IDs re-chunk into the same batches.
+        ids = (pmid for i in indices for pmid in checkpoint.batch_ids(i))
+        # The cache is keyed by PMID, so it only applies when we hold the ID list.
+        batches = iter_pubmed_details(ids, cache=cache, **fetch_options)
+
+    # Batches come back in plan order, so any skipped before this one are already quarantined.
+    remaining = iter(indices)
+    for xml_data in _recorded(batches, index, archive, args.debug):
+        batch_index = next(remaining)
+        while policy is not None and _quarantined(checkpoint, batch_index, policy):
+            batch_index = next(remaining)
+        if track:
+            checkpoint.mark(batch_index, "fetched")
+        if fetched is not None:
+            fetched.append(batch_index)
+        yield xml_data
+
+def _quarantined(checkpoint: Checkpoint, batch_index: int, policy: FetchPolicy) -> bool:
+    if checkpoint.plan["history"] is not None:
+        return checkpoint.batch_retstart(batch_index) in policy.quarantine
+    return checkpoint.batch_ids(batch_index) in policy.quarantine
+
+def quarantine_message(policy: FetchPolicy, resumable: bool) -> str:
+    """Describes the batches a run set aside, and how to fetch them again."""
+    failed = f"{len(policy.quarantine)} batch(es) failed after {policy.max_attempts} attempts"
+    if resumable:
+        return f"{failed} and were left pending; rerun with --resume to fetch them."
+    retstarts = [str(entry["retstart"]) for entry in policy.quarantine if entry["retstart"] is not None]
+    missing = f"history windows at retstart {', '.join(retstarts)}" if retstarts else \
+        f"PMIDs {', '.join(policy.quarantine.pmids())}"
+    return f"{failed}; these are missing from the results: {missing}"
+
+def run_offline(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Answers the query from the local index without contacting PubMed."""
+    if args.resume or args.delta or args.all:
+        parser.error("--offline cannot be combined with --resume, --delta or --all.")
+    path = index_path(args)
+    if not os.path.exists(path):
+        parser.error(f"No index at {path}; build one with --index during a normal run.")
+
+    min_year, max_year = args.year or (None, None)
+    with PaperIndex(path) as index:
+        papers = index.search_papers(args.query, company=args.company, min_year=min_year, max_year=max_year)
 
     if args.file:
-        export_to_csv(papers, args.file)
-        print(f"Results saved to {args.file}")
+        with open_writer(args.file, args.format) as writer:
+            writer.write_batch(papers)
+        print(f"Results saved to {args.file} ({writer.rows_written} papers)")
     else:
         for paper in papers:
-            print(paper)
+            print(paper.to_dict())
+
+def run_from_archive(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Re-parses the articles kept in an archive without contacting PubMed."""
+    if args.resume or args.delta or args.all or args.offline or args.archive:
+        parser.error("--from-archive cannot be combined with --resume, --delta, --all, --offline or --archive.")
+    try:
+        archive = ArticleArchive(args.from_archive)
+    except (OSError, ValueError, ImportError) as e:
+        parser.error(f"Could not open archive {args.from_archive}: {e}")
+
+    paper_index = None if args.index is None else PaperIndex(index_path(args))
+    try:
+        parsed = iter_parsed_batches(
+            _recorded(archive.iter_batches(args.batch_size), paper_index, None, args.debug),
+            workers=args.workers,
+            debug=args.debug,
+            affiliation_cache_size=args.affiliation_cache_size,
+        )
+        if args.file:
+            with open_writer(args.file, args.format) as writer:
+                for papers in parsed:
+                    writer.write_batch(papers)
+            print(f"Results saved to {args.file} ({writer.rows_written} papers from {len(archive)} archived articles)")
+        else:
+            for papers in parsed:
+                for paper in papers:
+                    print(paper.to_dict())
+    finally:
+        archive.close()
+        if paper_index is not None:
+            paper_index.close()
+
+def _recorded(
+    batches: Iterable[str],
+    index: Optional[PaperIndex],
+    archive: Optional[ArchiveWriter],
+    debug: bool,
+) -> Iterator[str]:
+    for xml_data in batches:
+        if index is not None:
+            index.add_xml(xml_data, debug=debug)
+        if archive is not None:
+            archive.add_xml(xml_data)
+        yield xml_data
+
+def run_batch(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Runs every query in --queries through one shared fetch and parse pipeline.
+
+    Each query's IDs are resolved separately, but the union is fetched and
+    parsed once; every paper is then written to the output of each query
+    that matched it, in the order the union was first seen.
+    """
+    if args.query is not None or args.resume or args.delta or args.all or args.offline or args.from_archive:
+        parser.error("--queries cannot be combined with a query argument, --resume, --delta, --all, --offline "
+                     "or --from-archive.")
+    if not args.output_dir:
+        parser.error("--queries needs --output-dir for the per-query outputs.")
+    try:
+        queries = read_queries(args.queries)
+    except (OSError, ValueError) as e:
+        parser.error(f"Could not read {args.queries}: {e}")
+
+    limiter = TokenBucket(ncbi_rate_limit(args.api_key))
+    # PMID -> positions of the queries that matched it, in first-seen order
+    members: Dict[str, List[int]] = {}
+    total = 0
+    for position, (name, query) in enumerate(queries):
+        # Unlike a single query without --all, which keeps ESearch's first page, a batch
+        # query pages through every match up to the ESearch cap.
+        for pmid in iter_pubmed_ids(query, debug=args.debug, api_key=args.api_key, limiter=limiter):
+            total += 1
+            members.setdefault(pmid, []).append(position)
+    if args.debug:
+        print(f"Batch: {len(queries)} queries matched {total} IDs, {len(members)} unique.")
+
+    format = args.format or "csv"
+    extension = next(ext for ext, fmt in FORMAT_EXTENSIONS.items() if fmt == format)
+    os.makedirs(args.output_dir, exist_ok=True)
+    cache = None if args.no_cache else ArticleCache(args.cache_dir)
+    paper_index = None if args.index is None else PaperIndex(index_path(args))
+    archive = open_archive(parser, args)
+    policy = fetch_policy(parser, args)
+
+    batches = iter_pubmed_details(
+        list(members),
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        api_key=args.api_key,
+        cache=cache,
+        debug=args.debug,
+        policy=policy,
+        limiter=limiter,
+    )
+    parsed = iter_parsed_batches(
+        _recorded(batches, paper_index, archive, args.debug),
+        workers=args.workers,
+        debug=args.debug,
+        affiliation_cache_size=args.affiliation_cache_size,
+    )
+
+    writers: List[PaperWriter] = []
+    try:
+        for name, _ in queries:
+            writers.append(open_writer(os.path.join(args.output_dir, name + extension), format))
+        for papers in parsed:
+            routed: Dict[int, list] = {}
+            for paper in papers:
+                for position in members.get(paper.pubmed_id, ()):
+                    routed.setdefault(position, []).append(paper)
+            for position, batch in routed.items():
+                writers[position].write_batch(batch)
+    finally:
+        for writer in writers:
+            writer.close()
+        if cache is not None:
+            cache.close()
+        if paper_index is not None:
+            paper_index.close()
+        if archive is not None:
+            archive.close()
+
+    for (name, _), writer in zip(queries, writers):
+        print(f"{name}: {writer.rows_written} papers")
+    print(f"Results saved to {args.output_dir} ({len(queries)} queries, {len(members)} unique PMIDs fetched)")
+    if policy is not None and policy.quarantine:
+        sys.exit(quarantine_message(policy, resumable=False))
+
+def run(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Fetches, parses and exports the query's papers from PubMed."""
+    # Delta runs export to a scratch file first and merge once it is complete.
+    output = args.file + DELTA_SUFFIX if args.delta else args.file
+    checkpoint_path = default_checkpoint_path(output) if output else ""
+    # One budget for every ESearch and EFetch request of the run.
+    limiter = TokenBucket(ncbi_rate_limit(args.api_key))
+    if args.resume:
+        if not checkpoint_path or not os.path.exists(checkpoint_path):
+            parser.error("--resume needs --file pointing at an interrupted run's output.")
+        checkpoint = Checkpoint.load(checkpoint_path)
+        if checkpoint.plan["query"] != args.query:
+            parser.error(f"The checkpoint belongs to a different query: {checkpoint.plan['query']!r}")
+        # Drop anything written after the last fully exported batch.
+        if os.path.exists(output):
+            with open(output, "r+b") as f:
+                f.truncate(checkpoint.output_offset)
+    else:
+        checkpoint = Checkpoint(checkpoint_path, build_plan(args, limiter))
+
+    # Only formats that can be appended to are resumable, so only they get a manifest.
+    track = bool(output) and WRITERS[checkpoint.plan["format"]].supports_append
+    if track and not args.resume:
+        checkpoint = Checkpoint.create(checkpoint_path, checkpoint.plan)
+
+    policy = fetch_policy(parser, args)
+    cache: Optional[ArticleCache] = None
+    paper_index: Optional[PaperIndex] = None
+    archive: Optional[ArchiveWriter] = None
+    try:
+        cache = None if args.no_cache else ArticleCache(args.cache_dir)
+        paper_index = None if args.index is None else PaperIndex(index_path(args))
+        archive = open_archive(parser, args)
+        pending = checkpoint.pending_batches()
+        if args.debug and args.resume:
+            print(f"Resuming: {len(pending)} of {checkpoint.total_batches} batches left.")
+
+        # Fetch, parse and export run as one lazy pipeline, one batch at a time.
+        fetched: Deque[int] = deque()
+        parsed = iter_parsed_batches(
+            fetch_batches(
+                checkpoint, pending, args, cache,
+                track=track, index=paper_index, archive=archive, policy=policy, fetched=fetched, limiter=limiter,
+            ),
+            workers=args.workers,
+            debug=args.debug,
+            affiliation_cache_size=args.affiliation_cache_size,
+        )
+
+        if output:
+            with open_writer(output, checkpoint.plan["format"], append=args.resume) as writer:
+                for papers in parsed:
+                    index = fetched.popleft()
+                    if track:
+                        checkpoint.mark(index, "parsed")
+                    writer.write_batch(papers)
+                    if track:
+                        checkpoint.mark(index, "exported", offset=writer.tell(), rows=len(papers))
+            count = checkpoint.rows_exported if track else writer.rows_written
+            incomplete = policy is not None and bool(policy.quarantine)
+            if args.delta and not incomplete:
+                fmt = checkpoint.plan["format"]
+                total = merge_papers(args.file, read_papers(output, fmt), set(checkpoint.plan["ids"] or []), fmt)
+                os.remove(output)
+                maxdate = checkpoint.plan.get("maxdate")
+                if maxdate:
+                    delta_state(args).record(args.query, parse_date(maxdate))
+            elif args.delta and not track:
+                # Nothing to resume from; merging a partial delta would drop the old rows it missed.
+                os.remove(output)
+            if track and not incomplete:
+                checkpoint.remove()
+            if args.delta and incomplete:
+                print(f"Fetched {count} new or updated papers; {args.file} is unchanged until the rest are fetched")
+            elif args.delta:
+                print(f"Merged {count} new or updated papers into {args.file} ({total} papers)")
+            else:
+                print(f"Results saved to {args.file} ({count} papers)")
+        else:
+            for papers in parsed:
+                for paper in papers:
+                    print(paper.to_dict())
+
+        if cache is not None and args.debug:
+            print(f"[Cache] {cache.stats()}")
+        if paper_index is not None and args.debug:
+            print(f"[Index] {len(paper_index)} papers in {paper_index.path}")
+    finally:
+        if cache is not None:
+            cache.close()
+        if paper_index is not None:
+            paper_index.close()
+        if archive is not None:
+            archive.close()
+
+    if archive is not None and args.debug:
+        print(f"[Archive] {len(archive)} articles in {archive.path}")
+
+    if args.debug:
+        for name, stats in affiliation_cache_stats().items():
+            print(f"[Affiliation Cache] {name}: {stats['hits']} hits, {stats['misses']} misses "
+                  f"({stats['hit_rate']:.1%} hit rate)")
+
+    if policy is not None and policy.quarantine:
+        sys.exit(quarantine_message(policy, resumable=track))
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+
+    if args.query is None and not args.queries and not args.from_archive:
+        parser.error("Give a query, --queries with a file of queries, or --from-archive.")
+    if args.delta and not args.file:
+        parser.error("--delta needs --file to merge into.")
+    if args.delta and args.all:
+        parser.error("--delta and --all cannot be combined.")
+    for flag in ("batch_size", "concurrency", "workers"):
+        if getattr(args, flag) <= 0:
+            parser.error(f"--{flag.replace('_', '-')} must be a positive integer.")
+
+    metrics = enable_metrics() if args.metrics else None
+    started = time.perf_counter()
+
+    configure_affiliation_cache(args.affiliation_cache_size)
+    if args.dictionary:
+        try:
+            set_affiliation_dictionary(args.dictionary)
+        except (OSError, ValueError) as e:
+            parser.error(f"Could not load dictionary {args.dictionary}: {e}")
+    try:
+        set_parser_backend(args.xml_backend)
+    except ImportError as e:
+        parser.error(str(e))
+
+    if args.queries:
+        run_batch(parser, args)
+    elif args.offline:
+        run_offline(parser, args)
+    elif args.from_archive:
+        run_from_archive(parser, args)
+    else:
+        run(parser, args)
+
+    if metrics is not None:
+        metrics.observe("run", time.perf_counter() - started)
+        write_metrics(args.metrics, metrics, args.metrics_format)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,443 @@
+"""
+Asynchronous counterparts of the fetch and parse stages, for embedding in asyncio services.
+
+HTTP goes through httpx, which is an optional dependency imported on first use.
+Request parameters, response handling and cache merging are shared with the
+blocking functions in `fetcher`.
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    TypeVar,
+    Union,
+)
+from .cache import ArticleCache
+from .client import DEFAULT_BACKOFF_FACTOR, DEFAULT_MAX_RETRIES, DEFAULT_POOL_SIZE, RETRY_STATUSES, record_response
+from .fetcher import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CONCURRENCY,
+    EFETCH_URL,
+    ESEARCH_URL,
+    _efetch_history_params,
+    _efetch_id_params,
+    _history_from_result,
+    _history_search_params,
+    _id_search_params,
+    _merge_cached,
+)
+from .metrics import active_metrics
+from .parser import parse_pubmed_xml
+from .ratelimit import AsyncTokenBucket, ncbi_rate_limit
+from .types import Paper, SearchHistory
+
+T = TypeVar("T")
+
+
+def _import_httpx() -> Any:
+    try:
+        import httpx
+    except ImportError as e:
+        raise ImportError(
+            "The async API requires httpx. Install it with `pip install 'get-papers-list-VigR[async]'`."
+        ) from e
+    return httpx
+
+
+class AsyncPubMedClient:
+    """
+    Pooled async HTTP client for E-utilities, backed by `httpx.AsyncClient`.
+
+    Every request made through one client draws from a single rate-limit
+    budget (3 req/s, or 10 req/s with an API key), so concurrent queries on the
+    same event loop never exceed NCBI's limit together. 429/5xx responses and
+    transport errors are retried with exponential backoff, honouring
+    `Retry-After`.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        max_connections: int = DEFAULT_POOL_SIZE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        transport: Any = None,
+    ) -> None:
+        if max_connections <= 0:
+            raise ValueError("max_connections must be a positive integer.")
+
+        httpx = _import_httpx()
+        self._httpx = httpx
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.limiter = AsyncTokenBucket(ncbi_rate_limit(api_key))
+        self.session = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            headers={"Accept-Encoding": "gzip, deflate"},
+            transport=transport,
+        )
+
+    def _retry_delay(self, attempt: int, response: Any = None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+        return self.backoff_factor * (2 ** attempt)
+
+    async def _request(self, method: str, url: str, timeout: float, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            await self.limiter.acquire()
+            try:
+                response = await self.session.request(method, url, timeout=timeout, **kwargs)
+            except self._httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(self._retry_delay(attempt))
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    metrics = active_metrics()
+                    if metrics is not None:
+                        # Bytes as received, before gzip decoding
+                        size = response.num_bytes_downloaded
+                        record_response(metrics, url, response.status_code, attempt, size, start)
+                    return response
+                await asyncio.sleep(self._retry_delay(attempt, response))
+            attempt += 1
+
+    async def get(self, url: str, params: Optional[Dict[str, Any]] = None, timeout: float = 10) -> Any:
+        """
+        Sends a rate-limited GET request.
+        """
+        return await self._request("GET", url, timeout, params=params)
+
+    async def post(self, url: str, data: Optional[Dict[str, Any]] = None, timeout: float = 15) -> Any:
+        """
+        Sends a rate-limited, form-encoded POST request.
+        """
+        return await self._request("POST", url, timeout, data=data)
+
+    async def aclose(self) -> None:
+        """
+        Closes the pooled connections.
+        """
+        await self.session.aclose()
+
+    async def __aenter__(self) -> "AsyncPubMedClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+@asynccontextmanager
+async def _client_scope(client: Optional[AsyncPubMedClient], **options: Any) -> AsyncIterator[AsyncPubMedClient]:
+    # A client made here is only used for one call, so close it afterwards.
+    if client is not None:
+        yield client
+        return
+    async with AsyncPubMedClient(**options) as owned:
+        yield owned
+
+
+async def _send(request: Awaitable[Any], what: str) -> Any:
+    httpx = _import_httpx()
+    try:
+        response = await request
+        response.raise_for_status()
+        return response
+    except httpx.HTTPStatusError as e:
+        print(f"[HTTP Error] Failed to fetch {what}: {e}")
+        raise
+    except httpx.RequestError as e:
+        print(f"[Request Error] Failed to connect to PubMed: {e}")
+        raise
+
+
+async def _esearch(params: Dict[str, Any], client: AsyncPubMedClient) -> Dict[str, Any]:
+    if client.api_key:
+        params = dict(params, api_key=client.api_key)
+    response = await _send(client.get(ESEARCH_URL, params=params, timeout=10), "PubMed IDs")
+    try:
+        return response.json().get("esearchresult", {})
+    except ValueError as e:
+        print(f"[Parse Error] Failed to parse JSON response: {e}")
+        raise
+
+
+async def search(
+    query: str,
+    max_results: int = 100,
+    debug: bool = False,
+    client: Optional[AsyncPubMedClient] = None,
+) -> List[str]:
+    """
+    Async version of `fetch_pubmed_ids`.
+
+    Args:
+        query (str): The PubMed search query using full PubMed syntax.
+        max_results (int): Maximum number of IDs to return.
+        debug (bool): If True, print debug information.
+        client (Optional[AsyncPubMedClient]): Client to use. A temporary one is
+            created and closed when omitted.
+
+    Returns:
+        List[str]: A list of PubMed ID strings.
+
+    Raises:
+        ValueError: If the query is empty or the response is not valid JSON.
+        httpx.HTTPError: If the HTTP request fails.
+    """
+    if not query.strip():
+        raise ValueError("Query string must not be empty.")
+
+    async with _client_scope(client) as client:
+        ids = (await _esearch(_id_search_params(query, max_results), client)).get("idlist", [])
+    if debug:
+        print(f"Fetched {len(ids)} PubMed IDs: {ids}")
+    return ids
+
+
+async def search_history(
+    query: str,
+    debug: bool = False,
+    client: Optional[AsyncPubMedClient] = None,
+) -> SearchHistory:
+    """
+    Async version of `search_pubmed_history`.
+
+    Args:
+        query (str): The PubMed search query using full PubMed syntax.
+        debug (bool): If True, print debug information.
+        client (Optional[AsyncPubMedClient]): Client to use. A temporary one is
+            created and closed when omitted.
+
+    Returns:
+        SearchHistory: The WebEnv, query_key and total hit count of the search.
+
+    Raises:
+        ValueError: If the query is empty or the response has no history data.
+        httpx.HTTPError: If the HTTP request fails.
+    """
+    if not query.strip():
+        raise ValueError("Query string must not be empty.")
+
+    async with _client_scope(client) as client:
+        history = _history_from_result(await _esearch(_history_search_params(query), client))
+    if debug:
+        print(f"Query matched {history['count']} records (query_key={history['query_key']}).")
+    return history
+
+
+async def _efetch(params: Dict[str, Any], client: AsyncPubMedClient, debug: bool) -> str:
+    # POST keeps long ID lists out of the URL.
+    response = await _send(client.post(EFETCH_URL, data=params, timeout=15), "PubMed details")
+    if debug:
+        print(f"Fetched EFetch batch ({len(response.text)} characters).")
+    return response.text
+
+
+async def _aiter(items: Union[Iterable[T], AsyncIterable[T]]) -> AsyncIterator[T]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def _achunked(ids: Union[Iterable[str], AsyncIterable[str]], size: int) -> AsyncIterator[List[str]]:
+    batch: List[str] = []
+    async for pmid in _aiter(ids):
+        batch.append(pmid)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _stream_batches(
+    batches: AsyncIterable[T],
+    fetch: Callable[[T], Awaitable[str]],
+    concurrency: int,
+) -> AsyncIterator[str]:
+    """
+    Runs `fetch` for each batch as a task, at most `concurrency` at once.
+
+    Results are yielded in submission order as soon as they are ready; tasks
+    still pending when the consumer stops are cancelled.
+    """
+    pending: Deque["asyncio.Task[str]"] = deque()
+    try:
+        async for batch in batches:
+            pending.append(asyncio.ensure_future(fetch(batch)))
+            if len(pending) >= concurrency:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def iter_batches(
+    ids: Union[Iterable[str], AsyncIterable[str]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    debug: bool = False,
+    client: Optional[AsyncPubMedClient] = None,
+    cache: Optional[ArticleCache] = None,
+) -> AsyncIterator[str]:
+    """
+    Async version of `iter_pubmed_details`.
+
+    Requests are throttled by the client's shared rate limiter, so several
+    of these iterators can run on one loop at once. Cache lookups run in a
+    worker thread to keep SQLite I/O off the event loop.
+
+    Args:
+        ids (Union[Iterable[str], AsyncIterable[str]]): PubMed IDs to fetch.
+        batch_size (int): Number of IDs per EFetch request.
+        concurrency (int): Maximum number of requests in flight for this iterator.
+        debug (bool): If True, print debug information.
+        client (Optional[AsyncPubMedClient]): Client to use. A temporary one is
+            created and closed when omitted.
+        cache (Optional[ArticleCache]): Per-PMID article cache to read from and fill.
+
+    Yields:
+        str: The XML response for each batch, in ID order.
+
+    Raises:
+        ValueError: If `batch_size` or `concurrency` is not positive.
+        httpx.HTTPError: If an HTTP request fails.
+    """
+    if batch_size <= 0 or concurrency <= 0:
+        raise ValueError("batch_size and concurrency must be positive integers.")
+
+    async with _client_scope(client, max_connections=concurrency) as client:
+        api_key = client.api_key
+
+        async def fetch(batch: List[str]) -> str:
+            if cache is None:
+                return await _efetch(_efetch_id_params(batch, api_key), client, debug)
+
+            articles = await asyncio.to_thread(cache.get_many, batch)
+            missing = [pmid for pmid in batch if pmid not in articles]
+            if debug:
+                print(f"EFetch batch of {len(batch)} IDs: {len(articles)} cached, {len(missing)} to fetch.")
+            metrics = active_metrics()
+            if metrics is not None:
+                metrics.incr("cache_hits", len(articles))
+                metrics.incr("cache_misses", len(missing))
+            xml_data = await _efetch(_efetch_id_params(missing, api_key), client, debug) if missing else None
+            return await asyncio.to_thread(_merge_cached, batch, articles, xml_data, cache)
+
+        async for xml_data in _stream_batches(_achunked(ids, batch_size), fetch, concurrency):
+            yield xml_data
+
+
+async def iter_history_batches(
+    history: SearchHistory,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    debug: bool = False,
+    client: Optional[AsyncPubMedClient] = None,
+) -> AsyncIterator[str]:
+    """
+    Async version of `iter_history_details`.
+
+    Args:
+        history (SearchHistory): The handle returned by `search_history`.
+        batch_size (int): Number of records per EFetch request.
+        concurrency (int): Maximum number of requests in flight for this iterator.
+        debug (bool): If True, print debug information.
+        client (Optional[AsyncPubMedClient]): Client to use. A temporary one is
+            created and closed when omitted.
+
+    Yields:
+        str: The XML response for each `retstart` window, in order.
+
+    Raises:
+        ValueError: If `batch_size` or `concurrency` is not positive.
+        httpx.HTTPError: If an HTTP request fails.
+    """
+    if batch_size <= 0 or concurrency <= 0:
+        raise ValueError("batch_size and concurrency must be positive integers.")
+
+    async with _client_scope(client, max_connections=concurrency) as client:
+        async def fetch(retstart: int) -> str:
+            if debug:
+                print(f"Fetching EFetch window at retstart={retstart}.")
+            params = _efetch_history_params(history, retstart, batch_size, client.api_key)
+            return await _efetch(params, client, debug)
+
+        retstarts = _aiter(range(0, history["count"], batch_size))
+        async for xml_data in _stream_batches(retstarts, fetch, concurrency):
+            yield xml_data
+
+
+async def iter_papers(batches: AsyncIterable[str], debug: bool = False) -> AsyncIterator[Paper]:
+    """
+    Parses fetched batches and yields their papers one at a time.
+
+    Parsing is CPU-bound, so each batch is parsed in a worker thread rather
+    than on the event loop.
+
+    Args:
+        batches (AsyncIterable[str]): EFetch XML documents, e.g. from `iter_batches`.
+        debug (bool): If True, prints debug messages.
+
+    Yields:
+        Paper: Papers with at least one non-academic author, in batch order.
+    """
+    async for xml_data in batches:
+        for paper in await asyncio.to_thread(parse_pubmed_xml, xml_data, debug):
+            yield paper
+
+
+async def fetch_papers(
+    query: str,
+    max_results: int = 100,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    debug: bool = False,
+    client: Optional[AsyncPubMedClient] = None,
+    cache: Optional[ArticleCache] = None,
+) -> AsyncIterator[Paper]:
+    """
+    Searches, fetches and parses in one async stream.
+
+    Args:
+        query (str): The PubMed search query using full PubMed syntax.
+        max_results (int): Maximum number of IDs to search for.
+        batch_size (int): Number of IDs per EFetch request.
+        concurrency (int): Maximum number of requests in flight.
+        debug (bool): If True, print debug information.
+        client (Optional[AsyncPubMedClient]): Client to use. A temporary one is
+            created and closed when omitted.
+        cache (Optional[ArticleCache]): Per-PMID article cache to read from and fill.
+
+    Yields:
+        Paper: Papers with at least one non-academic author.
+    """
+    async with _client_scope(client, max_connections=concurrency) as client:
+        ids = await search(query, max_results=max_results, debug=debug, client=client)
+        batches = iter_batches(ids, batch_size, concurrency, debug=debug, client=client, cache=cache)
+        async for paper in iter_papers(batches, debug=debug):
+            yield paper
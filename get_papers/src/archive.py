@@ -0,0 +1,367 @@
+import gzip
+import mmap
+import os
+import struct
+import threading
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+from .cache import join_pubmed_articles, split_pubmed_articles
+from .fetcher import DEFAULT_BATCH_SIZE
+from .metrics import active_metrics
+
+ARCHIVE_MAGIC = b"GPXARCH1"
+ARCHIVE_CODECS = ("gzip", "zstd")
+DEFAULT_ARCHIVE_CODEC = "gzip"
+DEFAULT_BLOCK_SIZE = 1024 ** 2          # Uncompressed bytes of XML per block
+
+# File header: magic and codec name.
+_HEADER = struct.Struct("<8s8s")
+# Each compressed block is preceded by its size, so blocks can be re-read without the index.
+_FRAME = struct.Struct("<I")
+# Block payloads are a run of (pmid, length) headers each followed by that many bytes of XML.
+_RECORD = struct.Struct("<QI")
+# Block table entry: file offset and compressed size of one block.
+_BLOCK = struct.Struct("<QI")
+# Index entry, sorted by PMID: block number, offset and length of the XML in the block payload.
+_ENTRY = struct.Struct("<QIII")
+# Trailer: block table offset, block count, index offset, article count, magic.
+_TRAILER = struct.Struct("<QQQQ8s")
+
+
+def _import_zstandard() -> Any:
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(
+            "The zstd archive codec requires zstandard. "
+            "Install it with `pip install 'get-papers-list-VigR[archive]'`."
+        ) from e
+    return zstandard
+
+
+def _codec(name: str) -> Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    """
+    Returns the (compress, decompress) functions for an archive codec.
+
+    Raises:
+        ValueError: If the codec is unknown.
+        ImportError: If the codec's library is not installed.
+    """
+    if name == "gzip":
+        return (lambda data: gzip.compress(data, mtime=0)), gzip.decompress
+    if name == "zstd":
+        zstandard = _import_zstandard()
+        return zstandard.ZstdCompressor().compress, zstandard.ZstdDecompressor().decompress
+    raise ValueError(f"Unknown archive codec {name!r}; expected one of {', '.join(ARCHIVE_CODECS)}.")
+
+
+def _pmid_key(pmid: str) -> int:
+    if not pmid.isdigit():
+        raise ValueError(f"PMID {pmid!r} is not numeric.")
+    return int(pmid)
+
+
+def _read_header(data: bytes, path: str) -> str:
+    if len(data) < _HEADER.size:
+        raise ValueError(f"{path} is not an article archive.")
+    magic, codec = _HEADER.unpack_from(data)
+    if magic != ARCHIVE_MAGIC:
+        raise ValueError(f"{path} is not an article archive.")
+    return codec.rstrip(b"\0").decode("ascii")
+
+
+def _read_trailer(data: Any) -> Optional[Tuple[int, int, int, int]]:
+    if len(data) < _HEADER.size + _TRAILER.size:
+        return None
+    *layout, magic = _TRAILER.unpack_from(data, len(data) - _TRAILER.size)
+    return tuple(layout) if magic == ARCHIVE_MAGIC else None  # type: ignore[return-value]
+
+
+def _payload_records(payload: bytes) -> Iterator[Tuple[int, int, int]]:
+    """Yields (pmid, start, length) for each article in a decompressed block."""
+    position = 0
+    while position < len(payload):
+        key, length = _RECORD.unpack_from(payload, position)
+        start = position + _RECORD.size
+        yield key, start, length
+        position = start + length
+
+
+class ArchiveWriter:
+    """
+    Appends raw PubmedArticle XML to a compressed, PMID-indexed archive file.
+
+    Articles are packed into blocks of about `block_size` uncompressed bytes
+    and each block is compressed on its own, so a reader only inflates the
+    block holding the article it wants. The block table and a PMID-sorted
+    index are written behind the last block when the writer is closed; until
+    then the file is not readable. Opening an existing archive appends to it,
+    and an article added again under the same PMID replaces the earlier copy.
+    If the run that last wrote the archive was interrupted, its index is
+    rebuilt from the blocks that made it to disk.
+
+    Raises:
+        ValueError: If `path` exists but is not an archive, or `codec`
+            differs from the existing archive's.
+        ImportError: If the codec's library is not installed.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        codec: Optional[str] = None,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+    ) -> None:
+        if block_size <= 0:
+            raise ValueError("block_size must be a positive integer.")
+
+        self.path = path
+        self.block_size = block_size
+        self._blocks: List[Tuple[int, int]] = []
+        self._index: Dict[int, Tuple[int, int, int]] = {}
+        self._pending: List[bytes] = []
+        self._pending_size = 0
+        self._lock = threading.Lock()
+
+        existing = os.path.exists(path) and os.path.getsize(path) > 0
+        if existing:
+            with open(path, "rb") as f:
+                stored = _read_header(f.read(_HEADER.size), path)
+            if codec is not None and codec != stored:
+                raise ValueError(f"{path} uses the {stored} codec, not {codec}.")
+            codec = stored
+
+        self.codec = codec or DEFAULT_ARCHIVE_CODEC
+        self._compress, decompress = _codec(self.codec)
+
+        self._file: BinaryIO
+        if existing:
+            self._file = open(path, "r+b")
+            end = self._load(decompress)
+            # New blocks overwrite the old block table, index and trailer.
+            self._file.truncate(end)
+            self._file.seek(end)
+        else:
+            self._file = open(path, "wb")
+            self._file.write(_HEADER.pack(ARCHIVE_MAGIC, self.codec.encode("ascii")))
+
+    def _load(self, decompress: Callable[[bytes], bytes]) -> int:
+        # Returns where the last intact block ends.
+        with mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            layout = _read_trailer(data)
+            if layout is not None:
+                blocks_at, block_count, index_at, count = layout
+                self._blocks = [_BLOCK.unpack_from(data, blocks_at + n * _BLOCK.size) for n in range(block_count)]
+                for n in range(count):
+                    key, *location = _ENTRY.unpack_from(data, index_at + n * _ENTRY.size)
+                    self._index[key] = tuple(location)  # type: ignore[assignment]
+                return blocks_at
+
+            # No trailer: the writer never closed. Walk the framed blocks instead.
+            position = _HEADER.size
+            while position + _FRAME.size <= len(data):
+                (size,) = _FRAME.unpack_from(data, position)
+                offset = position + _FRAME.size
+                try:
+                    payload = decompress(data[offset:offset + size])
+                except Exception:
+                    break  # A block cut off mid-write
+                for key, start, length in _payload_records(payload):
+                    self._index[key] = (len(self._blocks), start, length)
+                self._blocks.append((offset, size))
+                position = offset + size
+            return position
+
+    def add(self, articles: Dict[str, str]) -> int:
+        """
+        Stores article XML snippets keyed by PMID.
+
+        Args:
+            articles (Dict[str, str]): Serialized `<PubmedArticle>` XML keyed
+                by PMID, as returned by `split_pubmed_articles`.
+
+        Returns:
+            int: The number of articles stored.
+
+        Raises:
+            ValueError: If a PMID is not numeric.
+        """
+        with self._lock:
+            for pmid, xml in articles.items():
+                key = _pmid_key(pmid)
+                data = xml.encode("utf-8")
+                start = self._pending_size + _RECORD.size
+                self._pending.append(_RECORD.pack(key, len(data)))
+                self._pending.append(data)
+                self._pending_size = start + len(data)
+                self._index[key] = (len(self._blocks), start, len(data))
+                if self._pending_size >= self.block_size:
+                    self._flush_block()
+
+        metrics = active_metrics()
+        if metrics is not None:
+            metrics.incr("articles_archived", len(articles))
+        return len(articles)
+
+    def add_xml(self, xml_data: str) -> int:
+        """
+        Splits an EFetch response into articles and stores each of them.
+        """
+        return self.add(split_pubmed_articles(xml_data))
+
+    def _flush_block(self) -> None:
+        if not self._pending:
+            return
+        block = self._compress(b"".join(self._pending))
+        self._file.write(_FRAME.pack(len(block)))
+        self._blocks.append((self._file.tell(), len(block)))
+        self._file.write(block)
+        self._pending = []
+        self._pending_size = 0
+
+    def close(self) -> None:
+        """
+        Writes the last block, the block table and the index, completing the file.
+        """
+        with self._lock:
+            if self._file.closed:
+                return
+            self._flush_block()
+            blocks_at = self._file.tell()
+            self._file.write(b"".join(_BLOCK.pack(*block) for block in self._blocks))
+            index_at = self._file.tell()
+            self._file.write(b"".join(
+                _ENTRY.pack(key, *self._index[key]) for key in sorted(self._index)
+            ))
+            self._file.write(_TRAILER.pack(blocks_at, len(self._blocks), index_at, len(self._index), ARCHIVE_MAGIC))
+            self._file.close()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class ArticleArchive:
+    """
+    Read-only, memory-mapped view of an archive written by `ArchiveWriter`.
+
+    The file is never read into memory as a whole: `get` binary-searches the
+    on-disk PMID index and inflates the one block holding the article, and
+    `iter_articles`/`iter_batches` walk the blocks in order, keeping one
+    decompressed block at a time. Safe to share between threads.
+
+    Raises:
+        ValueError: If `path` is not an archive, or is incomplete. Opening an
+            incomplete archive with `ArchiveWriter` and closing it repairs it.
+        ImportError: If the archive's codec library is not installed.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.codec = _read_header(self._mmap[:_HEADER.size], path)
+            layout = _read_trailer(self._mmap)
+            if layout is None:
+                raise ValueError(f"{path} is incomplete; the run that wrote it did not close it.")
+            self._blocks_at, self._block_count, self._index_at, self._count = layout
+            _, self._decompress = _codec(self.codec)
+        except Exception:
+            self._mmap.close()
+            raise
+        # The most recently inflated block, so neighbouring lookups share it.
+        self._cached: Tuple[int, bytes] = (-1, b"")
+
+    def _block(self, number: int) -> bytes:
+        if self._cached[0] != number:
+            offset, size = _BLOCK.unpack_from(self._mmap, self._blocks_at + number * _BLOCK.size)
+            self._cached = (number, self._decompress(self._mmap[offset:offset + size]))
+        return self._cached[1]
+
+    def _entry(self, position: int) -> Tuple[int, int, int, int]:
+        return _ENTRY.unpack_from(self._mmap, self._index_at + position * _ENTRY.size)
+
+    def _find(self, key: int) -> Optional[Tuple[int, int, int]]:
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._entry(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count:
+            found, block, start, length = self._entry(low)
+            if found == key:
+                return block, start, length
+        return None
+
+    def get(self, pmid: str) -> Optional[str]:
+        """
+        Returns the stored XML of one article, or None if the PMID is not archived.
+        """
+        if not pmid.isdigit():
+            return None
+        with self._lock:
+            location = self._find(int(pmid))
+            if location is None:
+                return None
+            block, start, length = location
+            return self._block(block)[start:start + length].decode("utf-8")
+
+    def __contains__(self, pmid: object) -> bool:
+        return isinstance(pmid, str) and pmid.isdigit() and self._find(int(pmid)) is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def pmids(self) -> Iterator[str]:
+        """
+        Yields every archived PMID in ascending numeric order.
+        """
+        for position in range(self._count):
+            yield str(self._entry(position)[0])
+
+    def iter_articles(self) -> Iterator[Tuple[str, str]]:
+        """
+        Yields (PMID, XML) for every archived article in the order it was added.
+
+        Copies superseded by a later `add` of the same PMID are skipped.
+        """
+        for number in range(self._block_count):
+            with self._lock:
+                payload = self._block(number)
+            for key, start, length in _payload_records(payload):
+                if self._find(key) == (number, start, length):
+                    yield str(key), payload[start:start + length].decode("utf-8")
+
+    def iter_batches(self, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[str]:
+        """
+        Re-assembles the archive into EFetch-style XML documents of up to
+        `batch_size` articles, ready for `parse_pubmed_xml` or `iter_parsed_batches`.
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be a positive integer.")
+        batch: List[str] = []
+        for _, xml in self.iter_articles():
+            batch.append(xml)
+            if len(batch) >= batch_size:
+                yield join_pubmed_articles(batch)
+                batch = []
+        if batch:
+            yield join_pubmed_articles(batch)
+
+    def close(self) -> None:
+        with self._lock:
+            self._mmap.close()
+
+    def __enter__(self) -> "ArticleArchive":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
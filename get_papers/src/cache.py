@@ -0,0 +1,203 @@
+import os
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_CACHE_TTL = 7 * 24 * 3600        # One week, in seconds
+DEFAULT_CACHE_MAX_BYTES = 1024 ** 3      # 1 GiB of compressed XML
+CACHE_FILENAME = "articles.sqlite3"
+
+# Stays under SQLite's bound-parameter limit on older builds
+_IN_CHUNK = 500
+
+
+def default_cache_dir() -> str:
+    """
+    Returns the per-user cache directory, honouring $XDG_CACHE_HOME.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "get-papers-list")
+
+
+def split_pubmed_articles(xml_data: str) -> Dict[str, str]:
+    """
+    Splits an EFetch response into standalone `<PubmedArticle>` XML snippets.
+
+    Args:
+        xml_data (str): The XML string returned by PubMed EFetch API.
+
+    Returns:
+        Dict[str, str]: Serialized article XML keyed by PMID. Articles without
+        a PMID are skipped.
+
+    Raises:
+        xml.etree.ElementTree.ParseError: If the response is not valid XML.
+    """
+    root = ET.fromstring(xml_data)
+    articles: Dict[str, str] = {}
+    for article in root.iter("PubmedArticle"):
+        pmid = article.findtext("MedlineCitation/PMID") or article.findtext(".//PMID")
+        if pmid:
+            articles[pmid.strip()] = ET.tostring(article, encoding="unicode")
+    return articles
+
+
+def join_pubmed_articles(articles: Iterable[str]) -> str:
+    """
+    Wraps article snippets in a `<PubmedArticleSet>` so they parse like an EFetch response.
+    """
+    return "<PubmedArticleSet>" + "".join(articles) + "</PubmedArticleSet>"
+
+
+class ArticleCache:
+    """
+    On-disk cache of raw PubmedArticle XML keyed by PMID.
+
+    Records live in a single SQLite file as zlib-compressed blobs. Entries older
+    than `ttl` seconds count as misses, and once the stored size exceeds
+    `max_bytes` the least recently read records are evicted. The cache is safe
+    to share between fetch worker threads.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        ttl: Optional[float] = DEFAULT_CACHE_TTL,
+        max_bytes: Optional[int] = DEFAULT_CACHE_MAX_BYTES,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, CACHE_FILENAME)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                pmid TEXT PRIMARY KEY,
+                xml BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS articles_accessed_at ON articles (accessed_at);
+        """)
+        self._conn.commit()
+
+    def get_many(self, pmids: Iterable[str]) -> Dict[str, str]:
+        """
+        Looks up several PMIDs at once and updates the hit/miss counters.
+
+        Args:
+            pmids (Iterable[str]): PMIDs to look up.
+
+        Returns:
+            Dict[str, str]: Article XML for every fresh cached PMID.
+        """
+        pmids = list(pmids)
+        if not pmids:
+            return {}
+
+        now = self._clock()
+        found: Dict[str, str] = {}
+        with self._lock:
+            rows: List[Tuple[str, bytes, float]] = []
+            for start in range(0, len(pmids), _IN_CHUNK):
+                chunk = pmids[start:start + _IN_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows.extend(self._conn.execute(
+                    f"SELECT pmid, xml, fetched_at FROM articles WHERE pmid IN ({placeholders})", chunk
+                ))
+
+            expired = []
+            for pmid, blob, fetched_at in rows:
+                if self.ttl is not None and now - fetched_at > self.ttl:
+                    expired.append(pmid)
+                else:
+                    found[pmid] = zlib.decompress(blob).decode("utf-8")
+
+            if expired:
+                self._conn.executemany("DELETE FROM articles WHERE pmid = ?", [(p,) for p in expired])
+            if found:
+                self._conn.executemany(
+                    "UPDATE articles SET accessed_at = ? WHERE pmid = ?", [(now, p) for p in found]
+                )
+            self._conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(pmids) - len(found)
+        return found
+
+    def put_many(self, articles: Dict[str, str]) -> None:
+        """
+        Stores article XML keyed by PMID, then evicts old records if over `max_bytes`.
+        """
+        if not articles:
+            return
+
+        now = self._clock()
+        rows = []
+        for pmid, xml in articles.items():
+            blob = zlib.compress(xml.encode("utf-8"))
+            rows.append((pmid, blob, len(blob), now, now))
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO articles (pmid, xml, size, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        # Drop least recently read records until the cache fits in max_bytes.
+        if self.max_bytes is None:
+            return
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM articles").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        cursor = self._conn.execute("SELECT pmid, size FROM articles ORDER BY accessed_at ASC")
+        stale = []
+        for pmid, size in cursor:
+            if total <= self.max_bytes:
+                break
+            stale.append((pmid,))
+            total -= size
+        self._conn.executemany("DELETE FROM articles WHERE pmid = ?", stale)
+
+    def purge_expired(self) -> int:
+        """
+        Deletes every record older than `ttl` and returns how many were removed.
+        """
+        if self.ttl is None:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM articles WHERE fetched_at < ?", (self._clock() - self.ttl,)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def stats(self) -> str:
+        """
+        Returns a one-line summary of hit/miss counters for debug output.
+        """
+        lookups = self.hits + self.misses
+        rate = (self.hits / lookups * 100) if lookups else 0.0
+        return f"{self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate)"
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,138 @@
+import json
+import os
+from typing import Any, Dict, List, Optional
+from .types import CheckpointPlan
+
+CHECKPOINT_SUFFIX = ".checkpoint"
+
+# Progress a batch moves through, in order
+STAGES = ("fetched", "parsed", "exported")
+
+
+def default_checkpoint_path(output: str) -> str:
+    """
+    Returns the manifest path kept next to an output file.
+    """
+    return output + CHECKPOINT_SUFFIX
+
+
+class Checkpoint:
+    """
+    Append-only manifest recording the progress of a run, batch by batch.
+
+    The first line holds the run plan (query, ID list or history handle, batch
+    size and output format); every later line records one batch reaching a
+    stage. Each event is appended and flushed as it happens, so the manifest
+    survives a crash at any point, and a torn final line is simply ignored on load.
+    """
+
+    def __init__(self, path: str, plan: CheckpointPlan) -> None:
+        self.path = path
+        self.plan = plan
+        self.stages: Dict[int, str] = {}
+        self.output_offset = 0   # Output bytes covered by exported batches
+        self.rows_exported = 0
+
+    @classmethod
+    def create(cls, path: str, plan: CheckpointPlan) -> "Checkpoint":
+        """
+        Starts a new manifest at `path`, replacing any previous one.
+        """
+        checkpoint = cls(path, plan)
+        with open(path, mode="w", encoding="utf-8") as f:
+            f.write(json.dumps(plan) + "\n")
+        return checkpoint
+
+    @classmethod
+    def load(cls, path: str) -> "Checkpoint":
+        """
+        Reads a manifest and replays its progress events.
+
+        Raises:
+            FileNotFoundError: If there is no manifest at `path`.
+            ValueError: If the manifest has no valid plan line.
+        """
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+
+        try:
+            checkpoint = cls(path, json.loads(lines[0]))
+        except (IndexError, ValueError) as e:
+            raise ValueError(f"Checkpoint '{path}' is missing its run plan.") from e
+
+        for line in lines[1:]:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                break  # Torn write from an interrupted run
+            checkpoint._apply(event)
+        return checkpoint
+
+    def _apply(self, event: Dict[str, Any]) -> None:
+        batch, stage = event["batch"], event["stage"]
+        current = self.stages.get(batch)
+        # Stages only move forward.
+        if current is None or STAGES.index(stage) > STAGES.index(current):
+            self.stages[batch] = stage
+        if stage == "exported":
+            self.output_offset = event["offset"]
+            self.rows_exported += event["rows"]
+
+    @property
+    def total_batches(self) -> int:
+        if self.plan["ids"] is not None:
+            total = len(self.plan["ids"])
+        else:
+            total = self.plan["history"]["count"] if self.plan["history"] else 0
+        return -(-total // self.plan["batch_size"])
+
+    def pending_batches(self) -> List[int]:
+        """
+        Returns the indices of batches not yet exported, in order.
+        """
+        return [index for index in range(self.total_batches) if self.stages.get(index) != "exported"]
+
+    def batch_ids(self, index: int) -> List[str]:
+        """
+        Returns the PMIDs of a batch in an ID-list plan.
+        """
+        size = self.plan["batch_size"]
+        return (self.plan["ids"] or [])[index * size:(index + 1) * size]
+
+    def batch_retstart(self, index: int) -> int:
+        """
+        Returns the history-server offset of a batch in a history plan.
+        """
+        return index * self.plan["batch_size"]
+
+    def mark(self, index: int, stage: str, offset: Optional[int] = None, rows: int = 0) -> None:
+        """
+        Records that a batch reached `stage`.
+
+        Args:
+            index (int): The batch index.
+            stage (str): One of `STAGES`.
+            offset (Optional[int]): For "exported", the output size in bytes
+                once the batch was flushed.
+            rows (int): For "exported", the number of rows written.
+        """
+        if stage not in STAGES:
+            raise ValueError(f"Unknown checkpoint stage '{stage}'.")
+
+        event: Dict[str, Any] = {"batch": index, "stage": stage}
+        if stage == "exported":
+            event.update(offset=offset or 0, rows=rows)
+
+        with open(self.path, mode="a", encoding="utf-8") as f:
+            f.write(json.dumps(event) + "\n")
+            f.flush()
+            if stage == "exported":
+                os.fsync(f.fileno())
+        self._apply(event)
+
+    def remove(self) -> None:
+        """
+        Deletes the manifest once the run has finished.
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
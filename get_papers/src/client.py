@@ -0,0 +1,162 @@
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional
+from .lazy import LazyModule
+from .metrics import Metrics, active_metrics
+
+if TYPE_CHECKING:
+    import requests
+else:
+    # requests and urllib3 are loaded when the first client is built.
+    requests = LazyModule("requests")
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+
+# Responses worth retrying: rate limiting and transient server/gateway errors.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def _retries(response: "requests.Response") -> int:
+    # urllib3 records every retried attempt on the final response.
+    history = getattr(getattr(response.raw, "retries", None), "history", ())
+    return len(history) if isinstance(history, tuple) else 0
+
+
+def _body_size(response: "requests.Response") -> int:
+    """
+    Returns the body's size as received, before gzip decoding.
+    """
+    length = response.headers.get("Content-Length") if isinstance(response.headers, Mapping) else None
+    if isinstance(length, str) and length.isdigit():
+        return int(length)
+    # No length header (chunked): urllib3 counts the raw bytes it pulled off the socket.
+    tell = getattr(response.raw, "tell", None)
+    content = response.content  # Reads the whole body, so the count is final.
+    if callable(tell):
+        read = tell()
+        if isinstance(read, int):
+            return read
+    return len(content) if isinstance(content, bytes) else 0
+
+
+def record_response(metrics: Metrics, url: str, status: int, retries: int, size: int, start: float) -> None:
+    """
+    Reports one finished E-utilities request: latency, size, retries and errors.
+
+    Latency covers every retried attempt. Timers are kept overall and per
+    endpoint (`esearch_request`, `efetch_request`).
+    """
+    elapsed = time.perf_counter() - start
+    endpoint = url.rsplit("/", 1)[-1].split(".", 1)[0]
+    metrics.observe("http_request", elapsed)
+    metrics.observe(f"{endpoint}_request", elapsed)
+    metrics.incr("http_requests")
+    metrics.incr("response_bytes", size)
+    if retries:
+        metrics.incr("http_retries", retries)
+    if status >= 400:
+        metrics.incr("http_errors")
+
+
+class PubMedClient:
+    """
+    Reusable HTTP client for E-utilities backed by a pooled `requests.Session`.
+
+    Connections are kept alive and shared between calls, responses are
+    requested gzip-compressed, and 429/5xx responses are retried with
+    exponential backoff (honouring `Retry-After`) before an error surfaces.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+    ) -> None:
+        if pool_size <= 0:
+            raise ValueError("pool_size must be a positive integer.")
+
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.pool_size = pool_size
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "POST"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,  # Hand the last response back so raise_for_status reports it
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, timeout: float = 10) -> "requests.Response":
+        """
+        Sends a GET request over the pooled session.
+        """
+        metrics = active_metrics()
+        if metrics is None:
+            return self.session.get(url, params=params, timeout=timeout)
+        start = time.perf_counter()
+        response = self.session.get(url, params=params, timeout=timeout)
+        record_response(metrics, url, response.status_code, _retries(response), _body_size(response), start)
+        return response
+
+    def post(self, url: str, data: Optional[Dict[str, Any]] = None, timeout: float = 15) -> "requests.Response":
+        """
+        Sends a form-encoded POST request over the pooled session.
+        """
+        metrics = active_metrics()
+        if metrics is None:
+            return self.session.post(url, data=data, timeout=timeout)
+        start = time.perf_counter()
+        response = self.session.post(url, data=data, timeout=timeout)
+        record_response(metrics, url, response.status_code, _retries(response), _body_size(response), start)
+        return response
+
+    def close(self) -> None:
+        """
+        Closes every pooled connection.
+        """
+        self.session.close()
+
+    def __enter__(self) -> "PubMedClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+_default_client: Optional[PubMedClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client(pool_size: int = DEFAULT_POOL_SIZE) -> PubMedClient:
+    """
+    Returns the process-wide client, growing its pool if `pool_size` requires it.
+
+    Args:
+        pool_size (int): Minimum number of pooled connections needed, typically
+            the caller's concurrency.
+
+    Returns:
+        PubMedClient: A shared client with at least `pool_size` connections.
+    """
+    global _default_client
+
+    with _default_client_lock:
+        if _default_client is None or _default_client.pool_size < pool_size:
+            if _default_client is not None:
+                _default_client.close()
+            _default_client = PubMedClient(pool_size=max(pool_size, DEFAULT_POOL_SIZE))
+        return _default_client
@@ -0,0 +1,185 @@
+import json
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+from .client import PubMedClient
+from .fetcher import ESEARCH_MAX_RECORDS, count_pubmed_results, iter_pubmed_ids
+from .ratelimit import TokenBucket
+from .types import DateWindow
+
+ESEARCH_DATE_FORMAT = "%Y/%m/%d"
+
+# Lower bound for a query's first delta run, before any PubMed record dates
+DELTA_EPOCH = date(1900, 1, 1)
+
+DELTA_STATE_FILENAME = "delta_state.json"
+
+
+def format_date(day: date) -> str:
+    """
+    Formats a date the way ESearch's mindate/maxdate expect (YYYY/MM/DD).
+    """
+    return day.strftime(ESEARCH_DATE_FORMAT)
+
+
+def parse_date(value: str) -> date:
+    """
+    Parses a YYYY/MM/DD date as stored in the delta state file.
+    """
+    return datetime.strptime(value, ESEARCH_DATE_FORMAT).date()
+
+
+def partition_date_range(
+    query: str,
+    start: date,
+    end: date,
+    datetype: str = "mdat",
+    max_records: int = ESEARCH_MAX_RECORDS,
+    debug: bool = False,
+    client: Optional[PubMedClient] = None,
+    api_key: Optional[str] = None,
+    limiter: Optional[TokenBucket] = None,
+) -> List[DateWindow]:
+    """
+    Splits [start, end] into date windows that each match at most `max_records` records.
+
+    Windows are bisected until every partition fits under ESearch's retstart
+    ceiling, and empty windows are dropped. A single day that still matches
+    more than `max_records` cannot be split further and is returned as is.
+
+    Args:
+        query (str): The PubMed search query using full PubMed syntax.
+        start (date): First day of the range.
+        end (date): Last day of the range (inclusive).
+        datetype (str): Date field to partition on, e.g. "edat" or "mdat".
+        max_records (int): Largest allowed hit count per window.
+        debug (bool): If True, print debug information.
+        client (Optional[PubMedClient]): HTTP client to use. Defaults to the shared client.
+        api_key (Optional[str]): NCBI API key, sent with every request.
+        limiter (Optional[TokenBucket]): Rate limiter shared with the run's other requests.
+
+    Returns:
+        List[DateWindow]: Non-empty windows in chronological order.
+
+    Raises:
+        ValueError: If `start` is after `end`.
+        requests.exceptions.RequestException: If an HTTP request fails.
+    """
+    if start > end:
+        raise ValueError("start must not be after end.")
+
+    windows: List[DateWindow] = []
+    stack = [(start, end)]
+    while stack:
+        low, high = stack.pop()
+        count = count_pubmed_results(
+            query,
+            mindate=format_date(low),
+            maxdate=format_date(high),
+            datetype=datetype,
+            client=client,
+            api_key=api_key,
+            limiter=limiter,
+        )
+        if count == 0:
+            continue
+
+        if count <= max_records or low == high:
+            if count > max_records and debug:
+                print(f"[Delta Warning] {count} records on {format_date(low)}; only {max_records} can be paged.")
+            windows.append({"mindate": format_date(low), "maxdate": format_date(high), "count": count})
+            continue
+
+        middle = low + (high - low) // 2
+        # Push the later half first so windows come off the stack in date order.
+        stack.append((middle + timedelta(days=1), high))
+        stack.append((low, middle))
+
+    if debug:
+        print(f"Split {format_date(start)}-{format_date(end)} into {len(windows)} date windows.")
+    return windows
+
+
+def iter_delta_ids(
+    query: str,
+    since: Optional[date],
+    until: date,
+    datetype: str = "mdat",
+    debug: bool = False,
+    client: Optional[PubMedClient] = None,
+    api_key: Optional[str] = None,
+    limiter: Optional[TokenBucket] = None,
+) -> Iterator[str]:
+    """
+    Yields the PMIDs of records added or modified between `since` and `until`.
+
+    Args:
+        query (str): The PubMed search query using full PubMed syntax.
+        since (Optional[date]): First day to include, typically the date of the
+            last successful run. None fetches the full history of the query.
+        until (date): Last day to include.
+        datetype (str): "mdat" picks up new and modified records, "edat" only new ones.
+        debug (bool): If True, print debug information.
+        client (Optional[PubMedClient]): HTTP client to use. Defaults to the shared client.
+        api_key (Optional[str]): NCBI API key, sent with every request.
+        limiter (Optional[TokenBucket]): Rate limiter shared with the run's other requests.
+
+    Yields:
+        str: PubMed ID strings, window by window in date order.
+    """
+    windows = partition_date_range(
+        query,
+        since or DELTA_EPOCH,
+        until,
+        datetype=datetype,
+        debug=debug,
+        client=client,
+        api_key=api_key,
+        limiter=limiter,
+    )
+    for window in windows:
+        yield from iter_pubmed_ids(
+            query,
+            mindate=window["mindate"],
+            maxdate=window["maxdate"],
+            datetype=datetype,
+            debug=debug,
+            client=client,
+            api_key=api_key,
+            limiter=limiter,
+        )
+
+
+class DeltaState:
+    """
+    Remembers the date of the last successful run of each standing query.
+
+    State lives in a small JSON file and is replaced atomically on every update.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._runs: Dict[str, str] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._runs = json.load(f)
+
+    def last_run(self, query: str) -> Optional[date]:
+        """
+        Returns the date of the last successful run of `query`, if any.
+        """
+        value = self._runs.get(query)
+        return parse_date(value) if value else None
+
+    def record(self, query: str, run_date: date) -> None:
+        """
+        Stores `run_date` as the last successful run of `query`.
+        """
+        self._runs[query] = format_date(run_date)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, mode="w", encoding="utf-8") as f:
+            json.dump(self._runs, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -1,46 +1,553 @@
+import abc
 import csv
-from typing import List
-from .types import PaperInfo
+import json
+import os
+import time
+from typing import IO, Any, Callable, Collection, Dict, Iterable, Iterator, List, Optional, Sequence, Type, TypeVar
+from .metrics import active_metrics
+from .types import PAPER_FIELDS, Paper, PaperLike
 
+CSV_FIELDNAMES = [
+    "PubmedID",
+    "Title",
+    "Publication Date",
+    "Non-academic Author(s)",
+    "Company Affiliation(s)",
+    "Corresponding Author Email",
+    "Company Name(s)",
+]
 
-def export_to_csv(papers: List[PaperInfo], filename: str) -> None:
+# Rows buffered before each write + flush to disk
+DEFAULT_FLUSH_EVERY = 500
+
+# Rows per Parquet row group / Arrow record batch
+DEFAULT_ROW_GROUP_SIZE = 10000
+
+P = TypeVar("P", bound=PaperLike)
+
+
+def _chunked(papers: Iterable[P], size: int) -> Iterator[List[P]]:
+    chunk: List[P] = []
+    for paper in papers:
+        chunk.append(paper)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _as_paper(paper: PaperLike) -> Paper:
+    return paper if isinstance(paper, Paper) else Paper.from_dict(paper)
+
+
+def _csv_row(paper: Paper) -> Dict[str, str]:
+    return {
+        "PubmedID": paper.pubmed_id,
+        "Title": paper.title,
+        "Publication Date": paper.pub_date,
+        "Non-academic Author(s)": "; ".join(paper.non_academic_authors),
+        "Company Affiliation(s)": "; ".join(paper.company_affiliations),
+        "Corresponding Author Email": paper.corresponding_email or "",
+        "Company Name(s)": "; ".join(paper.companies),
+    }
+
+
+def _report_file_error(filename: str, e: Exception) -> None:
+    print(f"[File Error] Could not write to file '{filename}': {e}")
+
+
+class PaperWriter(abc.ABC):
+    """
+    Base class for incremental paper writers.
+
+    Each `write_batch` call writes and flushes one batch of papers, so callers
+    can checkpoint after it returns. Only file and encoding errors are reported
+    by the writer; errors raised while producing papers upstream propagate
+    untouched. Plain `PaperInfo` dictionaries are accepted alongside `Paper`
+    records.
+    """
+
+    format_name = ""
+    supports_append = False
+
+    def __init__(self, filename: str, append: bool = False) -> None:
+        if append and not self.supports_append:
+            raise ValueError(f"{self.format_name} output cannot be appended to.")
+        self.filename = filename
+        self.append = append
+        self.rows_written = 0
+
+    def write_batch(self, papers: Sequence[PaperLike]) -> int:
+        """
+        Writes and flushes a batch of papers, returning how many were written.
+        """
+        if not papers:
+            return 0
+        start = time.perf_counter()
+        try:
+            self._write([_as_paper(paper) for paper in papers])
+        except (IOError, OSError) as e:
+            _report_file_error(self.filename, e)
+            raise
+        except UnicodeEncodeError as e:
+            print(f"[Encoding Error] Could not encode data for {self.format_name} export: {e}")
+            raise
+        self.rows_written += len(papers)
+
+        metrics = active_metrics()
+        if metrics is not None:
+            metrics.observe("export_batch", time.perf_counter() - start)
+            metrics.incr("rows_written", len(papers))
+        return len(papers)
+
+    def tell(self) -> int:
+        """
+        Returns the number of bytes flushed to the output so far.
+        """
+        return os.path.getsize(self.filename)
+
+    @staticmethod
+    @abc.abstractmethod
+    def read_papers(filename: str) -> Iterator[Paper]:
+        """
+        Reads back the papers stored in a file written by this writer.
+        """
+
+    @abc.abstractmethod
+    def _write(self, papers: List[Paper]) -> None:
+        """
+        Writes and flushes already normalized papers.
+        """
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        """
+        Flushes and closes the output.
+        """
+
+    def __enter__(self) -> "PaperWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class _TextPaperWriter(PaperWriter):
+    supports_append = True
+
+    def __init__(self, filename: str, append: bool = False) -> None:
+        super().__init__(filename, append=append)
+        try:
+            self._file: IO[str] = open(filename, mode="a" if append else "w", newline='', encoding="utf-8")
+        except (IOError, OSError) as e:
+            _report_file_error(filename, e)
+            raise
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class CsvPaperWriter(_TextPaperWriter):
+    """
+    Writes papers as CSV rows, joining author and affiliation lists with "; ".
+    """
+
+    format_name = "CSV"
+
+    def __init__(self, filename: str, append: bool = False) -> None:
+        super().__init__(filename, append=append)
+        self._writer = csv.DictWriter(self._file, fieldnames=CSV_FIELDNAMES)
+        # An appended file already has its header unless it is still empty.
+        if self._file.tell() == 0:
+            self._writer.writeheader()
+            self._file.flush()
+
+    @staticmethod
+    def read_papers(filename: str) -> Iterator[Paper]:
+        # Lists were flattened with "; " on the way out, so split them back up.
+        with open(filename, newline='', encoding="utf-8") as csvfile:
+            for row in csv.DictReader(csvfile):
+                authors = row["Non-academic Author(s)"]
+                affiliations = row["Company Affiliation(s)"]
+                # Files written before company names were added lack the column.
+                companies = row.get("Company Name(s)")
+                yield Paper(
+                    row["PubmedID"],
+                    row["Title"],
+                    row["Publication Date"],
+                    authors.split("; ") if authors else (),
+                    affiliations.split("; ") if affiliations else (),
+                    row["Corresponding Author Email"] or None,
+                    companies.split("; ") if companies else (),
+                )
+
+    def _write(self, papers: List[Paper]) -> None:
+        self._writer.writerows(_csv_row(paper) for paper in papers)
+        self._file.flush()
+
+
+class JsonlPaperWriter(_TextPaperWriter):
+    """
+    Writes papers as JSON Lines, keeping author and affiliation lists as arrays.
+    """
+
+    format_name = "JSON Lines"
+
+    @staticmethod
+    def read_papers(filename: str) -> Iterator[Paper]:
+        with open(filename, encoding="utf-8") as jsonfile:
+            for line in jsonfile:
+                if line.strip():
+                    yield Paper.from_dict(json.loads(line))
+
+    def _write(self, papers: List[Paper]) -> None:
+        self._file.write("".join(json.dumps(paper.to_dict(), ensure_ascii=False) + "\n" for paper in papers))
+        self._file.flush()
+
+
+def _import_pyarrow() -> Any:
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "Parquet/Arrow export requires pyarrow. "
+            "Install it with `pip install 'get-papers-list-VigR[parquet]'`."
+        ) from e
+    return pyarrow
+
+
+def paper_schema() -> Any:
+    """
+    Returns the Arrow schema for paper records, with list-typed author and affiliation columns.
+    """
+    pa = _import_pyarrow()
+    return pa.schema([
+        ("pubmed_id", pa.string()),
+        ("title", pa.string()),
+        ("pub_date", pa.string()),
+        ("non_academic_authors", pa.list_(pa.string())),
+        ("company_affiliations", pa.list_(pa.string())),
+        ("corresponding_email", pa.string()),
+        ("companies", pa.list_(pa.string())),
+    ])
+
+
+class _ArrowPaperWriter(PaperWriter):
+    def __init__(self, filename: str, append: bool = False) -> None:
+        super().__init__(filename, append=append)
+        self._pa = _import_pyarrow()
+        self._schema = paper_schema()
+        try:
+            self._writer = self._open_writer()
+        except (IOError, OSError) as e:
+            _report_file_error(filename, e)
+            raise
+
+    @abc.abstractmethod
+    def _open_writer(self) -> Any:
+        """
+        Opens the pyarrow writer for `self.filename`.
+        """
+
+    def _write(self, papers: List[Paper]) -> None:
+        columns = {name: [getattr(paper, name) for paper in papers] for name in PAPER_FIELDS}
+        self._writer.write_batch(self._pa.RecordBatch.from_pydict(columns, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class ParquetPaperWriter(_ArrowPaperWriter):
+    """
+    Writes papers to Parquet, one row group per batch. Requires pyarrow.
+    """
+
+    format_name = "Parquet"
+
+    @staticmethod
+    def read_papers(filename: str) -> Iterator[Paper]:
+        _import_pyarrow()
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(filename).iter_batches():
+            yield from map(Paper.from_dict, batch.to_pylist())
+
+    def _open_writer(self) -> Any:
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(self.filename, self._schema)
+
+
+class ArrowPaperWriter(_ArrowPaperWriter):
+    """
+    Writes papers to an Arrow IPC (Feather v2) file, one record batch per batch. Requires pyarrow.
+    """
+
+    format_name = "Arrow"
+
+    @staticmethod
+    def read_papers(filename: str) -> Iterator[Paper]:
+        pa = _import_pyarrow()
+        with pa.memory_map(filename) as source:
+            reader = pa.ipc.open_file(source)
+            for index in range(reader.num_record_batches):
+                yield from map(Paper.from_dict, reader.get_batch(index).to_pylist())
+
+    def _open_writer(self) -> Any:
+        return self._pa.ipc.new_file(self.filename, self._schema)
+
+
+# Writers selectable by name, e.g. from the CLI --format flag
+WRITERS: Dict[str, Type[PaperWriter]] = {
+    "csv": CsvPaperWriter,
+    "jsonl": JsonlPaperWriter,
+    "parquet": ParquetPaperWriter,
+    "arrow": ArrowPaperWriter,
+}
+
+FORMAT_EXTENSIONS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+}
+
+
+def detect_format(filename: str, default: str = "csv") -> str:
+    """
+    Guesses the export format from the file extension, falling back to `default`.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    return FORMAT_EXTENSIONS.get(extension, default)
+
+
+def open_writer(filename: str, format: Optional[str] = None, append: bool = False) -> PaperWriter:
     """
-    Exports a list of parsed PubMed paper records to a CSV file.
+    Opens the writer for `format`, or the one matching the file extension.
 
     Args:
-        papers (List[PaperInfo]): A list of structured paper data dictionaries.
+        filename (str): The output file path.
+        format (Optional[str]): One of the `WRITERS` keys. Detected from
+            `filename` when omitted.
+        append (bool): Append to an existing file instead of truncating it.
+            Only supported by the text formats (CSV and JSON Lines).
+
+    Returns:
+        PaperWriter: An open writer; close it or use it as a context manager.
+
+    Raises:
+        ValueError: If the format is unknown or cannot be appended to.
+        IOError: If the file cannot be opened.
+    """
+    format = format or detect_format(filename)
+    if format not in WRITERS:
+        raise ValueError(f"Unknown export format '{format}'. Choose from: {', '.join(WRITERS)}.")
+    return WRITERS[format](filename, append=append)
+
+
+def read_papers(filename: str, format: Optional[str] = None) -> Iterator[Paper]:
+    """
+    Streams papers back out of an exported file.
+
+    CSV output is read back with its "; "-joined lists split again, so values
+    that themselves contain "; " do not round-trip exactly.
+
+    Args:
+        filename (str): The exported file path.
+        format (Optional[str]): One of the `WRITERS` keys. Detected from
+            `filename` when omitted.
+
+    Yields:
+        Paper: The stored papers, in file order.
+
+    Raises:
+        ValueError: If the format is unknown.
+    """
+    format = format or detect_format(filename)
+    if format not in WRITERS:
+        raise ValueError(f"Unknown export format '{format}'. Choose from: {', '.join(WRITERS)}.")
+    return WRITERS[format].read_papers(filename)
+
+
+def merge_papers(
+    filename: str,
+    papers: Iterable[PaperLike],
+    replaced_ids: Collection[str],
+    format: Optional[str] = None,
+    chunk_size: int = DEFAULT_FLUSH_EVERY,
+) -> int:
+    """
+    Merges new or updated papers into an existing export.
+
+    Existing rows whose PMID is in `replaced_ids` are dropped, the rest are
+    kept in order, and `papers` are appended after them. The merged file is
+    written alongside and swapped in atomically, so a failed merge leaves the
+    original untouched.
+
+    Args:
+        filename (str): The export to update. Created if it does not exist.
+        papers (Iterable[PaperLike]): The new or updated papers.
+        replaced_ids (Collection[str]): PMIDs whose existing rows are superseded,
+            typically every PMID that was re-fetched.
+        format (Optional[str]): One of the `WRITERS` keys. Detected from
+            `filename` when omitted.
+        chunk_size (int): Number of rows written per batch.
+
+    Returns:
+        int: The number of rows in the merged file.
+    """
+    format = format or detect_format(filename)
+    tmp_filename = filename + ".merging"
+
+    with open_writer(tmp_filename, format) as writer:
+        if os.path.exists(filename):
+            kept = (paper for paper in read_papers(filename, format) if paper.pubmed_id not in replaced_ids)
+            for old in _chunked(kept, chunk_size):
+                writer.write_batch(old)
+        for new in _chunked(papers, chunk_size):
+            writer.write_batch(new)
+        rows = writer.rows_written
+
+    os.replace(tmp_filename, filename)
+    return rows
+
+
+def _export(writer_class: Type[PaperWriter], papers: Iterable[PaperLike], filename: str, chunk_size: int) -> int:
+    with writer_class(filename) as writer:
+        for chunk in _chunked(papers, chunk_size):
+            writer.write_batch(chunk)
+        return writer.rows_written
+
+
+def export_to_csv(
+    papers: Iterable[PaperLike],
+    filename: str,
+    flush_every: int = DEFAULT_FLUSH_EVERY,
+) -> int:
+    """
+    Exports parsed PubMed paper records to a CSV file as they arrive.
+
+    `papers` may be any iterable, including a generator still fetching and
+    parsing upstream. Rows are written and flushed in chunks of `flush_every`,
+    so memory stays bounded and partial results are visible on disk during
+    long runs.
+
+    Args:
+        papers (Iterable[PaperLike]): `Paper` records or `PaperInfo` dictionaries.
         filename (str): The output CSV file path.
+        flush_every (int): Number of rows buffered between flushes.
+
+    Returns:
+        int: The number of rows written, excluding the header.
 
     Raises:
         IOError: If the file cannot be written.
         UnicodeEncodeError: If data encoding fails while writing.
     """
-    try:
-        with open(filename, mode="w", newline='', encoding="utf-8") as csvfile:
-            # Define CSV headers
-            writer = csv.DictWriter(csvfile, fieldnames=[
-                "PubmedID",
-                "Title",
-                "Publication Date",
-                "Non-academic Author(s)",
-                "Company Affiliation(s)",
-                "Corresponding Author Email"
-            ])
-            writer.writeheader()
-
-            for paper in papers:
-                writer.writerow({
-                    "PubmedID": paper["pubmed_id"],
-                    "Title": paper["title"],
-                    "Publication Date": paper["pub_date"],
-                    "Non-academic Author(s)": "; ".join(paper["non_academic_authors"]),
-                    "Company Affiliation(s)": "; ".join(paper["company_affiliations"]),
-                    "Corresponding Author Email": paper["corresponding_email"] or "",
-                })
-
-    except (IOError, OSError) as e:
-        print(f"[File Error] Could not write to file '{filename}': {e}")
-        raise
-    except UnicodeEncodeError as e:
-        print(f"[Encoding Error] Could not encode data for CSV export: {e}")
-        raise
+    return _export(CsvPaperWriter, papers, filename, flush_every)
+
+
+def export_to_jsonl(
+    papers: Iterable[PaperLike],
+    filename: str,
+    flush_every: int = DEFAULT_FLUSH_EVERY,
+) -> int:
+    """
+    Exports paper records to a JSON Lines file, one JSON object per paper.
+
+    Author and affiliation lists are kept as JSON arrays rather than joined
+    strings. Like `export_to_csv`, rows are written and flushed in chunks.
+
+    Args:
+        papers (Iterable[PaperLike]): `Paper` records or `PaperInfo` dictionaries.
+        filename (str): The output file path.
+        flush_every (int): Number of rows buffered between flushes.
+
+    Returns:
+        int: The number of rows written.
+
+    Raises:
+        IOError: If the file cannot be written.
+    """
+    return _export(JsonlPaperWriter, papers, filename, flush_every)
+
+
+def export_to_parquet(
+    papers: Iterable[PaperLike],
+    filename: str,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+) -> int:
+    """
+    Exports paper records to a Parquet file, one row group per `row_group_size` papers.
+
+    Requires the optional `pyarrow` package.
+
+    Args:
+        papers (Iterable[PaperLike]): `Paper` records or `PaperInfo` dictionaries.
+        filename (str): The output file path.
+        row_group_size (int): Number of papers per row group.
+
+    Returns:
+        int: The number of rows written.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+        IOError: If the file cannot be written.
+    """
+    return _export(ParquetPaperWriter, papers, filename, row_group_size)
+
+
+def export_to_arrow(
+    papers: Iterable[PaperLike],
+    filename: str,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+) -> int:
+    """
+    Exports paper records to an Arrow IPC (Feather v2) file in record batches.
+
+    Requires the optional `pyarrow` package.
+
+    Args:
+        papers (Iterable[PaperLike]): `Paper` records or `PaperInfo` dictionaries.
+        filename (str): The output file path.
+        row_group_size (int): Number of papers per record batch.
+
+    Returns:
+        int: The number of rows written.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+        IOError: If the file cannot be written.
+    """
+    return _export(ArrowPaperWriter, papers, filename, row_group_size)
+
+
+EXPORTERS: Dict[str, Callable[[Iterable[PaperLike], str], int]] = {
+    "csv": export_to_csv,
+    "jsonl": export_to_jsonl,
+    "parquet": export_to_parquet,
+    "arrow": export_to_arrow,
+}
+
+
+def export_papers(papers: Iterable[PaperLike], filename: str, format: Optional[str] = None) -> int:
+    """
+    Exports paper records with the writer for `format`, or the one matching the file extension.
+
+    Args:
+        papers (Iterable[PaperLike]): `Paper` records or `PaperInfo` dictionaries.
+        filename (str): The output file path.
+        format (Optional[str]): One of the `EXPORTERS` keys. Detected from
+            `filename` when omitted.
+
+    Returns:
+        int: The number of rows written.
+
+    Raises:
+        ValueError: If the format is unknown.
+    """
+    format = format or detect_format(filename)
+    if format not in EXPORTERS:
+        raise ValueError(f"Unknown export format '{format}'. Choose from: {', '.join(EXPORTERS)}.")
+    return EXPORTERS[format](papers, filename)
@@ -1,15 +1,56 @@
-import requests
-from typing import List, Optional
-from .types import PaperInfo  # Assumed to define a dataclass for structured paper info
+import sys
+import xml.etree.ElementTree as ET
+from xml.parsers import expat
+from collections import deque
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, TypeVar
+from .cache import ArticleCache, join_pubmed_articles, split_pubmed_articles
+from .client import PubMedClient, get_default_client, requests
+from .metrics import active_metrics
+from .ratelimit import TokenBucket, ncbi_rate_limit
+from .resilience import FetchPolicy
+from .types import PaperInfo, SearchHistory  # Assumed to define a dataclass for structured paper info
 
+if TYPE_CHECKING:
+    from concurrent.futures import Future
 
-def fetch_pubmed_ids(query: str, debug: bool = False) -> List[str]:
+ESEARCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+EFETCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+
+# ESearch refuses to page past the first 10,000 records of a PubMed query.
+ESEARCH_MAX_RECORDS = 10000
+
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_CONCURRENCY = 3
+
+T = TypeVar("T")
+
+
+def _id_search_params(query: str, retmax: int = 100) -> Dict[str, Any]:
+    return {
+        "db": "pubmed",
+        "term": query,        # Full PubMed query string
+        "retmode": "json",    # Response format
+        "retmax": retmax,     # Max number of IDs to return (can increase if needed)
+    }
+
+
+def fetch_pubmed_ids(
+    query: str,
+    debug: bool = False,
+    client: Optional[PubMedClient] = None,
+    api_key: Optional[str] = None,
+    limiter: Optional[TokenBucket] = None,
+) -> List[str]:
     """
     Fetches a list of PubMed IDs that match the given query.
 
     Args:
         query (str): The PubMed search query using full PubMed syntax.
         debug (bool): If True, print debug information.
+        client (Optional[PubMedClient]): HTTP client to use. Defaults to the shared client.
+        api_key (Optional[str]): NCBI API key, sent with the request.
+        limiter (Optional[TokenBucket]): Rate limiter shared with the run's other requests.
 
     Returns:
         List[str]: A list of PubMed ID strings.
@@ -21,24 +62,83 @@ def fetch_pubmed_ids(query: str, debug: bool = False) -> List[str]:
     if not query.strip():
         raise ValueError("Query string must not be empty.")
 
-    url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+    params = _id_search_params(query)
+    ids = _esearch(params, client=client, api_key=api_key, limiter=limiter).get("idlist", [])
+
+    if debug:
+        print(f"Fetched {len(ids)} PubMed IDs: {ids}")
+
+    return ids
+
+
+def fetch_pubmed_details(ids: List[str], debug: bool = False, client: Optional[PubMedClient] = None) -> str:
+    """
+    Fetches detailed metadata for a list of PubMed IDs using the EFetch API.
+
+    Args:
+        ids (List[str]): List of PubMed IDs to fetch details for.
+        debug (bool): If True, print debug information.
+        client (Optional[PubMedClient]): HTTP client to use. Defaults to the shared client.
+
+    Returns:
+        str: The XML response as a single string. Returns empty string if `ids` is empty.
+
+    Raises:
+        requests.exceptions.RequestException: If the HTTP request fails.
+    """
+    if not ids:
+        if debug:
+            print("No PubMed IDs provided. Skipping efetch.")
+        return ""
+
+    url = EFETCH_URL
     params = {
         "db": "pubmed",
-        "term": query,        # Full PubMed query string
-        "retmode": "json",    # Response format
-        "retmax": 100,        # Max number of IDs to return (can increase if needed)
+        "id": ",".join(ids),   # Comma-separated list of PubMed IDs
+        "retmode": "xml"       # Response format: XML for parsing author, title, etc.
     }
 
     try:
-        resp = requests.get(url, params=params, timeout=10)
-        resp.raise_for_status()  # Raise error for 4xx/5xx responses
-        data = resp.json()
-        ids = data.get("esearchresult", {}).get("idlist", [])
+        resp = (client or get_default_client()).get(url, params=params, timeout=15)
+        resp.raise_for_status()  # Raise exception for 4xx/5xx errors
 
         if debug:
-            print(f"Fetched {len(ids)} PubMed IDs: {ids}")
+            print(f"Fetched details for {len(ids)} PubMed IDs.")
 
-        return ids
+        return resp.text
+
+    except requests.exceptions.HTTPError as e:
+        print(f"[HTTP Error] Failed to fetch PubMed details: {e}")
+        raise
+    except requests.exceptions.RequestException as e:
+        print(f"[Request Error] Failed to connect to PubMed: {e}")
+        raise
+
+
+def _esearch(
+    params: Dict[str, Any],
+    client: Optional[PubMedClient] = None,
+    api_key: Optional[str] = None,
+    limiter: Optional[TokenBucket] = None,
+) -> Dict[str, Any]:
+    """
+    Runs a single ESearch request and returns the decoded `esearchresult` block.
+
+    The request carries `api_key` when one is given and waits for a token from
+    `limiter`, so searches count against the same NCBI budget as EFetch.
+
+    Raises:
+        requests.exceptions.RequestException: If the HTTP request fails.
+        ValueError: If the response is not valid JSON.
+    """
+    if api_key:
+        params = dict(params, api_key=api_key)
+    if limiter is not None:
+        limiter.acquire()
+    try:
+        resp = (client or get_default_client()).get(ESEARCH_URL, params=params, timeout=10)
+        resp.raise_for_status()
+        return resp.json().get("esearchresult", {})
 
     except requests.exceptions.HTTPError as e:
         print(f"[HTTP Error] Failed to fetch PubMed IDs: {e}")
@@ -51,38 +151,342 @@ def fetch_pubmed_ids(query: str, debug: bool = False) -> List[str]:
         raise
 
 
-def fetch_pubmed_details(ids: List[str], debug: bool = False) -> str:
+def _date_params(mindate: Optional[str], maxdate: Optional[str], datetype: str) -> Dict[str, Any]:
     """
-    Fetches detailed metadata for a list of PubMed IDs using the EFetch API.
+    Builds the ESearch date-window parameters; E-utilities needs both bounds or neither.
+    """
+    if mindate is None and maxdate is None:
+        return {}
+    if mindate is None or maxdate is None:
+        raise ValueError("mindate and maxdate must be given together.")
+    return {"datetype": datetype, "mindate": mindate, "maxdate": maxdate}
+
+
+def count_pubmed_results(
+    query: str,
+    mindate: Optional[str] = None,
+    maxdate: Optional[str] = None,
+    datetype: str = "edat",
+    client: Optional[PubMedClient] = None,
+    api_key: Optional[str] = None,
+    limiter: Optional[TokenBucket] = None,
+) -> int:
+    """
+    Returns how many records match the query, optionally within a date window.
 
     Args:
-        ids (List[str]): List of PubMed IDs to fetch details for.
+        query (str): The PubMed search query using full PubMed syntax.
+        mindate (Optional[str]): Start of the window, as YYYY/MM/DD.
+        maxdate (Optional[str]): End of the window (inclusive), as YYYY/MM/DD.
+        datetype (str): Date field the window applies to, e.g. "edat" or "mdat".
+        client (Optional[PubMedClient]): HTTP client to use. Defaults to the shared client.
+        api_key (Optional[str]): NCBI API key, sent with the request.
+        limiter (Optional[TokenBucket]): Rate limiter shared with the run's other requests.
+
+    Returns:
+        int: The total hit count.
+
+    Raises:
+        ValueError: If the query is empty or only one date bound is given.
+        requests.exceptions.RequestException: If the HTTP request fails.
+    """
+    if not query.strip():
+        raise ValueError("Query string must not be empty.")
+
+    params = {"db": "pubmed", "term": query, "retmode": "json", "retmax": 0}
+    params.update(_date_params(mindate, maxdate, datetype))
+    return int(_esearch(params, client=client, api_key=api_key, limiter=limiter).get("count", 0))
+
+
+def _history_search_params(query: str) -> Dict[str, Any]:
+    return {
+        "db": "pubmed",
+        "term": query,
+        "retmode": "json",
+        "usehistory": "y",   # Keep the result set on the NCBI history server
+        "retmax": 0,         # We only need the count and the history handle
+    }
+
+
+def _history_from_result(result: Dict[str, Any]) -> SearchHistory:
+    """
+    Extracts the history-server handle from an ESearch result.
+
+    Raises:
+        ValueError: If the result has no WebEnv/query_key.
+    """
+    webenv = result.get("webenv")
+    query_key = result.get("querykey")
+    if not webenv or not query_key:
+        raise ValueError("ESearch response did not include a WebEnv/query_key.")
+
+    return {
+        "webenv": webenv,
+        "query_key": str(query_key),
+        "count": int(result.get("count", 0)),
+    }
+
+
+def search_pubmed_history(
+    query: str,
+    debug: bool = False,
+    client: Optional[PubMedClient] = None,
+    api_key: Optional[str] = None,
+    limiter: Optional[TokenBucket] = None,
+) -> SearchHistory:
+    """
+    Runs the query on the E-utilities history server without downloading any IDs.
+
+    The returned WebEnv/query_key pair can be handed to
+    `fetch_pubmed_details_by_history` so EFetch pulls records straight from the
+    server-side result set.
+
+    Args:
+        query (str): The PubMed search query using full PubMed syntax.
         debug (bool): If True, print debug information.
+        client (Optional[PubMedClient]): HTTP client to use. Defaults to the shared client.
+        api_key (Optional[str]): NCBI API key, sent with the request.
+        limiter (Optional[TokenBucket]): Rate limiter shared with the run's other requests.
 
     Returns:
-        str: The XML response as a single string. Returns empty string if `ids` is empty.
+        SearchHistory: The WebEnv, query_key and total hit count of the search.
 
     Raises:
+        ValueError: If the query is empty or the response has no history data.
         requests.exceptions.RequestException: If the HTTP request fails.
     """
-    if not ids:
+    if not query.strip():
+        raise ValueError("Query string must not be empty.")
+
+    result = _esearch(_history_search_params(query), client=client, api_key=api_key, limiter=limiter)
+    history = _history_from_result(result)
+
+    if debug:
+        print(f"Query matched {history['count']} records (query_key={history['query_key']}).")
+
+    return history
+
+
+def iter_pubmed_ids(
+    query: str,
+    page_size: int = 5000,
+    max_results: Optional[int] = None,
+    debug: bool = False,
+    client: Optional[PubMedClient] = None,
+    mindate: Optional[str] = None,
+    maxdate: Optional[str] = None,
+    datetype: str = "edat",
+    api_key: Optional[str] = None,
+    limiter: Optional[TokenBucket] = None,
+) -> Iterator[str]:
+    """
+    Lazily yields every PubMed ID matching the query, one ESearch page at a time.
+
+    The first page runs the search on the history server; later pages walk
+    `retstart` over that stored result set (`term=#<query_key>` with its
+    WebEnv) instead of re-running the query, so pages cannot shift while new
+    records are indexed, and the result set is never materialized as a single
+    list. ESearch cannot page past `ESEARCH_MAX_RECORDS`; a warning goes to
+    stderr when that cap truncates the matches. Use
+    `fetch_pubmed_details_by_history` to pull larger result sets, or split the
+    search into date windows (see `delta.partition_date_range`).
+
+    Args:
+        query (str): The PubMed search query using full PubMed syntax.
+        page_size (int): Number of IDs requested per ESearch call.
+        max_results (Optional[int]): Stop after this many IDs. None means no limit.
+        debug (bool): If True, print debug information.
+        client (Optional[PubMedClient]): HTTP client to use. Defaults to the shared client.
+        mindate (Optional[str]): Start of a date window, as YYYY/MM/DD.
+        maxdate (Optional[str]): End of the date window (inclusive), as YYYY/MM/DD.
+        datetype (str): Date field the window applies to, e.g. "edat" or "mdat".
+        api_key (Optional[str]): NCBI API key, sent with the request.
+        limiter (Optional[TokenBucket]): Rate limiter shared with the run's other requests.
+
+    Yields:
+        str: PubMed ID strings in the order returned by ESearch.
+
+    Raises:
+        ValueError: If the query is empty, `page_size` is not positive, or only
+            one date bound is given.
+        requests.exceptions.RequestException: If an HTTP request fails.
+    """
+    if not query.strip():
+        raise ValueError("Query string must not be empty.")
+    if page_size <= 0:
+        raise ValueError("page_size must be a positive integer.")
+
+    limit = ESEARCH_MAX_RECORDS if max_results is None else min(max_results, ESEARCH_MAX_RECORDS)
+    params: Dict[str, Any] = {
+        "db": "pubmed",
+        "term": query,
+        "retmode": "json",
+        "usehistory": "y",
+    }
+    params.update(_date_params(mindate, maxdate, datetype))
+    retstart = 0
+    total: Optional[int] = None
+
+    while retstart < limit and (total is None or retstart < total):
+        params["retstart"] = retstart
+        params["retmax"] = min(page_size, limit - retstart)
+        result = _esearch(dict(params), client=client, api_key=api_key, limiter=limiter)
+
+        if total is None:
+            total = int(result.get("count", 0))
+            if result.get("webenv") and result.get("querykey"):
+                # The stored set already reflects the query and date window.
+                params = {
+                    "db": "pubmed",
+                    "term": f"#{result['querykey']}",
+                    "retmode": "json",
+                    "usehistory": "y",
+                    "WebEnv": result["webenv"],
+                    "query_key": str(result["querykey"]),
+                }
+            if total > limit and (max_results is None or max_results > limit):
+                # The cap, not the caller, cut the result set short; say so even without --debug.
+                print(f"Warning: query matched {total} records; only the first {limit} can be paged "
+                      "via ESearch.", file=sys.stderr)
+
+        ids = result.get("idlist", [])
         if debug:
-            print("No PubMed IDs provided. Skipping efetch.")
-        return ""
+            print(f"Fetched {len(ids)} PubMed IDs at retstart={retstart}.")
+        if not ids:
+            break
+
+        yield from ids
+        retstart += len(ids)
 
-    url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+
+def fetch_pubmed_details_by_history(
+    history: SearchHistory,
+    retstart: int = 0,
+    retmax: int = 500,
+    debug: bool = False,
+    client: Optional[PubMedClient] = None,
+) -> str:
+    """
+    Fetches one page of article records straight from the history server.
+
+    Args:
+        history (SearchHistory): The handle returned by `search_pubmed_history`.
+        retstart (int): Index of the first record to fetch.
+        retmax (int): Maximum number of records in this page.
+        debug (bool): If True, print debug information.
+        client (Optional[PubMedClient]): HTTP client to use. Defaults to the shared client.
+
+    Returns:
+        str: The XML response as a single string.
+
+    Raises:
+        requests.exceptions.RequestException: If the HTTP request fails.
+    """
+    params = _efetch_history_params(history, retstart, retmax)
+
+    try:
+        resp = (client or get_default_client()).get(EFETCH_URL, params=params, timeout=15)
+        resp.raise_for_status()
+
+        if debug:
+            print(f"Fetched history records {retstart}-{retstart + retmax - 1} of {history['count']}.")
+
+        return resp.text
+
+    except requests.exceptions.HTTPError as e:
+        print(f"[HTTP Error] Failed to fetch PubMed details: {e}")
+        raise
+    except requests.exceptions.RequestException as e:
+        print(f"[Request Error] Failed to connect to PubMed: {e}")
+        raise
+
+
+def _chunked(ids: Iterable[str], size: int) -> Iterator[List[str]]:
+    """
+    Splits an iterable of IDs into lists of at most `size` items.
+    """
+    batch: List[str] = []
+    for pmid in ids:
+        batch.append(pmid)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _efetch_id_params(ids: List[str], api_key: Optional[str] = None) -> Dict[str, Any]:
+    params = {"db": "pubmed", "id": ",".join(ids), "retmode": "xml"}
+    if api_key:
+        params["api_key"] = api_key
+    return params
+
+
+def _efetch_history_params(
+    history: SearchHistory,
+    retstart: int,
+    retmax: int,
+    api_key: Optional[str] = None,
+) -> Dict[str, Any]:
     params = {
         "db": "pubmed",
-        "id": ",".join(ids),   # Comma-separated list of PubMed IDs
-        "retmode": "xml"       # Response format: XML for parsing author, title, etc.
+        "WebEnv": history["webenv"],
+        "query_key": history["query_key"],
+        "retstart": retstart,
+        "retmax": retmax,
+        "retmode": "xml",
     }
+    if api_key:
+        params["api_key"] = api_key
+    return params
+
+
+def _merge_cached(
+    batch: List[str],
+    articles: Dict[str, str],
+    xml_data: Optional[str],
+    cache: ArticleCache,
+) -> str:
+    """
+    Stores freshly fetched articles and rebuilds the batch document in ID order.
 
+    Args:
+        batch (List[str]): The PMIDs of the batch, in order.
+        articles (Dict[str, str]): Articles already served from the cache.
+        xml_data (Optional[str]): EFetch response for the missing PMIDs, if any were fetched.
+        cache (ArticleCache): The cache to fill.
+    """
+    if xml_data is not None:
+        if not articles:
+            # Nothing cached: store the response and pass it through untouched.
+            cache.put_many(split_pubmed_articles(xml_data))
+            return xml_data
+        fetched = split_pubmed_articles(xml_data)
+        cache.put_many(fetched)
+        articles.update(fetched)
+    return join_pubmed_articles(articles[pmid] for pmid in batch if pmid in articles)
+
+
+def _post_efetch(
+    params: Dict[str, Any],
+    client: PubMedClient,
+    limiter: TokenBucket,
+    debug: bool = False,
+) -> str:
+    """
+    Sends one rate-limited EFetch request and returns the XML body.
+
+    Raises:
+        requests.exceptions.RequestException: If the HTTP request fails.
+    """
+    limiter.acquire()
     try:
-        resp = requests.get(url, params=params, timeout=15)
-        resp.raise_for_status()  # Raise exception for 4xx/5xx errors
+        # POST keeps long ID lists out of the URL.
+        resp = client.post(EFETCH_URL, data=params, timeout=15)
+        resp.raise_for_status()
 
         if debug:
-            print(f"Fetched details for {len(ids)} PubMed IDs.")
+            print(f"Fetched EFetch batch ({len(resp.text)} characters).")
 
         return resp.text
 
@@ -92,3 +496,245 @@ def fetch_pubmed_details(ids: List[str], debug: bool = False) -> str:
     except requests.exceptions.RequestException as e:
         print(f"[Request Error] Failed to connect to PubMed: {e}")
         raise
+
+
+def _well_formed(xml_data: str) -> str:
+    """
+    Returns `xml_data` unchanged once it is known to parse.
+
+    Only checks the syntax, with expat and no tree, so a truncated or garbled
+    200 body fails inside the guarded fetch, where it is retried, instead of
+    being dropped later by the parser.
+
+    Raises:
+        xml.etree.ElementTree.ParseError: If the body is not well-formed XML.
+    """
+    try:
+        expat.ParserCreate().Parse(xml_data, True)
+    except expat.ExpatError as e:
+        error = ET.ParseError(str(e))
+        error.code, error.position = e.code, (e.lineno, e.offset)
+        raise error from e
+    return xml_data
+
+
+def _join_responses(responses: List[str]) -> str:
+    """
+    Merges EFetch responses for parts of one batch into a single document.
+
+    Raises:
+        xml.etree.ElementTree.ParseError: If a response is not well-formed XML.
+    """
+    if len(responses) == 1:
+        return _well_formed(responses[0])
+    root = ET.Element("PubmedArticleSet")
+    for xml_data in responses:
+        root.extend(ET.fromstring(xml_data))
+    return ET.tostring(root, encoding="unicode")
+
+
+def _stream_batches(
+    batches: Iterable[T],
+    fetch: Callable[[T], Optional[str]],
+    concurrency: int,
+) -> Iterator[str]:
+    """
+    Runs `fetch` for each batch on a thread pool.
+
+    At most `concurrency` batches run at once. Results are yielded in
+    submission order as soon as they are ready, so callers can parse one batch
+    while later ones download. Batches for which `fetch` returns None (set
+    aside by a `FetchPolicy`) are skipped.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    pending: Deque["Future[Optional[str]]"] = deque()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        try:
+            for batch in batches:
+                pending.append(pool.submit(fetch, batch))
+                # Keep a small window of queued batches ahead of the consumer.
+                if len(pending) >= concurrency * 2:
+                    yield from _present(pending.popleft().result())
+            while pending:
+                yield from _present(pending.popleft().result())
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _present(xml_data: Optional[str]) -> Iterator[str]:
+    if xml_data is not None:
+        yield xml_data
+
+
+def _fetch_client(client: Optional[PubMedClient], policy: Optional[FetchPolicy], concurrency: int) -> PubMedClient:
+    if client is not None:
+        return client
+    if policy is not None:
+        # The policy retries and adapts, so it must see every 429/5xx itself.
+        return PubMedClient(pool_size=concurrency, max_retries=0)
+    return get_default_client(pool_size=concurrency)
+
+
+def iter_pubmed_details(
+    ids: Iterable[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    api_key: Optional[str] = None,
+    debug: bool = False,
+    client: Optional[PubMedClient] = None,
+    cache: Optional[ArticleCache] = None,
+    policy: Optional[FetchPolicy] = None,
+    limiter: Optional[TokenBucket] = None,
+) -> Iterator[str]:
+    """
+    Fetches article records in concurrent ID batches, yielding one XML document per batch.
+
+    Requests are throttled to NCBI's published limit (3 req/s, or 10 req/s
+    with an API key) regardless of `concurrency`. When a cache is given, only
+    PMIDs missing from it are requested and every downloaded article is stored.
+    With a `policy`, failed requests are retried and split into smaller ones
+    as errors rise, and a batch that keeps failing goes to `policy.quarantine`
+    and is skipped instead of ending the stream.
+
+    Args:
+        ids (Iterable[str]): PubMed IDs to fetch; may be a lazy generator.
+        batch_size (int): Number of IDs per EFetch request.
+        concurrency (int): Maximum number of requests in flight.
+        api_key (Optional[str]): NCBI API key, raising the allowed request rate.
+        debug (bool): If True, print debug information.
+        client (Optional[PubMedClient]): HTTP client to use. Defaults to the shared
+            client, with its connection pool sized to `concurrency`.
+        cache (Optional[ArticleCache]): Per-PMID article cache to read from and fill.
+        policy (Optional[FetchPolicy]): Retry, throttling and quarantine rules.
+            Without one, the first failed request raises.
+        limiter (Optional[TokenBucket]): Rate limiter shared with the run's other
+            requests. Defaults to a new one for NCBI's limit under `api_key`.
+
+    Yields:
+        str: The XML response for each batch, in ID order.
+
+    Raises:
+        ValueError: If `batch_size` or `concurrency` is not positive.
+        requests.exceptions.RequestException: If an HTTP request fails and
+            no `policy` is given.
+    """
+    if batch_size <= 0 or concurrency <= 0:
+        raise ValueError("batch_size and concurrency must be positive integers.")
+
+    limiter = limiter or TokenBucket(ncbi_rate_limit(api_key))
+    # Only a client made here for the policy is ours to close; the default one is shared.
+    owned = client is None and policy is not None
+    http = _fetch_client(client, policy, concurrency)
+
+    def post(ids: List[str]) -> str:
+        if policy is None:
+            return _post_efetch(_efetch_id_params(ids, api_key), http, limiter, debug=debug)
+        size = policy.start(concurrency, batch_size).request_size
+        return _join_responses([
+            policy.call(partial(_post_efetch, _efetch_id_params(ids[i:i + size], api_key), http, limiter, debug))
+            for i in range(0, len(ids), size)
+        ])
+
+    def fetch(batch: List[str]) -> Optional[str]:
+        if policy is not None:
+            return policy.guard(batch, partial(fetch_batch, batch))
+        return fetch_batch(batch)
+
+    def fetch_batch(batch: List[str]) -> str:
+        if cache is None:
+            return post(batch)
+
+        articles = cache.get_many(batch)
+        missing = [pmid for pmid in batch if pmid not in articles]
+        if debug:
+            print(f"EFetch batch of {len(batch)} IDs: {len(articles)} cached, {len(missing)} to fetch.")
+        metrics = active_metrics()
+        if metrics is not None:
+            metrics.incr("cache_hits", len(articles))
+            metrics.incr("cache_misses", len(missing))
+        xml_data = post(missing) if missing else None
+        return _merge_cached(batch, articles, xml_data, cache)
+
+    try:
+        yield from _stream_batches(_chunked(ids, batch_size), fetch, concurrency)
+    finally:
+        if owned:
+            http.close()
+
+
+def iter_history_details(
+    history: SearchHistory,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    api_key: Optional[str] = None,
+    debug: bool = False,
+    client: Optional[PubMedClient] = None,
+    retstarts: Optional[Iterable[int]] = None,
+    policy: Optional[FetchPolicy] = None,
+    limiter: Optional[TokenBucket] = None,
+) -> Iterator[str]:
+    """
+    Fetches a history-server result set in concurrent `retstart` windows.
+
+    A `policy` works as in `iter_pubmed_details`; windows are split into
+    smaller `retstart` ranges when it lowers the request size.
+
+    Args:
+        history (SearchHistory): The handle returned by `search_pubmed_history`.
+        batch_size (int): Number of records per EFetch request.
+        concurrency (int): Maximum number of requests in flight.
+        api_key (Optional[str]): NCBI API key, raising the allowed request rate.
+        debug (bool): If True, print debug information.
+        client (Optional[PubMedClient]): HTTP client to use. Defaults to the shared
+            client, with its connection pool sized to `concurrency`.
+        retstarts (Optional[Iterable[int]]): Offsets of the windows to fetch.
+            Defaults to every window of the result set.
+        policy (Optional[FetchPolicy]): Retry, throttling and quarantine rules.
+            Without one, the first failed request raises.
+        limiter (Optional[TokenBucket]): Rate limiter shared with the run's other
+            requests. Defaults to a new one for NCBI's limit under `api_key`.
+
+    Yields:
+        str: The XML response for each window, in the order of `retstarts`.
+
+    Raises:
+        ValueError: If `batch_size` or `concurrency` is not positive.
+        requests.exceptions.RequestException: If an HTTP request fails and
+            no `policy` is given.
+    """
+    if batch_size <= 0 or concurrency <= 0:
+        raise ValueError("batch_size and concurrency must be positive integers.")
+
+    limiter = limiter or TokenBucket(ncbi_rate_limit(api_key))
+    # Only a client made here for the policy is ours to close; the default one is shared.
+    owned = client is None and policy is not None
+    http = _fetch_client(client, policy, concurrency)
+
+    def fetch_window(retstart: int) -> str:
+        if debug:
+            print(f"Fetching EFetch window at retstart={retstart}.")
+        if policy is None:
+            return _post_efetch(_efetch_history_params(history, retstart, batch_size, api_key), http, limiter, debug=debug)
+        size = policy.start(concurrency, batch_size).request_size
+        end = min(retstart + batch_size, history["count"])
+        return _join_responses([
+            policy.call(partial(
+                _post_efetch, _efetch_history_params(history, start, min(size, end - start), api_key), http, limiter, debug,
+            ))
+            for start in range(retstart, end, size)
+        ])
+
+    def fetch(retstart: int) -> Optional[str]:
+        if policy is not None:
+            return policy.guard(retstart, partial(fetch_window, retstart))
+        return fetch_window(retstart)
+
+    if retstarts is None:
+        retstarts = range(0, history["count"], batch_size)
+    try:
+        yield from _stream_batches(retstarts, fetch, concurrency)
+    finally:
+        if owned:
+            http.close()
@@ -1,36 +1,528 @@
-def is_non_academic(affiliation: str) -> bool:
+import json
+import os
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+from .types import CacheStats, KeywordDictionary
+
+# Any of these marks an affiliation as academic
+ACADEMIC_KEYWORDS = (
+    "university", "college", "institute", "school",
+    "hospital", "center", "centre", "faculty", "department",
+)
+
+# Common pharma/biotech indicators and suffixes
+PHARMA_KEYWORDS = (
+    "pharma", "biotech", "therapeutics", "biosciences",
+    "genomics", "inc", "ltd", "gmbh",
+)
+
+# Known company names (can be expanded)
+KNOWN_COMPANIES = (
+    "genentech", "moderna", "pfizer", "novartis", "roche",
+    "amgen", "illumina", "astrazeneca", "biogen", "regeneron",
+)
+
+# Canonical name reported for each known company keyword
+KNOWN_COMPANY_NAMES = {
+    "genentech": "Genentech", "moderna": "Moderna", "pfizer": "Pfizer", "novartis": "Novartis",
+    "roche": "Roche", "amgen": "Amgen", "illumina": "Illumina", "astrazeneca": "AstraZeneca",
+    "biogen": "Biogen", "regeneron": "Regeneron",
+}
+
+# Short legal suffixes only count as whole words, so "Princeton" or "Lincoln"
+# don't read as "Inc". Everything else matches anywhere, e.g. "BioCenter".
+WHOLE_WORD_KEYWORDS = frozenset({"inc", "ltd", "gmbh"})
+
+# Distinct affiliation strings remembered per memoized lookup
+DEFAULT_AFFILIATION_CACHE_SIZE = 65536
+
+# The built-in keyword lists, in the shape `load_dictionary` reads
+DEFAULT_DICTIONARY: KeywordDictionary = {
+    "academic": list(ACADEMIC_KEYWORDS),
+    "company_indicators": list(PHARMA_KEYWORDS),
+    "whole_word": sorted(WHOLE_WORD_KEYWORDS),
+    "companies": {name: [alias] for alias, name in KNOWN_COMPANY_NAMES.items()},
+}
+
+
+class AffiliationVerdict(NamedTuple):
+    is_academic: bool
+    is_company: bool
+
+
+class AffiliationMasks(NamedTuple):
+    """Per-row verdicts for a column of affiliations, in the column's own array type."""
+    is_academic: Any
+    is_company: Any
+
+
+_NO_MATCH: Tuple[AffiliationVerdict, Tuple[str, ...]] = (AffiliationVerdict(False, False), ())
+
+
+def normalize_affiliation(affiliation: str) -> str:
     """
-    Returns True if the affiliation appears to be non-academic based on known academic keywords.
+    Lowercases an affiliation and collapses runs of whitespace.
     """
-    academic_keywords = [
-        "university", "college", "institute", "school",
-        "hospital", "center", "centre", "faculty", "department"
-    ]
+    return " ".join(affiliation.split()).lower()
 
-    # If any academic keyword is present, it's academic
-    for word in academic_keywords:
-        if word.lower() in affiliation.lower():
-            return False
-    return True  # No academic words = non-academic
 
+def _cache_stats(cached: Callable) -> CacheStats:
+    info = cached.cache_info()  # type: ignore[attr-defined]
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "maxsize": info.maxsize,
+        "hit_rate": info.hits / lookups if lookups else 0.0,
+    }
 
-def is_company_affiliation(affiliation: str) -> bool:
+
+def _factorize(values: Sequence[Optional[str]]) -> Tuple[List[Optional[str]], List[int]]:
     """
-    Returns True if the affiliation appears to belong to a pharma or biotech company.
+    Returns the distinct values in first-seen order and each value's position among them.
+    """
+    # dict.fromkeys and map run the per-row work in C; only distinct values loop in Python.
+    uniques = list(dict.fromkeys(values))
+    positions: Dict[Optional[str], int] = {value: position for position, value in enumerate(uniques)}
+    return uniques, list(map(positions.__getitem__, values))
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Compiles words into a regex shaped like their prefix trie.
+
+    "pfizer|pharma|pharmacia" becomes "p(?:fizer|harma(?:cia)?)", so at each
+    position the regex engine follows one branch per character instead of
+    trying every word in turn; the cost of a match depends on word length,
+    not on how many words there are. Optional tails are greedy, so the
+    longest word starting at a position wins.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return _node_pattern(trie)
+
+
+def _node_pattern(node: Dict[str, dict]) -> str:
+    branches = [re.escape(char) + _node_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    # A word ends here, so everything below is an optional, longer match.
+    return f"(?:{pattern})?" if "" in node else pattern
+
+
+class AffiliationClassifier:
+    """
+    Classifies affiliations as academic and/or company in a single regex scan.
+
+    All keywords are compiled once into a regex shaped like their prefix trie
+    (see `_trie_pattern`), so building and matching stay cheap for
+    dictionaries with thousands of company aliases. Each affiliation is
+    lowercased once and scanned left to right with a lookahead, so overlapping
+    keywords are still seen. Verdicts are memoized in a bounded LRU keyed by
+    the normalized string, since the same affiliation typically recurs across
+    many authors and articles.
+
+    Args:
+        academic_keywords (Iterable[str]): Words that mark an affiliation as academic.
+        company_keywords (Iterable[str]): Words that mark an affiliation as a company.
+        whole_word_keywords (Iterable[str]): Keywords that only count as whole words.
+        cache_size (Optional[int]): Distinct affiliations memoized; 0 disables, None is unbounded.
+        company_names (Mapping[str, str]): Canonical company name reported for
+            a company keyword, e.g. {"modernatx": "Moderna"}.
+    """
+
+    def __init__(
+        self,
+        academic_keywords: Iterable[str] = ACADEMIC_KEYWORDS,
+        company_keywords: Iterable[str] = PHARMA_KEYWORDS + KNOWN_COMPANIES,
+        whole_word_keywords: Iterable[str] = WHOLE_WORD_KEYWORDS,
+        cache_size: Optional[int] = DEFAULT_AFFILIATION_CACHE_SIZE,
+        company_names: Mapping[str, str] = KNOWN_COMPANY_NAMES,
+    ) -> None:
+        self._academic = frozenset(normalize_affiliation(word) for word in academic_keywords)
+        self._company = frozenset(normalize_affiliation(word) for word in company_keywords)
+        self._names = {
+            key: name for key, name in ((normalize_affiliation(word), name) for word, name in company_names.items())
+            if key in self._company
+        }
+        whole_words = frozenset(normalize_affiliation(word) for word in whole_word_keywords)
+
+        keywords = (self._academic | self._company) - {""}
+        anywhere = _trie_pattern(word for word in keywords if word not in whole_words)
+        whole = _trie_pattern(word for word in keywords if word in whole_words)
+        alternatives = ([rf"\b(?:{whole})\b"] if whole else []) + ([anywhere] if anywhere else [])
+        # The leading class lets the engine skip positions no keyword can start at
+        # before entering the trie, about a quarter faster on typical text.
+        first = "".join(re.escape(char) for char in sorted({word[0] for word in keywords}))
+        self._pattern = re.compile(f"(?=[{first}])(?=(" + "|".join(alternatives) + "))") if alternatives else None
+        self.resize_cache(cache_size)
+
+    @classmethod
+    def from_dictionary(
+        cls, dictionary: KeywordDictionary, cache_size: Optional[int] = DEFAULT_AFFILIATION_CACHE_SIZE
+    ) -> "AffiliationClassifier":
+        """
+        Builds a classifier from a keyword dictionary, e.g. one from `load_dictionary`.
+
+        Every alias of a company, and its canonical name, marks an affiliation
+        as a company and reports that canonical name.
+        """
+        names: Dict[str, str] = {}
+        for name, aliases in dictionary["companies"].items():
+            for alias in [name, *aliases]:
+                names.setdefault(normalize_affiliation(alias), name)
+        return cls(
+            academic_keywords=dictionary["academic"],
+            company_keywords=[*dictionary["company_indicators"], *names],
+            whole_word_keywords=dictionary["whole_word"],
+            cache_size=cache_size,
+            company_names=names,
+        )
+
+    def resize_cache(self, cache_size: Optional[int]) -> None:
+        """
+        Replaces the verdict cache with an empty one holding `cache_size` entries.
+
+        A size of 0 disables memoization and None makes the cache unbounded.
+        """
+        self._cached_scan = lru_cache(maxsize=cache_size)(self._scan)
+
+    def cache_stats(self) -> CacheStats:
+        """
+        Returns hit/miss counters for the verdict cache.
+        """
+        return _cache_stats(self._cached_scan)
+
+    def classify(self, affiliation: str) -> AffiliationVerdict:
+        """
+        Returns both the academic and company verdicts for an affiliation.
+        """
+        if self._pattern is None or not affiliation:
+            return _NO_MATCH[0]
+        return self._cached_scan(normalize_affiliation(affiliation))[0]
+
+    def company_names(self, affiliation: str) -> Tuple[str, ...]:
+        """
+        Returns the canonical names of the known companies an affiliation mentions.
+        """
+        if self._pattern is None or not affiliation:
+            return ()
+        return self._cached_scan(normalize_affiliation(affiliation))[1]
+
+    def classify_many(self, affiliations: Any) -> AffiliationMasks:
+        """
+        Classifies a whole column of affiliations at once.
+
+        Duplicate rows are dropped before any matching, so each distinct
+        affiliation is normalized and scanned once: the distinct strings are
+        joined and scanned in a single regex pass, and the per-row masks are
+        gathered from the per-string verdicts. Missing values (None, null, "") are neither academic nor
+        company. The verdict cache is bypassed.
+
+        Args:
+            affiliations (Any): A NumPy array, a pyarrow Array or ChunkedArray
+                of strings, or any iterable of Optional[str].
+
+        Returns:
+            AffiliationMasks: Boolean masks with one entry per input row: NumPy
+            bool arrays of the same shape for NumPy input, pyarrow
+            BooleanArrays for pyarrow input and lists otherwise.
+        """
+        library = type(affiliations).__module__.partition(".")[0]
+        if library == "pyarrow":
+            return self._classify_arrow(affiliations)
+        if library == "numpy":
+            return self._classify_numpy(affiliations)
+
+        values = affiliations if isinstance(affiliations, Sequence) else list(affiliations)
+        uniques, codes = _factorize(values)
+        academic, company = self._scan_many(uniques)
+        return AffiliationMasks(list(map(academic.__getitem__, codes)), list(map(company.__getitem__, codes)))
+
+    def _classify_numpy(self, array: Any) -> AffiliationMasks:
+        import numpy as np
+
+        uniques, codes = _factorize(array.ravel().tolist())
+        academic, company = self._scan_many(uniques)
+        indices = np.asarray(codes, dtype=np.intp)
+        return AffiliationMasks(
+            np.asarray(academic, dtype=bool)[indices].reshape(array.shape),
+            np.asarray(company, dtype=bool)[indices].reshape(array.shape),
+        )
+
+    def _classify_arrow(self, array: Any) -> AffiliationMasks:
+        import pyarrow as pa
+
+        if isinstance(array, pa.ChunkedArray):
+            array = array.combine_chunks()
+        # The dictionary holds each distinct string once; nulls stay null in the indices.
+        encoded = array.dictionary_encode()
+        academic, company = self._scan_many(encoded.dictionary.to_pylist())
+        return AffiliationMasks(
+            pa.array(academic, type=pa.bool_()).take(encoded.indices).fill_null(False),
+            pa.array(company, type=pa.bool_()).take(encoded.indices).fill_null(False),
+        )
+
+    def _scan_many(self, affiliations: Sequence[Optional[str]]) -> Tuple[List[bool], List[bool]]:
+        texts = [normalize_affiliation(a) if a else "" for a in affiliations]
+        academic = [False] * len(texts)
+        company = [False] * len(texts)
+        if self._pattern is not None:
+            # Normalized text has no newlines and no keyword contains one, so
+            # no match can span two affiliations, and "\n" is a \b boundary.
+            starts = []
+            offset = 0
+            for text in texts:
+                starts.append(offset)
+                offset += len(text) + 1
+            for match in self._pattern.finditer("\n".join(texts)):
+                word = match.group(1)
+                row = bisect_right(starts, match.start()) - 1
+                if word in self._academic:
+                    academic[row] = True
+                if word in self._company:
+                    company[row] = True
+        return academic, company
+
+    def _scan(self, normalized: str) -> Tuple[AffiliationVerdict, Tuple[str, ...]]:
+        is_academic = is_company = False
+        names: List[str] = []
+        for match in self._pattern.finditer(normalized):  # type: ignore[union-attr]
+            word = match.group(1)
+            is_academic = is_academic or word in self._academic
+            if word in self._company:
+                is_company = True
+                name = self._names.get(word)
+                if name is not None and name not in names:
+                    names.append(name)
+            # Without canonical names to collect, stop once both verdicts are known.
+            if is_academic and is_company and not self._names:
+                break
+        return AffiliationVerdict(is_academic, is_company), tuple(names)
+
+
+def load_dictionary(source: str) -> KeywordDictionary:
     """
-    # Common pharma/biotech indicators and suffixes
-    pharma_keywords = [
-        "pharma", "biotech", "therapeutics", "biosciences",
-        "genomics", "inc", "ltd", "gmbh"
-    ]
+    Reads an affiliation dictionary from a JSON file or a package resource.
+
+    The JSON object may hold "academic", "company_indicators" and
+    "whole_word" keyword lists and a "companies" object mapping each
+    canonical company name to its aliases; omitted sections keep the
+    built-in lists. For example:
+
+        {"companies": {"Moderna": ["modernatx", "moderna therapeutics"]},
+         "whole_word": ["inc", "ltd", "gmbh", "msd"]}
+
+    Args:
+        source (str): A file path, or "package:resource" for a JSON file
+            shipped inside an installed package.
+
+    Returns:
+        KeywordDictionary: The dictionary, merged over the built-in defaults.
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If it is not valid JSON or a section has the wrong shape.
+    """
+    package, sep, resource = source.partition(":")
+    if sep and not os.path.exists(source) and package.replace(".", "").replace("_", "").isalnum():
+        from importlib import resources
+
+        text = resources.files(package).joinpath(resource).read_text(encoding="utf-8")
+    else:
+        with open(source, encoding="utf-8") as f:
+            text = f.read()
+
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError(f"Dictionary {source} must be a JSON object.")
+    dictionary: KeywordDictionary = {
+        "academic": list(DEFAULT_DICTIONARY["academic"]),
+        "company_indicators": list(DEFAULT_DICTIONARY["company_indicators"]),
+        "whole_word": list(DEFAULT_DICTIONARY["whole_word"]),
+        "companies": dict(DEFAULT_DICTIONARY["companies"]),
+    }
+    for key in ("academic", "company_indicators", "whole_word"):
+        if key in data:
+            words = data[key]
+            if not isinstance(words, list) or not all(isinstance(word, str) for word in words):
+                raise ValueError(f"Dictionary {source}: '{key}' must be a list of strings.")
+            dictionary[key] = words  # type: ignore[literal-required]
+    if "companies" in data:
+        companies = data["companies"]
+        if not isinstance(companies, dict) or not all(
+            isinstance(aliases, list) and all(isinstance(alias, str) for alias in aliases)
+            for aliases in companies.values()
+        ):
+            raise ValueError(f"Dictionary {source}: 'companies' must map names to lists of aliases.")
+        dictionary["companies"] = companies
+    return dictionary
 
-    # Known company names (can be expanded)
-    known_companies = [
-        "genentech", "moderna", "pfizer", "novartis", "roche",
-        "amgen", "illumina", "astrazeneca", "biogen", "regeneron"
-    ]
 
-    affiliation_lower = affiliation.lower()
+DEFAULT_CLASSIFIER = AffiliationClassifier()
 
+# The dictionary file behind DEFAULT_CLASSIFIER (None for the built-in lists),
+# and its modification time when it was loaded
+_dictionary_source: Optional[str] = None
+_dictionary_mtime: Optional[int] = None
+_classifier_cache_size: Optional[int] = DEFAULT_AFFILIATION_CACHE_SIZE
+
+
+def _mtime(source: Optional[str]) -> Optional[int]:
+    if source is None:
+        return None
+    try:
+        return os.stat(source).st_mtime_ns
+    except OSError:
+        return None  # A package resource, or a file that has gone away
+
+
+def set_affiliation_dictionary(source: Optional[str] = None) -> AffiliationClassifier:
+    """
+    Replaces the keyword dictionary used by the module-level helpers.
+
+    The new classifier is built completely before it is swapped in, so calls
+    already in progress finish with the old one.
+
+    Args:
+        source (Optional[str]): A dictionary file or "package:resource" (see
+            `load_dictionary`), or None for the built-in lists.
+
+    Returns:
+        AffiliationClassifier: The classifier now in use.
+    """
+    global DEFAULT_CLASSIFIER, _dictionary_source, _dictionary_mtime
+
+    mtime = _mtime(source)
+    if source is None:
+        classifier = AffiliationClassifier(cache_size=_classifier_cache_size)
+    else:
+        classifier = AffiliationClassifier.from_dictionary(load_dictionary(source), _classifier_cache_size)
+    DEFAULT_CLASSIFIER = classifier
+    _dictionary_source, _dictionary_mtime = source, mtime
+    return classifier
+
+
+def get_affiliation_dictionary() -> Optional[str]:
+    """
+    Returns the dictionary source in use, or None for the built-in lists.
+    """
+    return _dictionary_source
+
+
+def reload_affiliation_dictionary(debug: bool = False) -> bool:
+    """
+    Reloads the dictionary file if it has changed on disk since it was loaded.
+
+    A file that fails to load (e.g. while it is still being written) leaves
+    the current dictionary in place until the file changes again.
+
+    Returns:
+        bool: True if a new dictionary was loaded.
+    """
+    global _dictionary_mtime
+
+    mtime = _mtime(_dictionary_source)
+    if mtime is None or mtime == _dictionary_mtime:
+        return False
+    try:
+        set_affiliation_dictionary(_dictionary_source)
+    except (OSError, ValueError) as e:
+        _dictionary_mtime = mtime
+        if debug:
+            print(f"[Dictionary Error] Keeping the current dictionary; could not reload {_dictionary_source}: {e}")
+        return False
+    if debug:
+        print(f"[Dictionary] Reloaded {_dictionary_source}")
+    return True
+
+
+def classify_affiliation(affiliation: str) -> AffiliationVerdict:
+    """
+    Classifies an affiliation with the default keyword lists in a single pass.
+    """
+    return DEFAULT_CLASSIFIER.classify(affiliation)
+
+
+def classify_affiliations(affiliations: Any) -> AffiliationMasks:
+    """
+    Classifies a column of affiliations with the current keyword lists; see
+    `AffiliationClassifier.classify_many`. `~masks.is_academic` (or `not` per
+    row for lists) is the bulk form of `is_non_academic`.
+    """
+    return DEFAULT_CLASSIFIER.classify_many(affiliations)
+
+
+def canonical_companies(affiliation: str) -> Tuple[str, ...]:
+    """
+    Returns the canonical names of the known companies an affiliation mentions.
+    """
+    return DEFAULT_CLASSIFIER.company_names(affiliation)
+
+
+def _extract_email(affiliation: str) -> Optional[str]:
+    tokens = affiliation.replace("(", "").replace(")", "").split()
+    email_candidates = [t.strip(".,;") for t in tokens if "@" in t]
+    return email_candidates[0] if email_candidates else None
+
+
+_cached_extract_email = lru_cache(maxsize=DEFAULT_AFFILIATION_CACHE_SIZE)(_extract_email)
+
+
+def extract_email(affiliation: Optional[str]) -> Optional[str]:
+    """
+    Returns the first email address mentioned in an affiliation, if any.
+    """
+    if not affiliation or "@" not in affiliation:
+        return None
+    # Emails are case-sensitive, so only whitespace is normalized for the cache key.
+    return _cached_extract_email(" ".join(affiliation.split()))
+
+
+def configure_affiliation_cache(cache_size: Optional[int]) -> None:
+    """
+    Resizes (and empties) the memoization caches used by the module-level helpers.
+
+    Args:
+        cache_size (Optional[int]): Maximum distinct affiliations remembered per
+            cache. 0 disables memoization and None makes the caches unbounded.
+    """
+    global _cached_extract_email, _classifier_cache_size
+
+    _classifier_cache_size = cache_size
+    DEFAULT_CLASSIFIER.resize_cache(cache_size)
+    _cached_extract_email = lru_cache(maxsize=cache_size)(_extract_email)
+
+
+def affiliation_cache_stats() -> Dict[str, CacheStats]:
+    """
+    Returns hit/miss counters for the classification and email caches.
+    """
+    return {
+        "classification": DEFAULT_CLASSIFIER.cache_stats(),
+        "email": _cache_stats(_cached_extract_email),
+    }
+
+
+def is_non_academic(affiliation: str) -> bool:
+    """
+    Returns True if the affiliation appears to be non-academic based on known academic keywords.
+    """
+    # No academic words = non-academic
+    return not classify_affiliation(affiliation).is_academic
+
+
+def is_company_affiliation(affiliation: str) -> bool:
+    """
+    Returns True if the affiliation appears to belong to a pharma or biotech company.
+    """
     # Match either known suffixes or known company names
-    return any(word in affiliation_lower for word in pharma_keywords + known_companies)
+    return classify_affiliation(affiliation).is_company
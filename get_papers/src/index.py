@@ -0,0 +1,298 @@
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+from .filters import canonical_companies, classify_affiliation
+from .metrics import active_metrics
+from .parser import paper_from_record, parse_pubmed_records
+from .types import ArticleRecord, AuthorRecord, Paper
+
+INDEX_FILENAME = "papers.sqlite3"
+
+# Stays under SQLite's bound-parameter limit on older builds
+_IN_CHUNK = 500
+
+
+def _chunks(items: Sequence[int], size: int = _IN_CHUNK) -> Iterable[Sequence[int]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _year(pub_date: str) -> Optional[int]:
+    return int(pub_date) if pub_date.isdigit() else None
+
+
+def _phrase(text: str) -> str:
+    # An FTS5 string literal: matched as one phrase, with no query syntax.
+    return '"' + text.replace('"', '""') + '"'
+
+
+class PaperIndex:
+    """
+    Local SQLite store of harvested articles for offline re-querying.
+
+    Every ingested article is kept with all of its authors and affiliations,
+    not just the non-academic subset `parse_pubmed_xml` returns. Papers are
+    indexed by PMID and year, and an FTS5 table covers titles, author names,
+    affiliations and the company-classified affiliations, so follow-up
+    questions run against the file in milliseconds. Re-ingesting a PMID
+    replaces its previous record.
+
+    Raises:
+        RuntimeError: If the SQLite library was built without FTS5.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        try:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS papers (
+                    id INTEGER PRIMARY KEY,
+                    pmid TEXT NOT NULL UNIQUE,
+                    title TEXT NOT NULL,
+                    pub_date TEXT NOT NULL,
+                    year INTEGER,
+                    non_academic INTEGER NOT NULL,
+                    indexed_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS papers_year ON papers (year);
+                CREATE TABLE IF NOT EXISTS authors (
+                    paper_id INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    PRIMARY KEY (paper_id, position)
+                );
+                CREATE TABLE IF NOT EXISTS affiliations (
+                    paper_id INTEGER NOT NULL,
+                    author_position INTEGER NOT NULL,
+                    rank INTEGER NOT NULL,
+                    affiliation TEXT NOT NULL,
+                    is_academic INTEGER NOT NULL,
+                    is_company INTEGER NOT NULL,
+                    PRIMARY KEY (paper_id, author_position, rank)
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+                    title, authors, affiliations, companies
+                );
+            """)
+        except sqlite3.OperationalError as e:
+            self._conn.close()
+            if "fts5" in str(e):
+                raise RuntimeError("The paper index requires SQLite with the FTS5 extension.") from e
+            raise
+        self._conn.commit()
+
+    def add_records(self, records: Iterable[ArticleRecord]) -> int:
+        """
+        Stores full article records, replacing any already indexed under the same PMID.
+
+        Args:
+            records (Iterable[ArticleRecord]): Records from `parse_pubmed_records`.
+
+        Returns:
+            int: The number of records stored.
+        """
+        count = 0
+        now = time.time()
+        with self._lock:
+            for record in records:
+                self._replace(record, now)
+                count += 1
+            self._conn.commit()
+
+        metrics = active_metrics()
+        if metrics is not None:
+            metrics.incr("articles_indexed", count)
+        return count
+
+    def add_xml(self, xml_data: str, debug: bool = False) -> int:
+        """
+        Parses an EFetch response and stores every article in it.
+        """
+        return self.add_records(parse_pubmed_records(xml_data, debug=debug))
+
+    def _replace(self, record: ArticleRecord, now: float) -> None:
+        self._delete(record["pubmed_id"])
+
+        authors = record["authors"]
+        affiliations = []
+        companies = []
+        non_academic = False
+        for position, author in enumerate(authors):
+            for rank, affiliation in enumerate(author["affiliations"]):
+                verdict = classify_affiliation(affiliation)
+                affiliations.append((position, rank, affiliation, verdict.is_academic, verdict.is_company))
+                if verdict.is_company:
+                    # Canonical names too, so "Moderna" finds "ModernaTX, Inc."
+                    companies.append(affiliation)
+                    companies.extend(canonical_companies(affiliation))
+                # Judged on the first affiliation, like parse_pubmed_xml.
+                if rank == 0 and affiliation and not verdict.is_academic:
+                    non_academic = True
+
+        cursor = self._conn.execute(
+            "INSERT INTO papers (pmid, title, pub_date, year, non_academic, indexed_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (record["pubmed_id"], record["title"], record["pub_date"], _year(record["pub_date"]),
+             non_academic, now),
+        )
+        paper_id = cursor.lastrowid
+        self._conn.executemany(
+            "INSERT INTO authors (paper_id, position, name) VALUES (?, ?, ?)",
+            [(paper_id, position, author["name"]) for position, author in enumerate(authors)],
+        )
+        self._conn.executemany(
+            "INSERT INTO affiliations (paper_id, author_position, rank, affiliation, is_academic, is_company) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(paper_id, *row) for row in affiliations],
+        )
+        self._conn.execute(
+            "INSERT INTO papers_fts (rowid, title, authors, affiliations, companies) VALUES (?, ?, ?, ?, ?)",
+            (
+                paper_id,
+                record["title"],
+                "\n".join(author["name"] for author in authors),
+                "\n".join(row[2] for row in affiliations),
+                "\n".join(companies),
+            ),
+        )
+
+    def _delete(self, pmid: str) -> None:
+        row = self._conn.execute("SELECT id FROM papers WHERE pmid = ?", (pmid,)).fetchone()
+        if row is None:
+            return
+        self._conn.execute("DELETE FROM papers_fts WHERE rowid = ?", row)
+        self._conn.execute("DELETE FROM authors WHERE paper_id = ?", row)
+        self._conn.execute("DELETE FROM affiliations WHERE paper_id = ?", row)
+        self._conn.execute("DELETE FROM papers WHERE id = ?", row)
+
+    def search(
+        self,
+        title: Optional[str] = None,
+        company: Optional[str] = None,
+        author: Optional[str] = None,
+        min_year: Optional[int] = None,
+        max_year: Optional[int] = None,
+        non_academic_only: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[ArticleRecord]:
+        """
+        Finds indexed articles matching every given filter, in ingestion order.
+
+        Args:
+            title (Optional[str]): FTS5 query over title terms, e.g. "mRNA" or
+                "vaccin* NOT review".
+            company (Optional[str]): Phrase that must appear in an affiliation
+                classified as a company, e.g. "Moderna".
+            author (Optional[str]): Phrase that must appear in an author name.
+            min_year (Optional[int]): Earliest publication year.
+            max_year (Optional[int]): Latest publication year.
+            non_academic_only (bool): Only articles `parse_pubmed_xml` would keep.
+            limit (Optional[int]): Maximum number of results.
+
+        Returns:
+            List[ArticleRecord]: The matching articles with all their authors.
+
+        Raises:
+            sqlite3.OperationalError: If `title` is not a valid FTS5 query.
+        """
+        match = []
+        if title:
+            match.append(f"title : ({title})")
+        if company:
+            match.append(f"companies : {_phrase(company)}")
+        if author:
+            match.append(f"authors : {_phrase(author)}")
+
+        sql = "SELECT p.id FROM papers p"
+        clauses: List[str] = []
+        params: List[object] = []
+        if match:
+            sql += " JOIN papers_fts f ON f.rowid = p.id"
+            clauses.append("papers_fts MATCH ?")
+            params.append(" AND ".join(match))
+        if min_year is not None:
+            clauses.append("p.year >= ?")
+            params.append(min_year)
+        if max_year is not None:
+            clauses.append("p.year <= ?")
+            params.append(max_year)
+        if non_academic_only:
+            clauses.append("p.non_academic = 1")
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY p.id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute(sql, params)]
+            return self._records(ids)
+
+    def search_papers(
+        self,
+        title: Optional[str] = None,
+        company: Optional[str] = None,
+        author: Optional[str] = None,
+        min_year: Optional[int] = None,
+        max_year: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[Paper]:
+        """
+        Like `search`, but returns the `Paper` records `parse_pubmed_xml` would
+        have produced for the matching non-academic articles, ready for export.
+        """
+        records = self.search(title, company, author, min_year, max_year, non_academic_only=True, limit=limit)
+        papers = (paper_from_record(record) for record in records)
+        return [paper for paper in papers if paper is not None]
+
+    def get(self, pmid: str) -> Optional[ArticleRecord]:
+        """
+        Returns the indexed record for a PMID, or None.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM papers WHERE pmid = ?", (pmid,)).fetchone()
+            if row is None:
+                return None
+            return self._records([row[0]])[0]
+
+    def _records(self, ids: List[int]) -> List[ArticleRecord]:
+        records: Dict[int, ArticleRecord] = {}
+        authors: Dict[int, List[AuthorRecord]] = {}
+        for chunk in _chunks(ids):
+            placeholders = ",".join("?" * len(chunk))
+            for paper_id, pmid, title, pub_date in self._conn.execute(
+                f"SELECT id, pmid, title, pub_date FROM papers WHERE id IN ({placeholders})", chunk
+            ):
+                authors[paper_id] = []
+                records[paper_id] = {
+                    "pubmed_id": pmid, "title": title, "pub_date": pub_date, "authors": authors[paper_id],
+                }
+            for paper_id, name in self._conn.execute(
+                f"SELECT paper_id, name FROM authors WHERE paper_id IN ({placeholders}) ORDER BY paper_id, position",
+                chunk,
+            ):
+                authors[paper_id].append({"name": name, "affiliations": []})
+            for paper_id, position, affiliation in self._conn.execute(
+                f"SELECT paper_id, author_position, affiliation FROM affiliations WHERE paper_id IN ({placeholders}) "
+                "ORDER BY paper_id, author_position, rank",
+                chunk,
+            ):
+                authors[paper_id][position]["affiliations"].append(affiliation)
+        return [records[paper_id] for paper_id in ids]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "PaperIndex":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
@@ -0,0 +1,32 @@
+import importlib
+from types import ModuleType
+from typing import Any, Optional
+
+
+class LazyModule:
+    """
+    Stands in for a module until one of its attributes is first used.
+
+    `requests = LazyModule("requests")` keeps `requests.Session`,
+    `requests.exceptions.HTTPError` and the like working unchanged, but the
+    import, and its dependency tree, only happens on first attribute access.
+    Modules the CLI loads on every start use it for dependencies that only
+    the network and process-pool stages need, so `--help` and offline runs
+    don't pay for them.
+    """
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._module: Optional[ModuleType] = None
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from .types import MetricsSnapshot, TimerStats
+
+DEFAULT_METRICS_PREFIX = "get_papers"
+
+_active: Optional["Metrics"] = None
+
+
+class Metrics:
+    """
+    Counters and timers collected over one run.
+
+    Instrumented code looks the collector up with `active_metrics()` and
+    skips all bookkeeping when it returns None, so disabled metrics cost one
+    global lookup per hook. Updates are thread-safe.
+    """
+
+    def __init__(self) -> None:
+        self._counters: Dict[str, float] = {}
+        self._timers: Dict[str, TimerStats] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, value: float = 1) -> None:
+        """
+        Adds `value` to counter `name`.
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """
+        Records one duration for timer `name`.
+        """
+        with self._lock:
+            stats = self._timers.get(name)
+            if stats is None:
+                self._timers[name] = {"count": 1, "total": seconds, "max": seconds}
+            else:
+                stats["count"] += 1
+                stats["total"] += seconds
+                stats["max"] = max(stats["max"], seconds)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """
+        Times the enclosed block into timer `name`.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def merge(self, snapshot: MetricsSnapshot) -> None:
+        """
+        Folds in metrics collected elsewhere, e.g. in a parser worker process.
+        """
+        with self._lock:
+            for name, value in snapshot["counters"].items():
+                self._counters[name] = self._counters.get(name, 0) + value
+            for name, other in snapshot["timers"].items():
+                stats = self._timers.get(name)
+                if stats is None:
+                    self._timers[name] = dict(other)  # type: ignore[assignment]
+                else:
+                    stats["count"] += other["count"]
+                    stats["total"] += other["total"]
+                    stats["max"] = max(stats["max"], other["max"])
+
+    def snapshot(self) -> MetricsSnapshot:
+        """
+        Returns a copy of every counter and timer.
+        """
+        with self._lock:
+            return {
+                "counters": dict(sorted(self._counters.items())),
+                "timers": {name: dict(stats) for name, stats in sorted(self._timers.items())},  # type: ignore[misc]
+            }
+
+    def to_json(self) -> str:
+        """
+        Renders the metrics as one JSON object.
+        """
+        return json.dumps(self.snapshot(), sort_keys=True)
+
+    def to_prometheus(self, prefix: str = DEFAULT_METRICS_PREFIX) -> str:
+        """
+        Renders the metrics in the Prometheus text exposition format.
+
+        Counters become `<prefix>_<name>_total`; timers become summaries
+        (`_count`, `_sum`) in seconds plus a `_max` gauge.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in snapshot["counters"].items():
+            metric = f"{prefix}_{name}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value:g}"]
+        for name, stats in snapshot["timers"].items():
+            metric = f"{prefix}_{name}_seconds"
+            lines += [
+                f"# TYPE {metric} summary",
+                f"{metric}_count {stats['count']}",
+                f"{metric}_sum {stats['total']:.6f}",
+                f"# TYPE {metric}_max gauge",
+                f"{metric}_max {stats['max']:.6f}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+def active_metrics() -> Optional[Metrics]:
+    """
+    Returns the collector instrumented code should report to, or None when disabled.
+    """
+    return _active
+
+
+def enable_metrics(metrics: Optional[Metrics] = None) -> Metrics:
+    """
+    Turns instrumentation on, reporting to `metrics` or a fresh collector.
+    """
+    global _active
+    _active = metrics or Metrics()
+    return _active
+
+
+def disable_metrics() -> None:
+    """
+    Turns instrumentation off.
+    """
+    global _active
+    _active = None
@@ -1,9 +1,66 @@
+import io
+import sys
+import time
 import xml.etree.ElementTree as ET
-from typing import List
-from .types import PaperInfo
-from .filters import is_company_affiliation, is_non_academic
+from typing import IO, Any, Callable, Iterable, Iterator, List, Optional, Tuple, TypeVar, Union
+from .types import ArticleRecord, AuthorRecord, Paper
+from .filters import canonical_companies, classify_affiliation, extract_email
+from .metrics import active_metrics
 import re
 
+A = TypeVar("A")
+
+# XML backends, in the order "auto" tries them
+XML_BACKENDS = ("lxml", "etree")
+
+_backend: Optional[str] = None
+
+
+def _lxml_available() -> bool:
+    try:
+        import lxml.etree  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def set_parser_backend(name: str = "auto") -> str:
+    """
+    Selects the XML library used to stream EFetch responses.
+
+    "lxml" uses lxml's C iterparse, which is several times faster on large
+    payloads; "etree" uses the standard library. "auto" picks lxml when it is
+    installed. Both produce identical papers.
+
+    Args:
+        name (str): "auto", "lxml" or "etree".
+
+    Returns:
+        str: The backend now in use.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+        ImportError: If "lxml" is requested but not installed.
+    """
+    global _backend
+    if name == "auto":
+        name = "lxml" if _lxml_available() else "etree"
+    elif name not in XML_BACKENDS:
+        raise ValueError(f"Unknown XML backend '{name}'. Choose from: auto, {', '.join(XML_BACKENDS)}.")
+    elif name == "lxml" and not _lxml_available():
+        raise ImportError(
+            "The lxml backend requires lxml. Install it with `pip install 'get-papers-list-VigR[lxml]'`."
+        )
+    _backend = name
+    return name
+
+
+def get_parser_backend() -> str:
+    """
+    Returns the XML backend in use, resolving "auto" on first call.
+    """
+    return _backend or set_parser_backend()
+
 
 def extract_pub_year(article: ET.Element) -> str:
     """
@@ -39,7 +96,295 @@ def extract_pub_year(article: ET.Element) -> str:
     return "Unknown"
 
 
-def parse_pubmed_xml(xml_data: str, debug: bool = False) -> List[PaperInfo]:
+def _first_year(dates: Iterable[ET.Element]) -> Optional[str]:
+    for date in dates:
+        year = date.findtext("Year")
+        if year is not None:
+            return year
+    return None
+
+
+def _pick_year(candidates: Iterable[Optional[str]], medline_date: Optional[str]) -> str:
+    """
+    Applies `extract_pub_year`'s precedence to year candidates collected in one pass.
+    """
+    for year in candidates:
+        if year and year.strip().isdigit():
+            return year.strip()
+    if medline_date:
+        match = re.search(r"\b(19|20)\d{2}\b", medline_date)
+        if match:
+            return match.group(0)
+    return "Unknown"
+
+
+def _scan_author(author: ET.Element) -> Tuple[str, Optional[str]]:
+    fore_name = last_name = ""
+    affiliation = None
+    for child in author:
+        tag = child.tag
+        if tag == "ForeName":
+            fore_name = child.text or ""
+        elif tag == "LastName":
+            last_name = child.text or ""
+        elif tag == "AffiliationInfo" and affiliation is None:
+            affiliation = child.findtext("Affiliation")
+    return " ".join([fore_name, last_name]).strip(), affiliation
+
+
+def _scan_author_record(author: ET.Element) -> AuthorRecord:
+    fore_name = last_name = ""
+    affiliations = []
+    for child in author:
+        tag = child.tag
+        if tag == "ForeName":
+            fore_name = child.text or ""
+        elif tag == "LastName":
+            last_name = child.text or ""
+        elif tag == "AffiliationInfo":
+            affiliation = child.findtext("Affiliation")
+            if affiliation is not None:
+                affiliations.append(affiliation)
+    return {"name": " ".join([fore_name, last_name]).strip(), "affiliations": affiliations}
+
+
+def _scan_article(
+    article: ET.Element,
+    scan_author: Callable[[ET.Element], A],
+) -> Tuple[str, str, str, List[A]]:
+    """
+    Collects PMID, title, year and one `scan_author` result per author in one walk over the article.
+
+    Only the elements that hold these fields are visited, by direct child
+    iteration along PubMed's fixed layout; abstracts, MeSH headings and
+    reference lists are skipped without being scanned.
+    """
+    pmid = title = None
+    pub_year = article_year = created_year = history_year = medline_date = None
+    authors: List[A] = []
+
+    for section in article:
+        if section.tag == "MedlineCitation":
+            for node in section:
+                tag = node.tag
+                if tag == "PMID":
+                    if pmid is None:
+                        pmid = node.text or ""
+                elif tag == "DateCreated":
+                    if created_year is None:
+                        created_year = node.findtext("Year")
+                elif tag == "Article":
+                    for part in node:
+                        part_tag = part.tag
+                        if part_tag == "ArticleTitle":
+                            if title is None:
+                                title = part.text or ""
+                        elif part_tag == "AuthorList":
+                            authors.extend(scan_author(author) for author in part if author.tag == "Author")
+                        elif part_tag == "Journal":
+                            issue = part.find("JournalIssue")
+                            pub_date = issue.find("PubDate") if issue is not None else None
+                            if pub_date is not None:
+                                pub_year = pub_date.findtext("Year")
+                                medline_date = pub_date.findtext("MedlineDate")
+                        elif part_tag == "ArticleDate":
+                            if article_year is None:
+                                article_year = part.findtext("Year")
+        elif section.tag == "PubmedData":
+            history = section.find("History")
+            if history is not None:
+                history_year = _first_year(history.iterfind("PubMedPubDate"))
+
+    year = _pick_year((pub_year, article_year, created_year, history_year), medline_date)
+    return pmid or "N/A", title or "N/A", year, authors
+
+
+def parse_article(article: ET.Element) -> Optional[Paper]:
+    """
+    Extracts structured paper information from a single PubmedArticle element.
+
+    The article is walked once (see `_scan_article`) rather than searched
+    with a descendant XPath per field. Years and company affiliations repeat
+    across many papers, so they are interned and every record shares a single
+    copy of each string.
+
+    Args:
+        article (ET.Element): The PubmedArticle XML element.
+
+    Returns:
+        Optional[Paper]: The paper record, or None if no author is non-academic.
+    """
+    pubmed_id, title, pub_date, authors = _scan_article(article, _scan_author)
+    return _classify_authors(pubmed_id, title, pub_date, authors)
+
+
+def _classify_authors(
+    pubmed_id: str, title: str, pub_date: str, authors: List[Tuple[str, Optional[str]]]
+) -> Optional[Paper]:
+    non_acad_authors = []
+    company_affiliations = []
+    companies: List[str] = []
+    corresponding_email = None
+
+    metrics = active_metrics()
+    if metrics is not None:
+        metrics.incr("authors_classified", sum(1 for _, aff in authors if aff))
+
+    for name, aff in authors:
+        email = extract_email(aff)
+
+        if aff:
+            verdict = classify_affiliation(aff)
+            if not verdict.is_academic:
+                non_acad_authors.append(name)
+            if verdict.is_company:
+                company_affiliations.append(sys.intern(aff))
+                companies.extend(canonical_companies(aff))
+
+        if email and not corresponding_email:
+            corresponding_email = email
+
+    if not non_acad_authors:
+        return None
+
+    return Paper(
+        pubmed_id,
+        title,
+        sys.intern(pub_date),
+        non_acad_authors,
+        set(company_affiliations),
+        corresponding_email,
+        dict.fromkeys(companies),
+    )
+
+
+def parse_article_record(article: ET.Element) -> ArticleRecord:
+    """
+    Extracts every author and affiliation of a PubmedArticle, academic or not.
+
+    Args:
+        article (ET.Element): The PubmedArticle XML element.
+
+    Returns:
+        ArticleRecord: The article's PMID, title, year and full author list.
+    """
+    pubmed_id, title, pub_date, authors = _scan_article(article, _scan_author_record)
+    return {"pubmed_id": pubmed_id, "title": title, "pub_date": sys.intern(pub_date), "authors": authors}
+
+
+def paper_from_record(record: ArticleRecord) -> Optional[Paper]:
+    """
+    Applies `parse_article`'s filter to a full article record.
+
+    Like `parse_article`, each author is judged by their first affiliation.
+
+    Returns:
+        Optional[Paper]: The paper record, or None if no author is non-academic.
+    """
+    authors = [
+        (author["name"], author["affiliations"][0] if author["affiliations"] else None)
+        for author in record["authors"]
+    ]
+    return _classify_authors(record["pubmed_id"], record["title"], record["pub_date"], authors)
+
+
+def _etree_articles(source: Union[str, IO[bytes]]) -> Iterator[ET.Element]:
+    root: Optional[ET.Element] = None
+
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if root is None:
+            root = elem
+        if event != "end" or elem.tag != "PubmedArticle":
+            continue
+
+        yield elem
+
+        # Drop the finished article so the tree never grows.
+        elem.clear()
+        root.clear()
+
+
+def _lxml_articles(source: Union[str, IO[bytes]]) -> Iterator[Any]:
+    from lxml import etree
+
+    try:
+        # Only PubmedArticle end events cross into Python; the rest stays in C.
+        for _, elem in etree.iterparse(
+            source, events=("end",), tag="PubmedArticle", resolve_entities=False, no_network=True
+        ):
+            yield elem
+
+            # lxml keeps a reference to the current element, so clear it and
+            # delete the ones before it instead of clearing the root.
+            elem.clear(keep_tail=False)
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+    except etree.XMLSyntaxError as e:
+        raise ET.ParseError(str(e)) from e
+
+
+def _article_elements(source: Union[str, IO[bytes]]) -> Iterator[Any]:
+    articles = _lxml_articles if get_parser_backend() == "lxml" else _etree_articles
+    return articles(source)
+
+
+def _iterparse_articles(source: Union[str, IO[bytes]], debug: bool = False) -> Iterator[Paper]:
+    """
+    Yields papers from an XML source, clearing each PubmedArticle once parsed.
+
+    Raises:
+        xml.etree.ElementTree.ParseError: If the XML is malformed, whichever
+            backend is in use.
+    """
+    parsed = kept = skipped = 0
+
+    try:
+        for elem in _article_elements(source):
+            parsed += 1
+            try:
+                paper = parse_article(elem)
+            except Exception as e:
+                paper = None
+                skipped += 1
+                if debug:
+                    print(f"[Parse Warning] Skipped article due to error: {e}")
+
+            if paper is not None:
+                kept += 1
+                yield paper
+    finally:
+        # Counted locally and reported once, so the per-article cost is an integer add.
+        metrics = active_metrics()
+        if metrics is not None:
+            metrics.incr("articles_parsed", parsed)
+            metrics.incr("papers_kept", kept)
+            metrics.incr("articles_skipped", skipped)
+
+
+def iter_parse_pubmed_xml(source: Union[str, IO[bytes]], debug: bool = False) -> Iterator[Paper]:
+    """
+    Streams PubMed XML and yields one paper at a time with flat memory use.
+
+    Each PubmedArticle is parsed as soon as its closing tag is read and then
+    cleared from the tree, so memory stays proportional to a single article no
+    matter how large the input is. Malformed XML ends the stream early.
+
+    Args:
+        source (Union[str, IO[bytes]]): A file path or a binary file-like object,
+            such as an open file or a decoded HTTP response stream.
+        debug (bool): If True, prints debug messages.
+
+    Yields:
+        Paper: Structured paper records, in document order.
+    """
+    try:
+        yield from _iterparse_articles(source, debug=debug)
+    except ET.ParseError as e:
+        if debug:
+            print(f"[XML Parse Error] Failed to parse XML: {e}")
+
+
+def parse_pubmed_xml(xml_data: str, debug: bool = False) -> List[Paper]:
     """
     Parses PubMed XML data and extracts structured paper information.
 
@@ -56,63 +401,45 @@ def parse_pubmed_xml(xml_data: str, debug: bool = False) -> List[PaperInfo]:
         debug (bool): If True, prints debug messages.
 
     Returns:
-        List[PaperInfo]: A list of structured paper dictionaries.
+        List[Paper]: A list of structured paper dictionaries. Empty if the
+        XML is malformed.
     """
-    papers: List[PaperInfo] = []
-
+    metrics = active_metrics()
+    start = time.perf_counter()
     try:
-        root = ET.fromstring(xml_data)
+        return list(_iterparse_articles(io.BytesIO(xml_data.encode("utf-8")), debug=debug))
     except ET.ParseError as e:
         if debug:
             print(f"[XML Parse Error] Failed to parse XML: {e}")
+        if metrics is not None:
+            metrics.incr("malformed_batches")
         return []
+    finally:
+        if metrics is not None:
+            metrics.observe("parse_batch", time.perf_counter() - start)
 
-    for article in root.findall(".//PubmedArticle"):
-        try:
-            title = article.findtext(".//ArticleTitle") or "N/A"
-            pubmed_id = article.findtext(".//PMID") or "N/A"
-            pub_date = extract_pub_year(article)
-
-            non_acad_authors = []
-            company_affiliations = []
-            corresponding_email = None
-
-            for author in article.findall(".//Author"):
-                fore_name = author.findtext("ForeName") or ""
-                last_name = author.findtext("LastName") or ""
-                name = " ".join([fore_name, last_name]).strip()
-
-                aff = author.findtext(".//AffiliationInfo/Affiliation")
-                email = None
-
-                if aff and "@" in aff:
-                    tokens = aff.replace("(", "").replace(")", "").split()
-                    email_candidates = [t.strip(".,;") for t in tokens if "@" in t]
-                    if email_candidates:
-                        email = email_candidates[0]
-
-                if aff:
-                    if is_non_academic(aff):
-                        non_acad_authors.append(name)
-                    if is_company_affiliation(aff):
-                        company_affiliations.append(aff)
-
-                if email and not corresponding_email:
-                    corresponding_email = email
-
-            if non_acad_authors:
-                papers.append({
-                    "pubmed_id": pubmed_id,
-                    "title": title,
-                    "pub_date": pub_date,
-                    "non_academic_authors": non_acad_authors,
-                    "company_affiliations": list(set(company_affiliations)),
-                    "corresponding_email": corresponding_email,
-                })
-
-        except Exception as e:
-            if debug:
-                print(f"[Parse Warning] Skipped article due to error: {e}")
-            continue
 
-    return papers
+def parse_pubmed_records(xml_data: str, debug: bool = False) -> List[ArticleRecord]:
+    """
+    Parses PubMed XML into full article records, without the non-academic filter.
+
+    Args:
+        xml_data (str): The XML string returned by PubMed EFetch API.
+        debug (bool): If True, prints debug messages.
+
+    Returns:
+        List[ArticleRecord]: One record per article. Empty if the XML is malformed.
+    """
+    records = []
+    try:
+        for elem in _article_elements(io.BytesIO(xml_data.encode("utf-8"))):
+            try:
+                records.append(parse_article_record(elem))
+            except Exception as e:
+                if debug:
+                    print(f"[Parse Warning] Skipped article due to error: {e}")
+    except ET.ParseError as e:
+        if debug:
+            print(f"[XML Parse Error] Failed to parse XML: {e}")
+        return []
+    return records
@@ -0,0 +1,124 @@
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Iterable, Iterator, List, Optional, Tuple
+from .filters import (
+    configure_affiliation_cache,
+    get_affiliation_dictionary,
+    reload_affiliation_dictionary,
+    set_affiliation_dictionary,
+)
+from .metrics import Metrics, active_metrics, enable_metrics
+from .parser import get_parser_backend, parse_pubmed_xml, set_parser_backend
+from .types import MetricsSnapshot, Paper
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+
+def _init_worker(affiliation_cache_size: Optional[int], xml_backend: str, dictionary: Optional[str]) -> None:
+    if affiliation_cache_size is not None:
+        configure_affiliation_cache(affiliation_cache_size)
+    if dictionary is not None:
+        set_affiliation_dictionary(dictionary)
+    set_parser_backend(xml_backend)
+
+
+def _parse_batch(xml_data: str, debug: bool) -> List[Paper]:
+    # Pick up dictionary edits between batches; a no-op without a dictionary file.
+    reload_affiliation_dictionary(debug=debug)
+    return parse_pubmed_xml(xml_data, debug=debug)
+
+
+def _parse_with_metrics(xml_data: str, debug: bool) -> Tuple[List[Paper], MetricsSnapshot]:
+    # Metrics collected in a worker process only reach the caller in the result.
+    metrics = enable_metrics(Metrics())
+    return _parse_batch(xml_data, debug), metrics.snapshot()
+
+
+def iter_parsed_batches(
+    batches: Iterable[str],
+    workers: int = 1,
+    debug: bool = False,
+    affiliation_cache_size: Optional[int] = None,
+) -> Iterator[List[Paper]]:
+    """
+    Parses a stream of EFetch XML batches, optionally across several processes.
+
+    With `workers` > 1 each batch is parsed in a separate process while the
+    caller keeps feeding new batches. Only a small window of batches is in
+    flight at once, and results are yielded in the order the batches arrived,
+    so PMID order from the fetch stage is preserved. A dictionary file set
+    with `set_affiliation_dictionary` is reloaded between batches if it changes.
+
+    Args:
+        batches (Iterable[str]): EFetch XML documents, e.g. from `iter_pubmed_details`.
+        workers (int): Number of parser processes. 1 parses in the calling process.
+        debug (bool): If True, prints debug messages.
+        affiliation_cache_size (Optional[int]): If given, resizes each worker's
+            affiliation memoization caches.
+
+    Yields:
+        List[Paper]: The papers parsed from each batch, one list per batch.
+
+    Raises:
+        ValueError: If `workers` is not positive.
+    """
+    if workers <= 0:
+        raise ValueError("workers must be a positive integer.")
+
+    if workers == 1:
+        for xml_data in batches:
+            yield _parse_batch(xml_data, debug)
+        return
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Spawned workers don't inherit the fetch stage's threads and locks.
+    context = multiprocessing.get_context("spawn")
+    pending: Deque["Future"] = deque()
+
+    # Workers start fresh, so hand them the caller's cache size, dictionary and XML backend.
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(affiliation_cache_size, get_parser_backend(), get_affiliation_dictionary()),
+    ) as pool:
+        metrics = active_metrics()
+
+        def submit(xml_data: str) -> "Future":
+            if metrics is None:
+                return pool.submit(_parse_batch, xml_data, debug)
+            return pool.submit(_parse_with_metrics, xml_data, debug)
+
+        def result(future: "Future") -> List[Paper]:
+            if metrics is None:
+                return future.result()
+            papers, snapshot = future.result()
+            metrics.merge(snapshot)
+            return papers
+
+        try:
+            for xml_data in batches:
+                pending.append(submit(xml_data))
+                # Keep every worker busy without buffering the whole result set.
+                if len(pending) >= workers * 2:
+                    yield result(pending.popleft())
+            while pending:
+                yield result(pending.popleft())
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def parse_batches(
+    batches: Iterable[str],
+    workers: int = 1,
+    debug: bool = False,
+    affiliation_cache_size: Optional[int] = None,
+) -> Iterator[Paper]:
+    """
+    Like `iter_parsed_batches`, but yields papers one at a time.
+    """
+    for papers in iter_parsed_batches(batches, workers, debug, affiliation_cache_size):
+        yield from papers
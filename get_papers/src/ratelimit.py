@@ -0,0 +1,118 @@
+import threading
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional
+from .lazy import LazyModule
+
+if TYPE_CHECKING:
+    import asyncio
+else:
+    # Only the async client needs the event loop; the CLI shouldn't import it.
+    asyncio = LazyModule("asyncio")
+
+# NCBI E-utilities request ceilings (requests per second).
+NCBI_RATE_LIMIT = 3.0
+NCBI_RATE_LIMIT_WITH_KEY = 10.0
+
+
+def ncbi_rate_limit(api_key: Optional[str] = None) -> float:
+    """
+    Returns the request rate NCBI allows for the given API key (or lack of one).
+    """
+    return NCBI_RATE_LIMIT_WITH_KEY if api_key else NCBI_RATE_LIMIT
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by every worker talking to E-utilities.
+
+    Tokens refill continuously at `rate` per second up to `capacity`; each
+    request takes one token and blocks until one is available. The default
+    capacity of 1 spaces requests evenly instead of allowing bursts.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive.")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1.")
+
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """
+        Blocks until `tokens` are available, then consumes them.
+        """
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket for coroutines sharing one event loop.
+
+    Same refill rules as `TokenBucket`, but waiting coroutines sleep on the
+    event loop instead of blocking it. Waiters queue on a lock, so they are
+    served in arrival order and every query on the loop shares one budget.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Optional[Callable[[float], Awaitable[None]]] = None,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive.")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1.")
+
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep or asyncio.sleep
+        self._tokens = capacity
+        self._updated = clock()
+        # Created on first use so the lock binds to the loop that awaits it.
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """
+        Waits until `tokens` are available, then consumes them.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await self._sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
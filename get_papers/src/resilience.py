@@ -0,0 +1,434 @@
+import random
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Iterator, List, Optional, TypeVar, Union
+from .client import RETRY_STATUSES, requests
+from .metrics import active_metrics
+from .types import QuarantinedBatch
+
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BACKOFF_BASE = 0.5              # Seconds; the ceiling of the first retry's delay
+DEFAULT_BACKOFF_CAP = 60.0
+DEFAULT_FAILURE_THRESHOLD = 5           # Consecutive failed requests that open the circuit
+DEFAULT_RESET_TIMEOUT = 30.0            # Seconds the circuit stays open before a probe
+DEFAULT_MIN_REQUEST_SIZE = 10
+
+T = TypeVar("T")
+
+
+def retry_after_seconds(response: Any, now: Optional[datetime] = None) -> Optional[float]:
+    """
+    Returns the delay a response's `Retry-After` header asks for, or None.
+
+    Both forms of the header are understood: a number of seconds and an HTTP date.
+    """
+    headers = getattr(response, "headers", None)
+    value = headers.get("Retry-After") if headers is not None else None
+    if not isinstance(value, str) or not value.strip():
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime  # Pulls in socket; only needed here
+
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - (now or datetime.now(timezone.utc))).total_seconds())
+
+
+def backoff_delay(
+    attempt: int,
+    base: float = DEFAULT_BACKOFF_BASE,
+    cap: float = DEFAULT_BACKOFF_CAP,
+    retry_after: Optional[float] = None,
+    rng: Callable[[], float] = random.random,
+) -> float:
+    """
+    Returns how long to wait before retry number `attempt` (0 for the first retry).
+
+    Uses "full jitter": a uniform draw between 0 and `base * 2**attempt`,
+    capped at `cap`, so workers that failed together don't retry together.
+    A `Retry-After` from the server is a lower bound on the delay.
+    """
+    delay = rng() * min(cap, base * (2 ** attempt))
+    return max(delay, retry_after) if retry_after is not None else delay
+
+
+class CircuitBreaker:
+    """
+    Pauses every request while the server looks down.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    `wait` blocks all callers for `reset_timeout` seconds. Then one caller
+    is let through as a probe: if it succeeds the circuit closes and the
+    others proceed, if it fails the circuit opens for another period.
+    Thread-safe.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+        debug: bool = False,
+    ) -> None:
+        if failure_threshold <= 0:
+            raise ValueError("failure_threshold must be a positive integer.")
+
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.opens = 0
+        self._clock = clock
+        self._debug = debug
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._condition = threading.Condition()
+
+    @property
+    def state(self) -> str:
+        """
+        "closed", "open", or "half-open" while a probe request is in flight.
+        """
+        with self._condition:
+            if self._opened_at is None:
+                return "closed"
+            return "half-open" if self._probing else "open"
+
+    def wait(self) -> None:
+        """
+        Returns once a request may be sent, blocking while the circuit is open.
+        """
+        with self._condition:
+            while self._opened_at is not None:
+                remaining = self._opened_at + self.reset_timeout - self._clock()
+                if remaining <= 0 and not self._probing:
+                    self._probing = True
+                    return
+                # While a probe is out, only its outcome can release the others.
+                self._condition.wait(None if self._probing else remaining)
+
+    def record_success(self) -> None:
+        with self._condition:
+            self._failures = 0
+            if self._opened_at is not None and self._debug:
+                print("[Circuit] Closed; resuming requests.")
+            self._opened_at = None
+            self._probing = False
+            self._condition.notify_all()
+
+    def record_failure(self) -> None:
+        with self._condition:
+            self._failures += 1
+            if not self._probing and (self._opened_at is not None or self._failures < self.failure_threshold):
+                return
+            self._opened_at = self._clock()
+            self._probing = False
+            self.opens += 1
+            self._condition.notify_all()
+
+        metrics = active_metrics()
+        if metrics is not None:
+            metrics.incr("circuit_opens")
+        if self._debug:
+            print(f"[Circuit] Open after {self._failures} consecutive failures; "
+                  f"pausing requests for {self.reset_timeout:g}s.")
+
+
+class AdaptiveThrottle:
+    """
+    Adjusts concurrency and request size to the recent error rate.
+
+    Additive-increase/multiplicative-decrease: when at least `error_threshold`
+    of the last `window` requests failed, both the number of requests allowed
+    in flight and the number of records per request are halved (down to 1
+    and `min_request_size`). Every `recovery` consecutive successes give one
+    more concurrent request and double the request size, up to the
+    configured maximums. Thread-safe.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        request_size: int,
+        min_request_size: int = DEFAULT_MIN_REQUEST_SIZE,
+        window: int = 20,
+        error_threshold: float = 0.2,
+        recovery: int = 20,
+        debug: bool = False,
+    ) -> None:
+        if concurrency <= 0 or request_size <= 0:
+            raise ValueError("concurrency and request_size must be positive integers.")
+
+        self.max_concurrency = self.concurrency = concurrency
+        self.max_request_size = self.request_size = request_size
+        self.min_request_size = min(min_request_size, request_size)
+        self.error_threshold = error_threshold
+        self.recovery = recovery
+        self._debug = debug
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._streak = 0
+        self._active = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """
+        Holds one of the currently allowed concurrent request slots.
+        """
+        with self._condition:
+            while self._active >= self.concurrency:
+                self._condition.wait()
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active -= 1
+                self._condition.notify()
+
+    def record(self, success: bool) -> None:
+        """
+        Feeds one request outcome into the error-rate window.
+        """
+        with self._condition:
+            self._outcomes.append(success)
+            if success:
+                self._streak += 1
+                if self._streak < self.recovery:
+                    return
+                self._streak = 0
+                if self.concurrency == self.max_concurrency and self.request_size == self.max_request_size:
+                    return
+                change = "Raising"
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+                self.request_size = min(self.max_request_size, self.request_size * 2)
+                self._condition.notify_all()
+            else:
+                self._streak = 0
+                failures = self._outcomes.count(False)
+                # A handful of samples is enough to react to a burst of 429s.
+                if len(self._outcomes) < 5 or failures < self.error_threshold * len(self._outcomes):
+                    return
+                change = "Lowering"
+                self.concurrency = max(1, self.concurrency // 2)
+                self.request_size = max(self.min_request_size, self.request_size // 2)
+                self._outcomes.clear()
+            concurrency, request_size = self.concurrency, self.request_size
+
+        metrics = active_metrics()
+        if metrics is not None and change == "Lowering":
+            metrics.incr("throttle_decreases")
+        if self._debug:
+            print(f"[Throttle] {change} to {concurrency} concurrent requests of up to {request_size} records.")
+
+
+class Quarantine:
+    """
+    Batches that still failed after every retry, kept for a later attempt
+    instead of aborting the run. Thread-safe.
+    """
+
+    def __init__(self) -> None:
+        self.batches: List[QuarantinedBatch] = []
+        self._lock = threading.Lock()
+
+    def add(self, batch: Union[List[str], int], error: BaseException) -> None:
+        """
+        Records a failed ID batch (a list of PMIDs) or history window (its retstart).
+        """
+        entry: QuarantinedBatch = {
+            "ids": list(batch) if isinstance(batch, list) else [],
+            "retstart": batch if isinstance(batch, int) else None,
+            "error": str(error),
+        }
+        with self._lock:
+            self.batches.append(entry)
+
+        metrics = active_metrics()
+        if metrics is not None:
+            metrics.incr("batches_quarantined")
+
+    def __contains__(self, batch: object) -> bool:
+        with self._lock:
+            if isinstance(batch, int):
+                return any(entry["retstart"] == batch for entry in self.batches)
+            return any(entry["ids"] == batch for entry in self.batches)
+
+    def pmids(self) -> List[str]:
+        """
+        Returns the PMIDs of every quarantined ID batch.
+        """
+        with self._lock:
+            return [pmid for entry in self.batches for pmid in entry["ids"]]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.batches)
+
+    def __iter__(self) -> Iterator[QuarantinedBatch]:
+        with self._lock:
+            return iter(list(self.batches))
+
+
+def _retryable(error: Exception) -> bool:
+    response = getattr(error, "response", None)
+    # No response at all (connection reset, timeout, ...) is worth another try.
+    return response is None or getattr(response, "status_code", None) in RETRY_STATUSES
+
+
+class FetchPolicy:
+    """
+    How batch fetches retry, slow down and give up.
+
+    Each request is retried up to `max_attempts` times on 429/5xx responses
+    and connection errors, with jittered exponential backoff that honours
+    `Retry-After`. Every attempt goes through a shared `CircuitBreaker` and
+    `AdaptiveThrottle`. A batch whose response cannot be parsed (a truncated
+    or garbled 200 body) is fetched again, and a batch that still fails is
+    put in `quarantine` so the rest of the run carries on. Other HTTP errors
+    are not retried.
+
+    Args:
+        max_attempts (int): Attempts per request, including the first.
+        backoff_base (float): Ceiling of the first retry's delay, in seconds.
+        backoff_cap (float): Longest delay between two attempts.
+        breaker (Optional[CircuitBreaker]): Defaults to a fresh breaker.
+        quarantine (Optional[Quarantine]): Where failed batches are recorded.
+        sleep (Callable[[float], None]): Used to wait between attempts.
+        rng (Callable[[], float]): Uniform [0, 1) source for the jitter.
+        debug (bool): If True, prints retry, throttle and circuit changes.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_cap: float = DEFAULT_BACKOFF_CAP,
+        breaker: Optional[CircuitBreaker] = None,
+        quarantine: Optional[Quarantine] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Callable[[], float] = random.random,
+        debug: bool = False,
+    ) -> None:
+        if max_attempts <= 0:
+            raise ValueError("max_attempts must be a positive integer.")
+
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.breaker = breaker or CircuitBreaker(debug=debug)
+        self.quarantine = quarantine if quarantine is not None else Quarantine()
+        self.throttle: Optional[AdaptiveThrottle] = None
+        self._sleep = sleep
+        self._rng = rng
+        self._debug = debug
+
+    def start(self, concurrency: int, request_size: int) -> AdaptiveThrottle:
+        """
+        Sets up the throttle for a stream of batches, keeping the one from an
+        earlier stream so a run that backed off stays backed off.
+        """
+        if self.throttle is None:
+            self.throttle = AdaptiveThrottle(concurrency, request_size, debug=self._debug)
+        return self.throttle
+
+    @property
+    def request_size(self) -> Optional[int]:
+        """
+        The current records-per-request ceiling, or None before `start`.
+        """
+        return self.throttle.request_size if self.throttle is not None else None
+
+    def call(self, request: Callable[[], T]) -> T:
+        """
+        Runs one request under the retry, circuit breaker and throttle rules.
+
+        Raises:
+            requests.exceptions.RequestException: The last error, once the
+                attempts run out or the error is not retryable.
+        """
+        attempt = 0
+        while True:
+            self.breaker.wait()
+            try:
+                if self.throttle is None:
+                    result = request()
+                else:
+                    with self.throttle.slot():
+                        result = request()
+            except Exception as e:
+                if not isinstance(e, requests.exceptions.RequestException) or not _retryable(e):
+                    # Not an outage (the server answered, or the error is ours), so
+                    # don't count it against the circuit, and free it if this was the probe.
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if self.throttle is not None:
+                    self.throttle.record(False)
+                attempt += 1
+                if attempt >= self.max_attempts:
+                    raise
+                retry_after = retry_after_seconds(getattr(e, "response", None))
+                delay = backoff_delay(attempt - 1, self.backoff_base, self.backoff_cap, retry_after, self._rng)
+                metrics = active_metrics()
+                if metrics is not None:
+                    metrics.incr("fetch_retries")
+                if self._debug:
+                    print(f"[Retry] Attempt {attempt} of {self.max_attempts} failed ({e}); retrying in {delay:.1f}s.")
+                self._sleep(delay)
+            else:
+                self.breaker.record_success()
+                if self.throttle is not None:
+                    self.throttle.record(True)
+                return result
+
+    def guard(self, batch: Union[List[str], int], fetch: Callable[[], str]) -> Optional[str]:
+        """
+        Runs a whole batch fetch, quarantining the batch instead of raising
+        if any of its requests fails for good.
+
+        A response that does not parse as XML is treated as a failed batch:
+        the fetch is repeated, with backoff, up to `max_attempts` times.
+
+        Returns:
+            Optional[str]: The batch's XML, or None if it was quarantined.
+        """
+        attempt = 0
+        while True:
+            try:
+                return fetch()
+            except ET.ParseError as e:
+                # The server answered 200 with a body we can't use; the
+                # request layer saw a success, so the retry happens here.
+                if self.throttle is not None:
+                    self.throttle.record(False)
+                attempt += 1
+                if attempt < self.max_attempts:
+                    delay = backoff_delay(attempt - 1, self.backoff_base, self.backoff_cap, rng=self._rng)
+                    metrics = active_metrics()
+                    if metrics is not None:
+                        metrics.incr("fetch_retries")
+                    if self._debug:
+                        print(f"[Retry] Malformed response, attempt {attempt} of {self.max_attempts} ({e}); "
+                              f"retrying in {delay:.1f}s.")
+                    self._sleep(delay)
+                    continue
+                error: Exception = e
+            except requests.exceptions.RequestException as e:
+                error = e
+
+            self.quarantine.add(batch, error)
+            if self._debug:
+                what = f"history window at retstart={batch}" if isinstance(batch, int) else f"batch of {len(batch)} IDs"
+                print(f"[Quarantine] Set aside {what}: {error}")
+            return None
@@ -1,14 +1,143 @@
-from typing import List, Optional, TypedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple, TypedDict, Union
 
 class AuthorInfo(TypedDict):
     name: str
     affiliation: Optional[str]
     email: Optional[str]
 
-class PaperInfo(TypedDict):
+class AuthorRecord(TypedDict):
+    name: str
+    affiliations: List[str]
+
+class ArticleRecord(TypedDict):
+    pubmed_id: str
+    title: str
+    pub_date: str
+    authors: List[AuthorRecord]
+
+class _PaperInfo(TypedDict):
     pubmed_id: str
     title: str
     pub_date: str
     non_academic_authors: List[str]
     company_affiliations: List[str]
     corresponding_email: Optional[str]
+
+class PaperInfo(_PaperInfo, total=False):
+    # Canonical names of the known companies in company_affiliations; absent
+    # from files written before it was added.
+    companies: List[str]
+
+class KeywordDictionary(TypedDict):
+    academic: List[str]
+    company_indicators: List[str]
+    whole_word: List[str]
+    companies: Dict[str, List[str]]  # Canonical name -> aliases
+
+PAPER_FIELDS = (
+    "pubmed_id",
+    "title",
+    "pub_date",
+    "non_academic_authors",
+    "company_affiliations",
+    "corresponding_email",
+    "companies",
+)
+
+class Paper:
+    """
+    Compact record for one paper, with the same fields as `PaperInfo`.
+
+    Instances have no per-object `__dict__` and keep author and affiliation
+    lists as tuples, which roughly halves the memory of a parsed paper. Use
+    `to_dict` where a plain `PaperInfo` dictionary is needed.
+    """
+
+    __slots__ = PAPER_FIELDS
+
+    def __init__(
+        self,
+        pubmed_id: str,
+        title: str,
+        pub_date: str,
+        non_academic_authors: Iterable[str] = (),
+        company_affiliations: Iterable[str] = (),
+        corresponding_email: Optional[str] = None,
+        companies: Iterable[str] = (),
+    ) -> None:
+        self.pubmed_id = pubmed_id
+        self.title = title
+        self.pub_date = pub_date
+        self.non_academic_authors: Tuple[str, ...] = tuple(non_academic_authors)
+        self.company_affiliations: Tuple[str, ...] = tuple(company_affiliations)
+        self.corresponding_email = corresponding_email
+        self.companies: Tuple[str, ...] = tuple(companies)
+
+    @classmethod
+    def from_dict(cls, data: PaperInfo) -> "Paper":
+        return cls(**data)
+
+    def to_dict(self) -> PaperInfo:
+        return {
+            "pubmed_id": self.pubmed_id,
+            "title": self.title,
+            "pub_date": self.pub_date,
+            "non_academic_authors": list(self.non_academic_authors),
+            "company_affiliations": list(self.company_affiliations),
+            "corresponding_email": self.corresponding_email,
+            "companies": list(self.companies),
+        }
+
+    def _values(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, field) for field in PAPER_FIELDS)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Paper):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{field}={value!r}" for field, value in zip(PAPER_FIELDS, self._values()))
+        return f"Paper({fields})"
+
+# Anything the exporters accept as a paper
+PaperLike = Union[Paper, PaperInfo]
+
+class SearchHistory(TypedDict):
+    webenv: str
+    query_key: str
+    count: int
+
+class CacheStats(TypedDict):
+    hits: int
+    misses: int
+    size: int
+    maxsize: Optional[int]
+    hit_rate: float
+
+class DateWindow(TypedDict):
+    mindate: str
+    maxdate: str
+    count: int
+
+class CheckpointPlan(TypedDict):
+    query: str
+    ids: Optional[List[str]]
+    history: Optional[SearchHistory]
+    batch_size: int
+    format: str
+    maxdate: Optional[str]
+
+class TimerStats(TypedDict):
+    count: int
+    total: float
+    max: float
+
+class MetricsSnapshot(TypedDict):
+    counters: Dict[str, float]
+    timers: Dict[str, TimerStats]
+
+class QuarantinedBatch(TypedDict):
+    ids: List[str]              # The batch's PMIDs; empty for a history window
+    retstart: Optional[int]     # The history window's offset; None for an ID batch
+    error: str
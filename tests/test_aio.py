@@ -0,0 +1,150 @@
+import asyncio
+from urllib.parse import parse_qs
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from get_papers.src import aio
+from get_papers.src.cache import ArticleCache
+
+
+def _article(pmid):
+    return f"""<PubmedArticle><MedlineCitation><PMID>{pmid}</PMID><Article>
+      <ArticleTitle>Paper {pmid}</ArticleTitle>
+      <AuthorList><Author><ForeName>Ann</ForeName><LastName>Lee</LastName>
+        <AffiliationInfo><Affiliation>Pfizer Inc.</Affiliation></AffiliationInfo>
+      </Author></AuthorList>
+    </Article></MedlineCitation></PubmedArticle>"""
+
+
+class FakeEutils:
+    """Answers ESearch with fixed IDs and EFetch with one article per requested PMID."""
+
+    def __init__(self, ids, failures=()):
+        self.ids = ids
+        self.failures = list(failures)
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        if self.failures:
+            return httpx.Response(self.failures.pop(0), headers={"Retry-After": "0"})
+        if request.url.path.endswith("esearch.fcgi"):
+            return httpx.Response(200, json={"esearchresult": {
+                "count": str(len(self.ids)), "idlist": self.ids, "webenv": "MCID_abc", "querykey": "1",
+            }})
+        form = parse_qs(request.content.decode())
+        ids = form["id"][0].split(",") if "id" in form else ["h" + form["retstart"][0]]
+        return httpx.Response(200, text="<PubmedArticleSet>" + "".join(map(_article, ids)) + "</PubmedArticleSet>")
+
+
+@pytest.fixture(autouse=True)
+def no_throttle(monkeypatch):
+    async def acquire(self, tokens=1.0):
+        pass
+    monkeypatch.setattr(aio.AsyncTokenBucket, "acquire", acquire)
+
+
+def _client(server, **kwargs):
+    return aio.AsyncPubMedClient(transport=httpx.MockTransport(server), backoff_factor=0, **kwargs)
+
+
+def test_search_returns_ids():
+    server = FakeEutils(["1", "2"])
+
+    async def run():
+        async with _client(server, api_key="secret") as client:
+            return await aio.search("cancer", client=client)
+
+    assert asyncio.run(run()) == ["1", "2"]
+    params = server.requests[0].url.params
+    assert params["term"] == "cancer"
+    assert params["api_key"] == "secret"
+
+def test_search_rejects_empty_query():
+    with pytest.raises(ValueError):
+        asyncio.run(aio.search("  "))
+
+def test_search_history_returns_handle():
+    async def run():
+        async with _client(FakeEutils(["1"])) as client:
+            return await aio.search_history("cancer", client=client)
+
+    assert asyncio.run(run()) == {"webenv": "MCID_abc", "query_key": "1", "count": 1}
+
+def test_iter_batches_keeps_id_order():
+    server = FakeEutils([])
+
+    async def run():
+        async with _client(server) as client:
+            return [xml async for xml in aio.iter_batches(
+                (str(i) for i in range(1, 6)), batch_size=2, concurrency=2, client=client
+            )]
+
+    batches = asyncio.run(run())
+    assert len(batches) == 3
+    assert "<PMID>5</PMID>" in batches[2]
+    assert all(request.method == "POST" for request in server.requests)
+
+def test_iter_batches_serves_cached_articles(tmp_path):
+    server = FakeEutils([])
+    cache = ArticleCache(str(tmp_path))
+
+    async def run():
+        async with _client(server) as client:
+            for _ in range(2):
+                batches = [xml async for xml in aio.iter_batches(["1", "2"], client=client, cache=cache)]
+        return batches
+
+    assert "<PMID>2</PMID>" in asyncio.run(run())[0]
+    assert len(server.requests) == 1
+    cache.close()
+
+def test_iter_history_batches_walks_retstart():
+    history = {"webenv": "MCID_abc", "query_key": "1", "count": 5}
+
+    async def run():
+        async with _client(FakeEutils([])) as client:
+            return [xml async for xml in aio.iter_history_batches(history, batch_size=2, client=client)]
+
+    batches = asyncio.run(run())
+    assert ["<PMID>h0</PMID>" in batches[0], "<PMID>h4</PMID>" in batches[2]] == [True, True]
+
+def test_client_retries_rate_limited_requests():
+    server = FakeEutils(["1"], failures=[429, 503])
+
+    async def run():
+        async with _client(server) as client:
+            return await aio.search("cancer", client=client)
+
+    assert asyncio.run(run()) == ["1"]
+    assert len(server.requests) == 3
+
+def test_client_reports_http_error_after_retries(capsys):
+    server = FakeEutils(["1"], failures=[500] * 3)
+
+    async def run():
+        async with _client(server, max_retries=2) as client:
+            return await aio.search("cancer", client=client)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(run())
+    assert "[HTTP Error]" in capsys.readouterr().out
+
+def test_fetch_papers_streams_parsed_papers():
+    async def run():
+        async with _client(FakeEutils(["7", "8", "9"])) as client:
+            return [paper async for paper in aio.fetch_papers("cancer", batch_size=2, client=client)]
+
+    papers = asyncio.run(run())
+    assert [paper.pubmed_id for paper in papers] == ["7", "8", "9"]
+    assert papers[0].company_affiliations == ("Pfizer Inc.",)
+
+def test_concurrent_queries_share_one_client():
+    async def run():
+        async with _client(FakeEutils(["1", "2"])) as client:
+            async def collect(query):
+                return [paper.pubmed_id async for paper in aio.fetch_papers(query, client=client)]
+            return await asyncio.gather(collect("cancer"), collect("diabetes"))
+
+    assert asyncio.run(run()) == [["1", "2"], ["1", "2"]]
@@ -0,0 +1,94 @@
+import pytest
+from get_papers.src.archive import ArchiveWriter, ArticleArchive
+from get_papers.src.parser import parse_pubmed_xml
+
+
+def _article(pmid, affiliation="Pfizer Inc."):
+    return (f"<PubmedArticle><MedlineCitation><PMID>{pmid}</PMID><Article>"
+            f"<ArticleTitle>Paper {pmid} é</ArticleTitle><AuthorList><Author><LastName>Lee</LastName>"
+            f"<AffiliationInfo><Affiliation>{affiliation}</Affiliation></AffiliationInfo>"
+            f"</Author></AuthorList></Article></MedlineCitation></PubmedArticle>")
+
+
+def _write(path, pmids, **kwargs):
+    with ArchiveWriter(str(path), **kwargs) as writer:
+        writer.add({str(pmid): _article(pmid) for pmid in pmids})
+
+
+def test_archive_reads_single_articles_by_pmid(tmp_path):
+    path = tmp_path / "raw.archive"
+    _write(path, [30, 4, 1000, 7], block_size=200)
+
+    with ArticleArchive(str(path)) as archive:
+        assert len(archive) == 4
+        assert list(archive.pmids()) == ["4", "7", "30", "1000"]
+        assert archive.get("1000") == _article(1000)
+        assert archive.get("5") is None
+        assert archive.get("abc") is None
+        assert "7" in archive and "8" not in archive
+        assert archive._block_count > 1
+
+
+def test_archive_iter_batches_feed_the_parser_in_insertion_order(tmp_path):
+    path = tmp_path / "raw.archive"
+    with ArchiveWriter(str(path), block_size=300) as writer:
+        writer.add_xml("<PubmedArticleSet>" + _article(3) + _article(1) + "</PubmedArticleSet>")
+        writer.add_xml("<PubmedArticleSet>" + _article(2) + "</PubmedArticleSet>")
+
+    with ArticleArchive(str(path)) as archive:
+        batches = list(archive.iter_batches(batch_size=2))
+    assert len(batches) == 2
+    assert [paper.pubmed_id for batch in batches for paper in parse_pubmed_xml(batch)] == ["3", "1", "2"]
+
+
+def test_archive_appends_and_replaces_readded_pmids(tmp_path):
+    path = tmp_path / "raw.archive"
+    _write(path, [1, 2])
+    with ArchiveWriter(str(path)) as writer:
+        writer.add({"2": _article(2, "Moderna Inc."), "3": _article(3)})
+
+    with ArticleArchive(str(path)) as archive:
+        assert len(archive) == 3
+        assert "Moderna" in archive.get("2")
+        assert [pmid for pmid, _ in archive.iter_articles()] == ["1", "2", "3"]
+
+
+def test_archive_recovers_from_an_unclosed_writer(tmp_path):
+    path = tmp_path / "raw.archive"
+    _write(path, [1, 2])
+    writer = ArchiveWriter(str(path), block_size=1)
+    writer.add({"3": _article(3)})
+    writer._file.write(b"\x40\x00\x00\x00torn")  # A block cut off mid-write
+    writer._file.close()
+
+    with pytest.raises(ValueError, match="incomplete"):
+        ArticleArchive(str(path))
+    ArchiveWriter(str(path)).close()
+    with ArticleArchive(str(path)) as archive:
+        assert list(archive.pmids()) == ["1", "2", "3"]
+
+
+def test_archive_rejects_other_files_and_codec_changes(tmp_path):
+    other = tmp_path / "other.bin"
+    other.write_bytes(b"not an archive at all, just some bytes" * 4)
+    with pytest.raises(ValueError, match="not an article archive"):
+        ArticleArchive(str(other))
+    with pytest.raises(ValueError, match="not an article archive"):
+        ArchiveWriter(str(other))
+
+    path = tmp_path / "raw.archive"
+    _write(path, [1])
+    with pytest.raises(ValueError, match="gzip codec"):
+        ArchiveWriter(str(path), codec="zstd")
+    with pytest.raises(ValueError, match="Unknown archive codec"):
+        ArchiveWriter(str(tmp_path / "new.archive"), codec="lz4")
+    assert not (tmp_path / "new.archive").exists()
+
+
+def test_archive_zstd_codec(tmp_path):
+    pytest.importorskip("zstandard")
+    path = tmp_path / "raw.archive"
+    _write(path, [1, 2], codec="zstd")
+    with ArticleArchive(str(path)) as archive:
+        assert archive.codec == "zstd"
+        assert archive.get("2") == _article(2)
@@ -0,0 +1,99 @@
+import sqlite3
+import zlib
+import pytest
+from get_papers.src.cache import ArticleCache, join_pubmed_articles, split_pubmed_articles
+
+EFETCH_XML = """<?xml version="1.0" ?>
+<PubmedArticleSet>
+  <PubmedArticle><MedlineCitation><PMID>111</PMID></MedlineCitation></PubmedArticle>
+  <PubmedArticle><MedlineCitation><PMID>222</PMID></MedlineCitation></PubmedArticle>
+</PubmedArticleSet>
+"""
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = ArticleCache(str(tmp_path), ttl=60, clock=clock)
+    yield cache
+    cache.close()
+
+
+def test_split_and_join_round_trip():
+    articles = split_pubmed_articles(EFETCH_XML)
+    assert list(articles) == ["111", "222"]
+    assert "<PMID>222</PMID>" in articles["222"]
+
+    rejoined = split_pubmed_articles(join_pubmed_articles(articles.values()))
+    assert rejoined == articles
+
+def test_cache_hits_and_misses(cache):
+    cache.put_many(split_pubmed_articles(EFETCH_XML))
+
+    found = cache.get_many(["111", "333"])
+    assert list(found) == ["111"]
+    assert "<PMID>111</PMID>" in found["111"]
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert "50.0% hit rate" in cache.stats()
+
+@pytest.mark.skipif(not hasattr(sqlite3.Connection, "setlimit"), reason="needs Python 3.11+")
+def test_cache_get_many_stays_under_sqlite_parameter_limit(cache):
+    # Older SQLite builds cap a statement at 999 bound parameters.
+    cache._conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+    cache.put_many(split_pubmed_articles(EFETCH_XML))
+    pmids = [str(pmid) for pmid in range(100000, 102000)] + ["222", "111"]
+
+    assert set(cache.get_many(pmids)) == {"111", "222"}
+    assert (cache.hits, cache.misses) == (2, 2000)
+
+def test_cache_persists_across_instances(tmp_path, clock):
+    first = ArticleCache(str(tmp_path), clock=clock)
+    first.put_many({"111": "<PubmedArticle/>"})
+    first.close()
+
+    second = ArticleCache(str(tmp_path), clock=clock)
+    assert second.get_many(["111"]) == {"111": "<PubmedArticle/>"}
+    second.close()
+
+def test_cache_expires_entries_after_ttl(cache, clock):
+    cache.put_many({"111": "<PubmedArticle/>"})
+    clock.now += 61
+
+    assert cache.get_many(["111"]) == {}
+    assert len(cache) == 0
+
+def test_purge_expired(cache, clock):
+    cache.put_many({"111": "<PubmedArticle/>"})
+    clock.now += 30
+    cache.put_many({"222": "<PubmedArticle/>"})
+    clock.now += 31
+
+    assert cache.purge_expired() == 1
+    assert cache.get_many(["111", "222"]).keys() == {"222"}
+
+def test_cache_evicts_least_recently_used(tmp_path, clock):
+    payload = "<PubmedArticle>" + "x" * 5000 + "</PubmedArticle>"
+    record_size = len(zlib.compress(payload.encode("utf-8")))
+    cache = ArticleCache(str(tmp_path), ttl=None, max_bytes=record_size * 2, clock=clock)
+
+    cache.put_many({"old": payload})
+    clock.now += 1
+    cache.put_many({"mid": payload})
+    clock.now += 1
+    cache.get_many(["old"])  # Reading "old" makes "mid" the least recently used
+    clock.now += 1
+    cache.put_many({"new": payload})
+
+    assert set(cache.get_many(["old", "mid", "new"])) == {"old", "new"}
+    cache.close()
@@ -0,0 +1,82 @@
+import pytest
+from get_papers.src.checkpoint import Checkpoint, default_checkpoint_path
+
+ID_PLAN = {
+    "query": "cancer",
+    "ids": [str(i) for i in range(1, 8)],
+    "history": None,
+    "batch_size": 3,
+    "format": "csv",
+    "maxdate": None,
+}
+
+HISTORY_PLAN = {
+    "query": "cancer",
+    "ids": None,
+    "history": {"webenv": "MCID_abc", "query_key": "1", "count": 1001},
+    "batch_size": 500,
+    "format": "jsonl",
+    "maxdate": None,
+}
+
+
+def test_default_checkpoint_path():
+    assert default_checkpoint_path("out/papers.csv") == "out/papers.csv.checkpoint"
+
+def test_batches_follow_the_plan():
+    checkpoint = Checkpoint("unused", ID_PLAN)
+    assert checkpoint.total_batches == 3
+    assert checkpoint.batch_ids(0) == ["1", "2", "3"]
+    assert checkpoint.batch_ids(2) == ["7"]
+
+    history = Checkpoint("unused", HISTORY_PLAN)
+    assert history.total_batches == 3
+    assert history.batch_retstart(2) == 1000
+
+def test_progress_survives_reload(tmp_path):
+    path = str(tmp_path / "out.csv.checkpoint")
+    checkpoint = Checkpoint.create(path, ID_PLAN)
+    checkpoint.mark(0, "fetched")
+    checkpoint.mark(0, "parsed")
+    checkpoint.mark(0, "exported", offset=120, rows=2)
+    checkpoint.mark(1, "fetched")
+
+    loaded = Checkpoint.load(path)
+    assert loaded.plan == ID_PLAN
+    assert loaded.stages == {0: "exported", 1: "fetched"}
+    assert loaded.pending_batches() == [1, 2]
+    assert loaded.output_offset == 120
+    assert loaded.rows_exported == 2
+
+def test_load_ignores_torn_last_line(tmp_path):
+    path = str(tmp_path / "out.csv.checkpoint")
+    checkpoint = Checkpoint.create(path, ID_PLAN)
+    checkpoint.mark(0, "exported", offset=50, rows=1)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"batch": 1, "sta')
+
+    loaded = Checkpoint.load(path)
+    assert loaded.pending_batches() == [1, 2]
+
+def test_stages_only_move_forward():
+    checkpoint = Checkpoint("unused", ID_PLAN)
+    checkpoint._apply({"batch": 0, "stage": "parsed"})
+    checkpoint._apply({"batch": 0, "stage": "fetched"})
+    assert checkpoint.stages[0] == "parsed"
+
+def test_mark_rejects_unknown_stage(tmp_path):
+    checkpoint = Checkpoint.create(str(tmp_path / "cp"), ID_PLAN)
+    with pytest.raises(ValueError):
+        checkpoint.mark(0, "downloaded")
+
+def test_load_without_plan(tmp_path):
+    path = tmp_path / "cp"
+    path.write_text("", encoding="utf-8")
+    with pytest.raises(ValueError):
+        Checkpoint.load(str(path))
+
+def test_remove(tmp_path):
+    path = tmp_path / "cp"
+    checkpoint = Checkpoint.create(str(path), ID_PLAN)
+    checkpoint.remove()
+    assert not path.exists()
@@ -0,0 +1,291 @@
+import csv
+import json
+import subprocess
+import sys
+import pytest
+from get_papers import cli
+from get_papers.src.metrics import disable_metrics
+
+
+def _batch_xml(ids):
+    articles = "".join(f"""
+      <PubmedArticle><MedlineCitation><PMID>{pmid}</PMID><Article>
+        <ArticleTitle>Paper {pmid}</ArticleTitle>
+        <AuthorList><Author><ForeName>Ann</ForeName><LastName>Lee</LastName>
+          <AffiliationInfo><Affiliation>Pfizer Inc.</Affiliation></AffiliationInfo>
+        </Author></AuthorList>
+      </Article></MedlineCitation></PubmedArticle>""" for pmid in ids)
+    return f"<PubmedArticleSet>{articles}</PubmedArticleSet>"
+
+
+@pytest.fixture
+def fake_pubmed(monkeypatch):
+    """Serves 7 PMIDs in batches and can fail, or quarantine, a chosen batch."""
+    state = {"fail_on": None, "quarantine_on": None, "requested": []}
+
+    def fake_iter_pubmed_details(ids, batch_size, cache=None, policy=None, **kwargs):
+        ids = list(ids)
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            if batch[0] == state["fail_on"]:
+                raise ConnectionError("NCBI 429 storm")
+            if batch[0] == state["quarantine_on"] and policy is not None:
+                policy.quarantine.add(batch, ConnectionError("NCBI 502"))
+                continue
+            state["requested"].append(batch)
+            yield _batch_xml(batch)
+
+    monkeypatch.setattr(cli, "fetch_pubmed_ids", lambda query, debug=False, **kwargs: [str(i) for i in range(1, 8)])
+    monkeypatch.setattr(cli, "iter_pubmed_details", fake_iter_pubmed_details)
+    return state
+
+def _run(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["get-papers-list", *argv])
+    cli.main()
+
+def _pmids(path):
+    with open(path, encoding="utf-8") as f:
+        return [row["PubmedID"] for row in csv.DictReader(f)]
+
+
+def test_cli_resume_only_fetches_unfinished_batches(monkeypatch, tmp_path, fake_pubmed):
+    output = str(tmp_path / "out.csv")
+    args = ["cancer", "--file", output, "--batch-size", "3", "--no-cache"]
+
+    fake_pubmed["fail_on"] = "4"
+    with pytest.raises(ConnectionError):
+        _run(monkeypatch, *args)
+    assert _pmids(output) == ["1", "2", "3"]
+    assert (tmp_path / "out.csv.checkpoint").exists()
+
+    fake_pubmed["fail_on"] = None
+    fake_pubmed["requested"].clear()
+    _run(monkeypatch, *args, "--resume")
+
+    assert fake_pubmed["requested"] == [["4", "5", "6"], ["7"]]
+    assert _pmids(output) == ["1", "2", "3", "4", "5", "6", "7"]
+    assert not (tmp_path / "out.csv.checkpoint").exists()
+
+def test_cli_closes_cache_and_index_when_fetch_fails(monkeypatch, tmp_path, fake_pubmed):
+    closed = []
+    monkeypatch.setattr(cli.ArticleCache, "close", lambda self: closed.append("cache"))
+    monkeypatch.setattr(cli.PaperIndex, "close", lambda self: closed.append("index"))
+
+    fake_pubmed["fail_on"] = "4"
+    with pytest.raises(ConnectionError):
+        _run(monkeypatch, "cancer", "--file", str(tmp_path / "out.csv"), "--batch-size", "3",
+             "--cache-dir", str(tmp_path / "cache"), "--index", str(tmp_path / "papers.db"))
+    assert sorted(closed) == ["cache", "index"]
+
+def test_cli_quarantined_batch_stays_pending(monkeypatch, tmp_path, fake_pubmed):
+    output = str(tmp_path / "out.csv")
+    args = ["cancer", "--file", output, "--batch-size", "3", "--no-cache"]
+
+    fake_pubmed["quarantine_on"] = "4"
+    with pytest.raises(SystemExit) as excinfo:
+        _run(monkeypatch, *args)
+    assert "--resume" in str(excinfo.value.code)
+    assert _pmids(output) == ["1", "2", "3", "7"]
+    assert (tmp_path / "out.csv.checkpoint").exists()
+
+    fake_pubmed["quarantine_on"] = None
+    fake_pubmed["requested"].clear()
+    _run(monkeypatch, *args, "--resume")
+
+    assert fake_pubmed["requested"] == [["4", "5", "6"]]
+    assert sorted(_pmids(output)) == ["1", "2", "3", "4", "5", "6", "7"]
+    assert not (tmp_path / "out.csv.checkpoint").exists()
+
+def test_cli_fail_fast_skips_quarantine(monkeypatch, tmp_path, fake_pubmed):
+    fake_pubmed["quarantine_on"] = "4"
+    _run(monkeypatch, "cancer", "--file", str(tmp_path / "out.csv"), "--batch-size", "3", "--no-cache", "--fail-fast")
+    assert _pmids(str(tmp_path / "out.csv")) == ["1", "2", "3", "4", "5", "6", "7"]
+
+def test_cli_resume_discards_partially_written_rows(monkeypatch, tmp_path, fake_pubmed):
+    output = str(tmp_path / "out.csv")
+    args = ["cancer", "--file", output, "--batch-size", "3", "--no-cache"]
+
+    fake_pubmed["fail_on"] = "4"
+    with pytest.raises(ConnectionError):
+        _run(monkeypatch, *args)
+    with open(output, "a", encoding="utf-8") as f:
+        f.write("4,Torn row")
+
+    fake_pubmed["fail_on"] = None
+    _run(monkeypatch, *args, "--resume")
+    assert _pmids(output) == ["1", "2", "3", "4", "5", "6", "7"]
+
+def test_cli_resume_requires_checkpoint(monkeypatch, tmp_path, fake_pubmed):
+    with pytest.raises(SystemExit):
+        _run(monkeypatch, "cancer", "--file", str(tmp_path / "out.csv"), "--resume")
+
+def test_cli_resume_rejects_other_query(monkeypatch, tmp_path, fake_pubmed):
+    output = str(tmp_path / "out.csv")
+    fake_pubmed["fail_on"] = "4"
+    with pytest.raises(ConnectionError):
+        _run(monkeypatch, "cancer", "--file", output, "--batch-size", "3", "--no-cache")
+
+    with pytest.raises(SystemExit):
+        _run(monkeypatch, "diabetes", "--file", output, "--no-cache", "--resume")
+    assert (tmp_path / "out.csv.checkpoint").exists()
+
+def test_cli_delta_merges_changes_and_records_run(monkeypatch, tmp_path, fake_pubmed):
+    output = str(tmp_path / "out.csv")
+    state_file = str(tmp_path / "state.json")
+    windows = []
+
+    def fake_iter_delta_ids(query, since, until, datetype="mdat", debug=False, **kwargs):
+        windows.append((since, until, datetype))
+        return iter(["1", "2", "3"] if since is None else ["3", "8"])
+
+    monkeypatch.setattr(cli, "iter_delta_ids", fake_iter_delta_ids)
+    args = ["cancer", "--file", output, "--no-cache", "--delta", "--state-file", state_file]
+
+    _run(monkeypatch, *args)
+    assert _pmids(output) == ["1", "2", "3"]
+
+    _run(monkeypatch, *args)
+    assert _pmids(output) == ["1", "2", "3", "8"]
+    assert windows[1][0] == cli.date.today()
+    assert windows[1][2] == "mdat"
+    assert not (tmp_path / "out.csv.delta").exists()
+
+def test_cli_delta_requires_file(monkeypatch, fake_pubmed):
+    with pytest.raises(SystemExit):
+        _run(monkeypatch, "cancer", "--delta")
+
+@pytest.fixture
+def reset_metrics():
+    yield
+    disable_metrics()
+
+def test_cli_writes_metrics(monkeypatch, tmp_path, fake_pubmed, reset_metrics):
+    metrics_path = tmp_path / "metrics.json"
+    _run(monkeypatch, "cancer", "--file", str(tmp_path / "out.csv"), "--batch-size", "3", "--no-cache",
+         "--metrics", str(metrics_path))
+
+    report = json.loads(metrics_path.read_text(encoding="utf-8"))
+    assert report["counters"]["articles_parsed"] == 7
+    assert report["counters"]["rows_written"] == 7
+    assert report["timers"]["parse_batch"]["count"] == 3
+    assert report["timers"]["run"]["count"] == 1
+
+def test_cli_writes_prometheus_metrics_to_stderr(monkeypatch, tmp_path, fake_pubmed, capsys, reset_metrics):
+    _run(monkeypatch, "cancer", "--file", str(tmp_path / "out.csv"), "--no-cache",
+         "--metrics", "-", "--metrics-format", "prometheus")
+
+    assert "get_papers_rows_written_total 7" in capsys.readouterr().err
+
+def test_cli_offline_queries_the_index(monkeypatch, tmp_path, fake_pubmed, capsys):
+    index = str(tmp_path / "papers.sqlite3")
+    _run(monkeypatch, "cancer", "--file", str(tmp_path / "out.csv"), "--no-cache", "--index", index)
+
+    fake_pubmed["requested"].clear()
+    output = str(tmp_path / "offline.csv")
+    _run(monkeypatch, "paper", "--offline", "--index", index, "--company", "Pfizer", "--file", output)
+    assert fake_pubmed["requested"] == []
+    assert _pmids(output) == ["1", "2", "3", "4", "5", "6", "7"]
+
+    capsys.readouterr()
+    _run(monkeypatch, "paper 3", "--offline", "--index", index)
+    assert "'pubmed_id': '3'" in capsys.readouterr().out
+    # The fake articles carry no date, so a year filter excludes them.
+    _run(monkeypatch, "paper 3", "--offline", "--index", index, "--year", "1990-")
+    assert capsys.readouterr().out == ""
+
+def test_cli_offline_requires_an_index(monkeypatch, tmp_path):
+    with pytest.raises(SystemExit):
+        _run(monkeypatch, "paper", "--offline", "--index", str(tmp_path / "missing.sqlite3"))
+
+def test_cli_year_range():
+    assert cli.year_range("2023") == (2023, 2023)
+    assert cli.year_range("2020-2023") == (2020, 2023)
+    assert cli.year_range("2020-") == (2020, None)
+    assert cli.year_range("-2023") == (None, 2023)
+
+def test_cli_rejects_unreadable_dictionary(monkeypatch, tmp_path, fake_pubmed):
+    with pytest.raises(SystemExit):
+        _run(monkeypatch, "cancer", "--dictionary", str(tmp_path / "missing.json"))
+
+@pytest.mark.parametrize("flag", ["--batch-size", "--concurrency", "--workers"])
+@pytest.mark.parametrize("value", ["0", "-1"])
+def test_cli_rejects_non_positive_sizes(monkeypatch, tmp_path, fake_pubmed, capsys, flag, value):
+    with pytest.raises(SystemExit):
+        _run(monkeypatch, "cancer", flag, value, "--file", str(tmp_path / "out.csv"))
+    assert f"{flag} must be a positive integer" in capsys.readouterr().err
+    assert fake_pubmed["requested"] == []
+
+def test_cli_batch_fetches_shared_pmids_once(monkeypatch, tmp_path, fake_pubmed, capsys):
+    matches = {"crispr": ["1", "2", "3"], "cas9": ["3", "4"], "base editing": ["2", "5"]}
+    monkeypatch.setattr(cli, "iter_pubmed_ids", lambda query, debug=False, **kwargs: iter(matches[query]))
+    queries = tmp_path / "queries.txt"
+    queries.write_text("# standing queries\ncrispr\nediting\tbase editing\n\ncas9\n", encoding="utf-8")
+    out = tmp_path / "out"
+
+    _run(monkeypatch, "--queries", str(queries), "--output-dir", str(out), "--batch-size", "10", "--no-cache")
+
+    assert fake_pubmed["requested"] == [["1", "2", "3", "5", "4"]]
+    assert _pmids(out / "crispr.csv") == ["1", "2", "3"]
+    assert _pmids(out / "cas9.csv") == ["3", "4"]
+    assert _pmids(out / "editing.csv") == ["2", "5"]
+    assert "5 unique PMIDs fetched" in capsys.readouterr().out
+
+def test_cli_batch_requires_output_dir(monkeypatch, tmp_path, fake_pubmed):
+    queries = tmp_path / "queries.txt"
+    queries.write_text("crispr\n", encoding="utf-8")
+    with pytest.raises(SystemExit):
+        _run(monkeypatch, "--queries", str(queries))
+    with pytest.raises(SystemExit):
+        _run(monkeypatch, "cancer", "--queries", str(queries), "--output-dir", str(tmp_path))
+
+def test_read_queries_names_unnamed_queries(tmp_path):
+    path = tmp_path / "queries.txt"
+    path.write_text("CRISPR AND 2023[dp]\nCRISPR AND 2023[dp]\nmrna\tmRNA[ti]\n", encoding="utf-8")
+    assert cli.read_queries(str(path)) == [
+        ("CRISPR_AND_2023_dp", "CRISPR AND 2023[dp]"),
+        ("CRISPR_AND_2023_dp_2", "CRISPR AND 2023[dp]"),
+        ("mrna", "mRNA[ti]"),
+    ]
+
+@pytest.mark.parametrize("name", ["../../x", "a/b", "a\\b", ".hidden", "x" * 101])
+def test_read_queries_rejects_unsafe_names(tmp_path, name):
+    path = tmp_path / "queries.txt"
+    path.write_text(f"{name}\tcancer\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        cli.read_queries(str(path))
+
+def test_read_queries_rejects_duplicate_names(tmp_path):
+    path = tmp_path / "queries.txt"
+    path.write_text("mrna\tmRNA[ti]\nMRNA\tmRNA vaccine\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="line 2"):
+        cli.read_queries(str(path))
+
+def test_cli_batch_rejects_unsafe_query_names(monkeypatch, tmp_path, fake_pubmed):
+    queries = tmp_path / "queries.txt"
+    queries.write_text("../escape\tcancer\n", encoding="utf-8")
+    with pytest.raises(SystemExit):
+        _run(monkeypatch, "--queries", str(queries), "--output-dir", str(tmp_path / "out"))
+    assert not (tmp_path / "escape.csv").exists()
+
+def test_cli_import_defers_heavy_modules():
+    # A fresh interpreter: this one already has everything loaded.
+    code = (
+        "import sys, get_papers.cli; "
+        "print(','.join(m for m in ('requests', 'urllib3', 'asyncio', 'concurrent.futures', 'multiprocessing') "
+        "if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
+
+def test_cli_reparses_an_archive_without_pubmed(monkeypatch, tmp_path, fake_pubmed, capsys):
+    archive = str(tmp_path / "raw.archive")
+    _run(monkeypatch, "cancer", "--file", str(tmp_path / "out.csv"), "--batch-size", "3", "--no-cache",
+         "--archive", archive)
+
+    fake_pubmed["requested"].clear()
+    output = str(tmp_path / "again.csv")
+    _run(monkeypatch, "--from-archive", archive, "--file", output)
+
+    assert fake_pubmed["requested"] == []
+    assert _pmids(output) == [str(i) for i in range(1, 8)]
+    assert "7 archived articles" in capsys.readouterr().out
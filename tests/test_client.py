@@ -0,0 +1,48 @@
+from unittest.mock import Mock, patch
+import pytest
+from get_papers.src import client as client_module
+from get_papers.src.client import RETRY_STATUSES, PubMedClient, get_default_client
+
+
+def test_client_mounts_pooled_adapter_with_retries():
+    client = PubMedClient(pool_size=8, max_retries=4, backoff_factor=1.0)
+    adapter = client.session.get_adapter("https://eutils.ncbi.nlm.nih.gov/")
+
+    assert adapter._pool_maxsize == 8
+    assert adapter.max_retries.total == 4
+    assert adapter.max_retries.backoff_factor == 1.0
+    assert set(RETRY_STATUSES) <= set(adapter.max_retries.status_forcelist)
+    assert adapter.max_retries.respect_retry_after_header
+    assert "POST" in adapter.max_retries.allowed_methods
+    client.close()
+
+def test_client_requests_compressed_keep_alive_responses():
+    with PubMedClient() as client:
+        assert "gzip" in client.session.headers["Accept-Encoding"]
+        assert client.session.headers["Connection"] == "keep-alive"
+
+def test_client_rejects_invalid_pool_size():
+    with pytest.raises(ValueError):
+        PubMedClient(pool_size=0)
+
+@patch("get_papers.src.client.requests.Session.get")
+def test_client_get_reuses_session(mock_get):
+    mock_get.return_value = Mock()
+    with PubMedClient() as client:
+        client.get("https://example.org", params={"a": 1})
+        client.get("https://example.org", params={"a": 2})
+
+    assert mock_get.call_count == 2
+    assert mock_get.call_args.kwargs["params"] == {"a": 2}
+
+def test_default_client_is_shared_and_grows_with_concurrency(monkeypatch):
+    monkeypatch.setattr(client_module, "_default_client", None)
+
+    first = get_default_client()
+    assert get_default_client() is first
+
+    larger = get_default_client(pool_size=first.pool_size + 5)
+    assert larger is not first
+    assert larger.pool_size == first.pool_size + 5
+    assert get_default_client(pool_size=1) is larger
+    larger.close()
@@ -0,0 +1,81 @@
+from datetime import date
+import pytest
+from unittest.mock import Mock
+from get_papers.src import delta
+from get_papers.src.delta import DeltaState, iter_delta_ids, parse_date, partition_date_range
+
+
+@pytest.fixture
+def daily_counts(monkeypatch):
+    """Fakes ESearch counts from a table of records per day."""
+    counts = {date(2024, 1, day): 0 for day in range(1, 9)}
+    calls = []
+
+    def fake_count(query, mindate, maxdate, datetype, client=None, api_key=None, limiter=None):
+        calls.append((mindate, maxdate, api_key, limiter))
+        low, high = parse_date(mindate), parse_date(maxdate)
+        return sum(n for day, n in counts.items() if low <= day <= high)
+
+    monkeypatch.setattr(delta, "count_pubmed_results", fake_count)
+    return counts, calls
+
+
+def test_partition_keeps_small_range_whole(daily_counts):
+    counts, calls = daily_counts
+    counts[date(2024, 1, 3)] = 5
+
+    windows = partition_date_range("cancer", date(2024, 1, 1), date(2024, 1, 8), max_records=10)
+    assert windows == [{"mindate": "2024/01/01", "maxdate": "2024/01/08", "count": 5}]
+    assert len(calls) == 1
+
+def test_partition_bisects_until_windows_fit(daily_counts):
+    counts, _ = daily_counts
+    counts.update({date(2024, 1, 1): 6, date(2024, 1, 2): 6, date(2024, 1, 7): 3})
+
+    windows = partition_date_range("cancer", date(2024, 1, 1), date(2024, 1, 8), max_records=10)
+    assert windows == [
+        {"mindate": "2024/01/01", "maxdate": "2024/01/01", "count": 6},
+        {"mindate": "2024/01/02", "maxdate": "2024/01/02", "count": 6},
+        {"mindate": "2024/01/05", "maxdate": "2024/01/08", "count": 3},
+    ]
+
+def test_partition_returns_oversized_single_day(daily_counts):
+    counts, _ = daily_counts
+    counts[date(2024, 1, 4)] = 50
+
+    windows = partition_date_range("cancer", date(2024, 1, 4), date(2024, 1, 4), max_records=10)
+    assert windows == [{"mindate": "2024/01/04", "maxdate": "2024/01/04", "count": 50}]
+
+def test_partition_passes_api_key_and_limiter(daily_counts):
+    counts, calls = daily_counts
+    counts.update({date(2024, 1, 1): 6, date(2024, 1, 8): 6})
+    limiter = Mock()
+
+    partition_date_range("cancer", date(2024, 1, 1), date(2024, 1, 8), max_records=10,
+                         api_key="secret", limiter=limiter)
+    assert len(calls) > 1
+    assert all(call[2:] == ("secret", limiter) for call in calls)
+
+def test_partition_rejects_reversed_range():
+    with pytest.raises(ValueError):
+        partition_date_range("cancer", date(2024, 1, 2), date(2024, 1, 1))
+
+def test_iter_delta_ids_walks_windows(monkeypatch):
+    monkeypatch.setattr(delta, "partition_date_range", lambda query, start, end, **kwargs: [
+        {"mindate": "1900/01/01", "maxdate": "2000/01/01", "count": 1},
+        {"mindate": "2000/01/02", "maxdate": "2024/01/01", "count": 2},
+    ] if start == delta.DELTA_EPOCH else [])
+    pages = {"1900/01/01": ["1"], "2000/01/02": ["2", "3"]}
+    monkeypatch.setattr(delta, "iter_pubmed_ids", lambda query, mindate, **kwargs: iter(pages[mindate]))
+
+    assert list(iter_delta_ids("cancer", None, date(2024, 1, 1))) == ["1", "2", "3"]
+    assert list(iter_delta_ids("cancer", date(2024, 1, 1), date(2024, 1, 1))) == []
+
+def test_delta_state_round_trip(tmp_path):
+    path = str(tmp_path / "state" / "delta_state.json")
+    state = DeltaState(path)
+    assert state.last_run("cancer") is None
+
+    state.record("cancer", date(2024, 3, 1))
+    assert DeltaState(path).last_run("cancer") == date(2024, 3, 1)
+    assert DeltaState(path).last_run("diabetes") is None
@@ -1,8 +1,22 @@
 import os
 import csv
+import json
 import tempfile
 import pytest
-from get_papers.src.exporter import export_to_csv
+from get_papers.src.exporter import (
+    PaperWriter,
+    detect_format,
+    export_papers,
+    export_to_arrow,
+    export_to_csv,
+    export_to_jsonl,
+    export_to_parquet,
+    merge_papers,
+    open_writer,
+    read_papers,
+)
+from get_papers.src.metrics import disable_metrics, enable_metrics
+from get_papers.src.types import Paper
 
 SAMPLE_DATA = [
     {
@@ -11,7 +25,8 @@ SAMPLE_DATA = [
         "pub_date": "2023",
         "non_academic_authors": ["Alice Biotech", "Bob Pharma"],
         "company_affiliations": ["Genentech Inc.", "Pfizer Ltd"],
-        "corresponding_email": "alice@genentech.com"
+        "corresponding_email": "alice@genentech.com",
+        "companies": ["Genentech", "Pfizer"],
     },
     {
         "pubmed_id": "87654321",
@@ -19,7 +34,8 @@ SAMPLE_DATA = [
         "pub_date": "2022",
         "non_academic_authors": ["Dr. Zhang"],
         "company_affiliations": ["Moderna Therapeutics"],
-        "corresponding_email": "zhang@moderna.com"
+        "corresponding_email": "zhang@moderna.com",
+        "companies": ["Moderna"],
     }
 ]
 
@@ -53,3 +69,160 @@ def test_export_to_csv_file_permission_error(monkeypatch):
 
     with pytest.raises(IOError):
         export_to_csv(SAMPLE_DATA, "mock_output.csv")
+
+def test_export_to_csv_accepts_generator(tmp_path):
+    filename = tmp_path / "out.csv"
+    count = export_to_csv((paper for paper in SAMPLE_DATA), str(filename))
+
+    assert count == 2
+    rows = list(csv.DictReader(filename.open(encoding="utf-8")))
+    assert [row["PubmedID"] for row in rows] == ["12345678", "87654321"]
+    assert rows[0]["Non-academic Author(s)"] == "Alice Biotech; Bob Pharma"
+
+def test_write_batch_reports_metrics(tmp_path):
+    metrics = enable_metrics()
+    try:
+        with open_writer(str(tmp_path / "out.csv")) as writer:
+            writer.write_batch(SAMPLE_DATA[:1])
+            writer.write_batch(SAMPLE_DATA[1:])
+    finally:
+        disable_metrics()
+
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"]["rows_written"] == 2
+    assert snapshot["timers"]["export_batch"]["count"] == 2
+
+def test_read_papers_from_csv_without_company_names(tmp_path):
+    filename = tmp_path / "old.csv"
+    filename.write_text(
+        "PubmedID,Title,Publication Date,Non-academic Author(s),Company Affiliation(s),Corresponding Author Email\n"
+        "1,Paper 1,2020,Ann Lee,Pfizer Inc.,\n",
+        encoding="utf-8",
+    )
+    [paper] = read_papers(str(filename))
+    assert paper.company_affiliations == ("Pfizer Inc.",)
+    assert paper.companies == ()
+
+def test_export_to_csv_flushes_partial_output(tmp_path):
+    filename = tmp_path / "out.csv"
+    seen_on_disk = []
+
+    def papers():
+        for i in range(5):
+            # Rows from earlier chunks must already be on disk.
+            seen_on_disk.append(len(filename.read_text(encoding="utf-8").splitlines()) - 1)
+            yield dict(SAMPLE_DATA[0], pubmed_id=str(i))
+
+    assert export_to_csv(papers(), str(filename), flush_every=2) == 5
+    assert seen_on_disk == [0, 0, 2, 2, 4]
+
+def test_export_to_csv_does_not_mislabel_upstream_errors(tmp_path, capsys):
+    def papers():
+        yield SAMPLE_DATA[0]
+        raise ConnectionError("network dropped")
+
+    with pytest.raises(ConnectionError):
+        export_to_csv(papers(), str(tmp_path / "out.csv"))
+    assert "[File Error]" not in capsys.readouterr().out
+
+def test_export_to_jsonl_keeps_lists(tmp_path):
+    filename = tmp_path / "out.jsonl"
+    assert export_to_jsonl(iter(SAMPLE_DATA), str(filename)) == 2
+
+    records = [json.loads(line) for line in filename.read_text(encoding="utf-8").splitlines()]
+    assert records == SAMPLE_DATA
+
+@pytest.mark.parametrize("filename, expected", [
+    ("out.csv", "csv"),
+    ("out.JSONL", "jsonl"),
+    ("out.ndjson", "jsonl"),
+    ("out.parquet", "parquet"),
+    ("out.feather", "arrow"),
+    ("out.txt", "csv"),
+])
+def test_detect_format(filename, expected):
+    assert detect_format(filename) == expected
+
+def test_export_papers_picks_writer_from_extension(tmp_path):
+    filename = tmp_path / "out.jsonl"
+    export_papers(SAMPLE_DATA, str(filename))
+    assert json.loads(filename.read_text(encoding="utf-8").splitlines()[0])["pubmed_id"] == "12345678"
+
+def test_export_papers_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        export_papers(SAMPLE_DATA, str(tmp_path / "out.csv"), format="xlsx")
+
+def test_export_to_parquet_row_groups(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    filename = tmp_path / "out.parquet"
+    papers = [dict(SAMPLE_DATA[i % 2], pubmed_id=str(i)) for i in range(5)]
+
+    assert export_to_parquet(iter(papers), str(filename), row_group_size=2) == 5
+
+    parquet_file = pq.ParquetFile(str(filename))
+    assert parquet_file.metadata.num_row_groups == 3
+    table = parquet_file.read()
+    assert table.column("non_academic_authors").to_pylist()[0] == ["Alice Biotech", "Bob Pharma"]
+    assert table.to_pylist() == papers
+
+def test_export_to_arrow_round_trip(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    filename = tmp_path / "out.arrow"
+
+    assert export_to_arrow(SAMPLE_DATA, str(filename)) == 2
+    with pa.memory_map(str(filename)) as source:
+        table = pa.ipc.open_file(source).read_all()
+    assert table.to_pylist() == SAMPLE_DATA
+
+def test_csv_writer_append_keeps_single_header(tmp_path):
+    filename = str(tmp_path / "out.csv")
+    with open_writer(filename) as writer:
+        writer.write_batch(SAMPLE_DATA[:1])
+    with open_writer(filename, append=True) as writer:
+        writer.write_batch(SAMPLE_DATA[1:])
+        assert writer.tell() == os.path.getsize(filename)
+
+    rows = list(csv.DictReader(open(filename, encoding="utf-8")))
+    assert [row["PubmedID"] for row in rows] == ["12345678", "87654321"]
+
+def test_parquet_writer_cannot_append(tmp_path):
+    pytest.importorskip("pyarrow")
+    with pytest.raises(ValueError):
+        open_writer(str(tmp_path / "out.parquet"), append=True)
+
+def test_incomplete_writer_fails_on_instantiation(tmp_path):
+    class NoClose(PaperWriter):
+        @staticmethod
+        def read_papers(filename):
+            return iter(())
+
+        def _write(self, papers):
+            pass
+
+    with pytest.raises(TypeError):
+        NoClose(str(tmp_path / "out.txt"))
+
+@pytest.mark.parametrize("extension", ["csv", "jsonl"])
+def test_read_papers_round_trip(tmp_path, extension):
+    filename = str(tmp_path / f"out.{extension}")
+    papers = SAMPLE_DATA + [dict(SAMPLE_DATA[0], pubmed_id="1", non_academic_authors=[], corresponding_email=None)]
+    export_papers(papers, filename)
+    assert [paper.to_dict() for paper in read_papers(filename)] == papers
+
+def test_merge_papers_replaces_updated_rows(tmp_path):
+    filename = str(tmp_path / "out.csv")
+    export_to_csv(SAMPLE_DATA, filename)
+    updated = dict(SAMPLE_DATA[0], title="CRISPR and Genomics (Erratum)")
+    added = dict(SAMPLE_DATA[1], pubmed_id="11111111")
+
+    assert merge_papers(filename, [updated, added], {"12345678", "11111111", "99999999"}) == 3
+    merged = list(read_papers(filename))
+    assert [paper.pubmed_id for paper in merged] == ["87654321", "12345678", "11111111"]
+    assert merged[1].title == "CRISPR and Genomics (Erratum)"
+    assert not os.path.exists(filename + ".merging")
+
+def test_merge_papers_creates_missing_file(tmp_path):
+    filename = str(tmp_path / "out.parquet")
+    pytest.importorskip("pyarrow")
+    assert merge_papers(filename, SAMPLE_DATA, set()) == 2
+    assert list(read_papers(filename)) == [Paper.from_dict(paper) for paper in SAMPLE_DATA]
@@ -1,11 +1,24 @@
 import pytest
 from unittest.mock import patch, Mock
 from requests.exceptions import HTTPError, JSONDecodeError
-from get_papers.src.fetcher import fetch_pubmed_ids, fetch_pubmed_details
+from get_papers.src.cache import ArticleCache
+from get_papers.src.client import PubMedClient, get_default_client
+from get_papers.src.fetcher import (
+    count_pubmed_results,
+    fetch_pubmed_ids,
+    fetch_pubmed_details,
+    fetch_pubmed_details_by_history,
+    iter_history_details,
+    iter_pubmed_details,
+    iter_pubmed_ids,
+    search_pubmed_history,
+)
+from get_papers.src.metrics import disable_metrics, enable_metrics
+from get_papers.src.resilience import FetchPolicy
 
 ### ---------- fetch_pubmed_ids TESTS ---------- ###
 
-@patch("get_papers.fetcher.requests.get")
+@patch("get_papers.src.client.requests.Session.get")
 def test_fetch_pubmed_ids_success(mock_get):
     mock_resp = Mock()
     mock_resp.json.return_value = {
@@ -18,7 +31,7 @@ def test_fetch_pubmed_ids_success(mock_get):
     assert result == ["123", "456", "789"]
     mock_get.assert_called_once()
 
-@patch("get_papers.fetcher.requests.get")
+@patch("get_papers.src.client.requests.Session.get")
 def test_fetch_pubmed_ids_empty(mock_get):
     mock_resp = Mock()
     mock_resp.json.return_value = {
@@ -31,7 +44,7 @@ def test_fetch_pubmed_ids_empty(mock_get):
     assert result == []
     mock_get.assert_called_once()
 
-@patch("get_papers.fetcher.requests.get")
+@patch("get_papers.src.client.requests.Session.get")
 def test_fetch_pubmed_ids_http_error(mock_get):
     mock_resp = Mock()
     mock_resp.raise_for_status.side_effect = HTTPError("404 error")
@@ -40,7 +53,7 @@ def test_fetch_pubmed_ids_http_error(mock_get):
     with pytest.raises(HTTPError):
         fetch_pubmed_ids("errorcase")
 
-@patch("get_papers.fetcher.requests.get")
+@patch("get_papers.src.client.requests.Session.get")
 def test_fetch_pubmed_ids_invalid_json(mock_get):
     mock_resp = Mock()
     mock_resp.raise_for_status = Mock()
@@ -53,7 +66,7 @@ def test_fetch_pubmed_ids_invalid_json(mock_get):
 
 ### ---------- fetch_pubmed_details TESTS ---------- ###
 
-@patch("get_papers.fetcher.requests.get")
+@patch("get_papers.src.client.requests.Session.get")
 def test_fetch_pubmed_details_success(mock_get):
     sample_xml = "<PubmedArticleSet><PubmedArticle><PMID>123</PMID></PubmedArticle></PubmedArticleSet>"
     mock_resp = Mock()
@@ -65,7 +78,7 @@ def test_fetch_pubmed_details_success(mock_get):
     assert "<PMID>123</PMID>" in result
     mock_get.assert_called_once()
 
-@patch("get_papers.fetcher.requests.get")
+@patch("get_papers.src.client.requests.Session.get")
 def test_fetch_pubmed_details_http_error(mock_get):
     mock_resp = Mock()
     mock_resp.raise_for_status.side_effect = HTTPError("500 error")
@@ -74,13 +87,13 @@ def test_fetch_pubmed_details_http_error(mock_get):
     with pytest.raises(HTTPError):
         fetch_pubmed_details(["999"])
 
-@patch("get_papers.fetcher.requests.get")
+@patch("get_papers.src.client.requests.Session.get")
 def test_fetch_pubmed_details_empty_list(mock_get):
     result = fetch_pubmed_details([], debug=True)
     assert result == ""  # or handle empty input however you prefer
     mock_get.assert_not_called()
 
-@patch("get_papers.fetcher.requests.get")
+@patch("get_papers.src.client.requests.Session.get")
 def test_fetch_pubmed_details_many_ids(mock_get):
     mock_resp = Mock()
     mock_resp.text = "<xml>result</xml>"
@@ -93,3 +106,371 @@ def test_fetch_pubmed_details_many_ids(mock_get):
     assert "result" in result
     assert mock_get.call_count == 1  # or more if batching is implemented
 
+
+### ---------- history server TESTS ---------- ###
+
+def _esearch_response(result):
+    mock_resp = Mock()
+    mock_resp.json.return_value = {"esearchresult": result}
+    mock_resp.raise_for_status = Mock()
+    return mock_resp
+
+@patch("get_papers.src.client.requests.Session.get")
+def test_search_pubmed_history_returns_handle(mock_get):
+    mock_get.return_value = _esearch_response(
+        {"count": "250000", "webenv": "MCID_abc", "querykey": "1", "idlist": []}
+    )
+
+    history = search_pubmed_history("cancer AND 2022[dp]")
+    assert history == {"webenv": "MCID_abc", "query_key": "1", "count": 250000}
+    params = mock_get.call_args.kwargs["params"]
+    assert params["usehistory"] == "y"
+    assert params["retmax"] == 0
+
+@patch("get_papers.src.client.requests.Session.get")
+def test_search_pubmed_history_missing_webenv(mock_get):
+    mock_get.return_value = _esearch_response({"count": "0", "idlist": []})
+
+    with pytest.raises(ValueError):
+        search_pubmed_history("cancer")
+
+@patch("get_papers.src.client.requests.Session.get")
+def test_iter_pubmed_ids_walks_retstart(mock_get):
+    mock_get.side_effect = [
+        _esearch_response({"count": "5", "webenv": "MCID_abc", "querykey": "1", "idlist": ["1", "2"]}),
+        _esearch_response({"count": "5", "webenv": "MCID_abc", "querykey": "1", "idlist": ["3", "4"]}),
+        _esearch_response({"count": "5", "webenv": "MCID_abc", "querykey": "1", "idlist": ["5"]}),
+    ]
+
+    ids = iter_pubmed_ids("cancer", page_size=2)
+    assert not isinstance(ids, list)
+    assert list(ids) == ["1", "2", "3", "4", "5"]
+    assert mock_get.call_count == 3
+    retstarts = [call.kwargs["params"]["retstart"] for call in mock_get.call_args_list]
+    assert retstarts == [0, 2, 4]
+    assert mock_get.call_args_list[0].kwargs["params"]["term"] == "cancer"
+    # Later pages read the stored result set instead of re-running the query.
+    later = mock_get.call_args.kwargs["params"]
+    assert (later["term"], later["WebEnv"], later["query_key"]) == ("#1", "MCID_abc", "1")
+
+@patch("get_papers.src.client.requests.Session.get")
+def test_iter_pubmed_ids_respects_max_results(mock_get):
+    mock_get.return_value = _esearch_response(
+        {"count": "1000", "webenv": "MCID_abc", "querykey": "1", "idlist": ["1", "2", "3"]}
+    )
+
+    assert list(iter_pubmed_ids("cancer", page_size=10, max_results=3)) == ["1", "2", "3"]
+    assert mock_get.call_args.kwargs["params"]["retmax"] == 3
+    mock_get.assert_called_once()
+
+@patch("get_papers.src.client.requests.Session.get")
+def test_iter_pubmed_ids_warns_when_capped(mock_get, capsys):
+    mock_get.return_value = _esearch_response(
+        {"count": "25000", "webenv": "MCID_abc", "querykey": "1", "idlist": []}
+    )
+
+    list(iter_pubmed_ids("cancer"))
+    assert "only the first 10000" in capsys.readouterr().err
+
+    list(iter_pubmed_ids("cancer", max_results=50))
+    assert capsys.readouterr().err == ""
+
+@patch("get_papers.src.client.requests.Session.get")
+def test_count_pubmed_results_sends_date_window(mock_get):
+    mock_get.return_value = _esearch_response({"count": "42", "idlist": []})
+
+    assert count_pubmed_results("cancer", mindate="2024/01/01", maxdate="2024/01/31", datetype="mdat") == 42
+    params = mock_get.call_args.kwargs["params"]
+    assert (params["mindate"], params["maxdate"], params["datetype"]) == ("2024/01/01", "2024/01/31", "mdat")
+    assert params["retmax"] == 0
+
+@patch("get_papers.src.client.requests.Session.get")
+def test_esearch_helpers_send_api_key_and_share_limiter(mock_get):
+    mock_get.return_value = _esearch_response(
+        {"count": "1", "webenv": "MCID_abc", "querykey": "1", "idlist": ["1"]}
+    )
+    limiter = Mock()
+
+    fetch_pubmed_ids("cancer", api_key="secret", limiter=limiter)
+    count_pubmed_results("cancer", api_key="secret", limiter=limiter)
+    search_pubmed_history("cancer", api_key="secret", limiter=limiter)
+    list(iter_pubmed_ids("cancer", api_key="secret", limiter=limiter))
+
+    assert [call.kwargs["params"]["api_key"] for call in mock_get.call_args_list] == ["secret"] * 4
+    assert limiter.acquire.call_count == 4
+
+def test_count_pubmed_results_needs_both_dates():
+    with pytest.raises(ValueError):
+        count_pubmed_results("cancer", mindate="2024/01/01")
+
+@patch("get_papers.src.client.requests.Session.get")
+def test_fetch_pubmed_details_by_history(mock_get):
+    mock_resp = Mock()
+    mock_resp.text = "<PubmedArticleSet></PubmedArticleSet>"
+    mock_resp.raise_for_status = Mock()
+    mock_get.return_value = mock_resp
+
+    history = {"webenv": "MCID_abc", "query_key": "1", "count": 1200}
+    result = fetch_pubmed_details_by_history(history, retstart=500, retmax=500)
+    assert result == "<PubmedArticleSet></PubmedArticleSet>"
+    params = mock_get.call_args.kwargs["params"]
+    assert params["WebEnv"] == "MCID_abc"
+    assert params["query_key"] == "1"
+    assert params["retstart"] == 500
+    assert "id" not in params
+
+
+### ---------- batched EFetch TESTS ---------- ###
+
+def _efetch_echo(url, data=None, timeout=None):
+    mock_resp = Mock()
+    mock_resp.text = f"<batch>{data.get('id', data.get('retstart'))}</batch>"
+    mock_resp.raise_for_status = Mock()
+    return mock_resp
+
+@patch("get_papers.src.fetcher.TokenBucket.acquire")
+@patch("get_papers.src.client.requests.Session.post")
+def test_iter_pubmed_details_batches_in_order(mock_post, mock_acquire):
+    mock_post.side_effect = _efetch_echo
+
+    ids = (str(i) for i in range(7))
+    results = list(iter_pubmed_details(ids, batch_size=3, concurrency=2))
+
+    assert results == ["<batch>0,1,2</batch>", "<batch>3,4,5</batch>", "<batch>6</batch>"]
+    assert mock_post.call_count == 3
+    assert mock_acquire.call_count == 3
+
+@patch("get_papers.src.fetcher.TokenBucket.acquire")
+@patch("get_papers.src.client.requests.Session.post")
+def test_iter_pubmed_details_passes_api_key(mock_post, mock_acquire):
+    mock_post.side_effect = _efetch_echo
+
+    list(iter_pubmed_details(["1"], api_key="secret"))
+    assert mock_post.call_args.kwargs["data"]["api_key"] == "secret"
+
+@patch("get_papers.src.fetcher.TokenBucket.acquire")
+@patch("get_papers.src.client.requests.Session.post")
+def test_iter_pubmed_details_empty(mock_post, mock_acquire):
+    assert list(iter_pubmed_details([])) == []
+    mock_post.assert_not_called()
+
+@patch("get_papers.src.fetcher.TokenBucket.acquire")
+@patch("get_papers.src.client.requests.Session.post")
+def test_iter_pubmed_details_http_error(mock_post, mock_acquire):
+    mock_resp = Mock()
+    mock_resp.raise_for_status.side_effect = HTTPError("500 error")
+    mock_post.return_value = mock_resp
+
+    with pytest.raises(HTTPError):
+        list(iter_pubmed_details(["1", "2"], batch_size=1))
+
+def test_iter_pubmed_details_rejects_bad_batch_size():
+    with pytest.raises(ValueError):
+        list(iter_pubmed_details(["1"], batch_size=0))
+
+@patch("get_papers.src.fetcher.TokenBucket.acquire")
+@patch("get_papers.src.client.requests.Session.post")
+def test_iter_history_details_windows(mock_post, mock_acquire):
+    mock_post.side_effect = _efetch_echo
+
+    history = {"webenv": "MCID_abc", "query_key": "1", "count": 450}
+    results = list(iter_history_details(history, batch_size=200))
+
+    assert results == ["<batch>0</batch>", "<batch>200</batch>", "<batch>400</batch>"]
+    assert all(call.kwargs["data"]["WebEnv"] == "MCID_abc" for call in mock_post.call_args_list)
+
+@patch("get_papers.src.fetcher.TokenBucket.acquire")
+@patch("get_papers.src.client.requests.Session.post")
+def test_iter_pubmed_details_serves_cached_articles(mock_post, mock_acquire, tmp_path):
+    cache = ArticleCache(str(tmp_path))
+    cache.put_many({"1": "<PubmedArticle><MedlineCitation><PMID>1</PMID></MedlineCitation></PubmedArticle>"})
+
+    mock_resp = Mock()
+    mock_resp.text = (
+        "<PubmedArticleSet><PubmedArticle><MedlineCitation><PMID>2</PMID>"
+        "</MedlineCitation></PubmedArticle></PubmedArticleSet>"
+    )
+    mock_resp.raise_for_status = Mock()
+    mock_post.return_value = mock_resp
+
+    [xml_data] = list(iter_pubmed_details(["1", "2"], cache=cache))
+
+    assert mock_post.call_args.kwargs["data"]["id"] == "2"
+    assert xml_data.index("<PMID>1</PMID>") < xml_data.index("<PMID>2</PMID>")
+    assert set(cache.get_many(["1", "2"])) == {"1", "2"}
+
+    # A second run is served entirely from disk.
+    mock_post.reset_mock()
+    list(iter_pubmed_details(["1", "2"], cache=cache))
+    mock_post.assert_not_called()
+    cache.close()
+
+@patch("get_papers.src.fetcher.TokenBucket.acquire")
+@patch("get_papers.src.client.requests.Session.post")
+def test_iter_pubmed_details_counts_cache_hits(mock_post, mock_acquire, tmp_path):
+    cache = ArticleCache(str(tmp_path))
+    cache.put_many({"1": "<PubmedArticle><MedlineCitation><PMID>1</PMID></MedlineCitation></PubmedArticle>"})
+    mock_post.return_value = Mock(text="<PubmedArticleSet></PubmedArticleSet>", status_code=200, content=b"", raw=None)
+
+    metrics = enable_metrics()
+    try:
+        list(iter_pubmed_details(["1", "2", "3"], cache=cache))
+    finally:
+        disable_metrics()
+    cache.close()
+
+    counters = metrics.snapshot()["counters"]
+    assert counters["cache_hits"] == 1
+    assert counters["cache_misses"] == 2
+    assert counters["http_requests"] == 1
+
+def _efetch_failing(status, failing):
+    def post(url, data=None, timeout=None):
+        if data.get("id", data.get("retstart")) in failing:
+            mock_resp = Mock()
+            mock_resp.raise_for_status.side_effect = HTTPError(
+                f"{status} error", response=Mock(status_code=status, headers={})
+            )
+            return mock_resp
+        return _efetch_echo(url, data=data, timeout=timeout)
+    return post
+
+@patch("get_papers.src.fetcher.TokenBucket.acquire")
+@patch("get_papers.src.client.requests.Session.post")
+def test_iter_pubmed_details_retries_with_policy(mock_post, mock_acquire):
+    failing = {"2"}
+    sleep = Mock(side_effect=lambda _: failing.clear())
+    mock_post.side_effect = _efetch_failing(429, failing)
+
+    policy = FetchPolicy(sleep=sleep, rng=lambda: 0.5)
+    results = list(iter_pubmed_details(["1", "2", "3"], batch_size=1, concurrency=1, policy=policy))
+
+    assert results == ["<batch>1</batch>", "<batch>2</batch>", "<batch>3</batch>"]
+    sleep.assert_called_once()
+    assert not policy.quarantine
+
+@patch("get_papers.src.fetcher.TokenBucket.acquire")
+@patch("get_papers.src.client.requests.Session.post")
+def test_iter_pubmed_details_quarantines_failed_batch(mock_post, mock_acquire):
+    mock_post.side_effect = _efetch_failing(503, {"2"})
+
+    policy = FetchPolicy(max_attempts=2, sleep=Mock(), rng=lambda: 0.0)
+    results = list(iter_pubmed_details(["1", "2", "3"], batch_size=1, concurrency=1, policy=policy))
+
+    assert results == ["<batch>1</batch>", "<batch>3</batch>"]
+    assert policy.quarantine.pmids() == ["2"]
+    assert ["2"] in policy.quarantine
+
+@patch("get_papers.src.fetcher.TokenBucket.acquire")
+@patch("get_papers.src.client.requests.Session.post")
+def test_iter_pubmed_details_does_not_retry_client_errors(mock_post, mock_acquire):
+    mock_post.side_effect = _efetch_failing(400, {"1"})
+    sleep = Mock()
+
+    policy = FetchPolicy(sleep=sleep)
+    assert list(iter_pubmed_details(["1"], policy=policy)) == []
+    assert mock_post.call_count == 1
+    sleep.assert_not_called()
+
+@patch("get_papers.src.fetcher.TokenBucket.acquire")
+@patch("get_papers.src.client.requests.Session.post")
+def test_iter_pubmed_details_splits_batches_when_throttled(mock_post, mock_acquire):
+    def post(url, data=None, timeout=None):
+        articles = "".join(f"<PubmedArticle>{pmid}</PubmedArticle>" for pmid in data["id"].split(","))
+        return Mock(text=f"<PubmedArticleSet>{articles}</PubmedArticleSet>", raise_for_status=Mock())
+    mock_post.side_effect = post
+
+    policy = FetchPolicy()
+    policy.start(concurrency=1, request_size=4).request_size = 2
+    [xml_data] = list(iter_pubmed_details(["1", "2", "3", "4"], batch_size=4, concurrency=1, policy=policy))
+
+    assert [call.kwargs["data"]["id"] for call in mock_post.call_args_list] == ["1,2", "3,4"]
+    assert xml_data.count("<PubmedArticle>") == 4
+
+@patch("get_papers.src.fetcher.TokenBucket.acquire")
+@patch("get_papers.src.client.requests.Session.post")
+def test_iter_history_details_quarantines_window(mock_post, mock_acquire):
+    mock_post.side_effect = _efetch_failing(502, {200})
+
+    history = {"webenv": "MCID_abc", "query_key": "1", "count": 450}
+    policy = FetchPolicy(max_attempts=1)
+    results = list(iter_history_details(history, batch_size=200, concurrency=1, policy=policy))
+
+    assert results == ["<batch>0</batch>", "<batch>400</batch>"]
+    assert 200 in policy.quarantine
+
+@patch("get_papers.src.fetcher.TokenBucket.acquire")
+@patch("get_papers.src.client.requests.Session.post")
+def test_iter_pubmed_details_quarantines_malformed_body(mock_post, mock_acquire):
+    def post(url, data=None, timeout=None):
+        if data["id"] == "3,4":
+            return Mock(text="<PubmedArticleSet><PubmedArticle>3", raise_for_status=Mock())
+        articles = "".join(f"<PubmedArticle>{pmid}</PubmedArticle>" for pmid in data["id"].split(","))
+        return Mock(text=f"<PubmedArticleSet>{articles}</PubmedArticleSet>", raise_for_status=Mock())
+    mock_post.side_effect = post
+
+    policy = FetchPolicy(max_attempts=2, sleep=Mock())
+    policy.start(concurrency=1, request_size=4).request_size = 2
+    ids = ["1", "2", "3", "4", "5", "6"]
+    results = list(iter_pubmed_details(ids, batch_size=4, concurrency=1, policy=policy))
+
+    # The first batch's second half never parses; the run goes on without it.
+    assert policy.quarantine.pmids() == ["1", "2", "3", "4"]
+    assert [call.kwargs["data"]["id"] for call in mock_post.call_args_list].count("3,4") == 2
+    assert len(results) == 1 and results[0].count("<PubmedArticle>") == 2
+
+def _efetch_truncated(failing):
+    def post(url, data=None, timeout=None):
+        if data.get("id", data.get("retstart")) in failing:
+            return Mock(text="<PubmedArticleSet><PubmedArticle>", raise_for_status=Mock())
+        return _efetch_echo(url, data=data, timeout=timeout)
+    return post
+
+@patch("get_papers.src.fetcher.TokenBucket.acquire")
+@patch("get_papers.src.client.requests.Session.post")
+def test_iter_pubmed_details_refetches_truncated_body_without_cache(mock_post, mock_acquire):
+    failing = {"2"}
+    sleep = Mock(side_effect=lambda _: failing.clear())
+    mock_post.side_effect = _efetch_truncated(failing)
+
+    policy = FetchPolicy(sleep=sleep, rng=lambda: 0.0)
+    results = list(iter_pubmed_details(["1", "2", "3"], batch_size=1, concurrency=1, policy=policy))
+
+    assert results == ["<batch>1</batch>", "<batch>2</batch>", "<batch>3</batch>"]
+    sleep.assert_called_once()
+    assert not policy.quarantine
+
+@patch("get_papers.src.fetcher.TokenBucket.acquire")
+@patch("get_papers.src.client.requests.Session.post")
+def test_iter_history_details_quarantines_truncated_body(mock_post, mock_acquire):
+    mock_post.side_effect = _efetch_truncated({200})
+
+    history = {"webenv": "MCID_abc", "query_key": "1", "count": 450}
+    policy = FetchPolicy(max_attempts=2, sleep=Mock())
+    results = list(iter_history_details(history, batch_size=200, concurrency=1, policy=policy))
+
+    assert results == ["<batch>0</batch>", "<batch>400</batch>"]
+    # Sub-windows stop at the end of the result set.
+    assert mock_post.call_args.kwargs["data"]["retmax"] == 50
+    assert 200 in policy.quarantine
+    assert "no element found" in policy.quarantine.batches[0]["error"]
+
+@patch("get_papers.src.fetcher.TokenBucket.acquire")
+@patch("get_papers.src.client.requests.Session.post")
+def test_streams_leave_the_default_client_open(mock_post, mock_acquire):
+    mock_post.side_effect = _efetch_echo
+    shared = get_default_client()
+    history = {"webenv": "MCID_abc", "query_key": "1", "count": 2}
+
+    with patch.object(PubMedClient, "close") as close:
+        list(iter_pubmed_details(["1", "2"], batch_size=1))
+        list(iter_history_details(history, batch_size=1))
+        close.assert_not_called()
+
+        # A client created for a policy is closed with its stream.
+        list(iter_pubmed_details(["1"], policy=FetchPolicy()))
+        list(iter_history_details(history, batch_size=1, policy=FetchPolicy()))
+        assert close.call_count == 2
+
+    assert get_default_client() is shared
+    assert get_default_client().post("https://example.org", data={"id": "9"}).text == "<batch>9</batch>"
@@ -1,5 +1,26 @@
+import json
+import os
+import re
 import pytest
-from get_papers.src.filters import is_non_academic, is_company_affiliation
+from get_papers.src.filters import (
+    DEFAULT_AFFILIATION_CACHE_SIZE,
+    DEFAULT_DICTIONARY,
+    AffiliationClassifier,
+    AffiliationVerdict,
+    _trie_pattern,
+    affiliation_cache_stats,
+    canonical_companies,
+    classify_affiliation,
+    classify_affiliations,
+    configure_affiliation_cache,
+    extract_email,
+    get_affiliation_dictionary,
+    is_company_affiliation,
+    is_non_academic,
+    load_dictionary,
+    reload_affiliation_dictionary,
+    set_affiliation_dictionary,
+)
 
 @pytest.mark.parametrize("affiliation, expected", [
     # Clearly academic
@@ -81,3 +102,218 @@ def test_is_non_academic(affiliation, expected):
 def test_is_company_affiliation(affiliation, expected):
     result = is_company_affiliation(affiliation)
     assert result == expected, f"is_company_affiliation failed for: '{affiliation}'"
+
+
+@pytest.mark.parametrize("affiliation, expected", [
+    ("Princeton University", (True, False)),
+    ("Lincoln Biotech", (False, True)),
+    ("Zinc Materials Lab", (False, False)),
+    ("Acme Inc.", (False, True)),
+    ("Biocenter Oulu", (True, False)),
+    ("Pfizer Inc., Department of Oncology", (True, True)),
+    ("", (False, False)),
+])
+def test_classify_affiliation_single_pass(affiliation, expected):
+    assert tuple(classify_affiliation(affiliation)) == expected
+
+BULK_AFFILIATIONS = [
+    "Princeton University", "Lincoln Biotech", "Zinc Materials Lab", "Acme Inc.", "Biocenter Oulu",
+    "Pfizer Inc., Department of Oncology", "", None, "PRINCETON   university", "Acme Inc.", "Incheon ltd",
+]
+
+def _row_verdicts(affiliations):
+    return [tuple(classify_affiliation(affiliation or "")) for affiliation in affiliations]
+
+def test_classify_affiliations_matches_per_row_verdicts():
+    masks = classify_affiliations(BULK_AFFILIATIONS)
+    assert list(zip(masks.is_academic, masks.is_company)) == _row_verdicts(BULK_AFFILIATIONS)
+    # Any iterable works, and each mask has one entry per row.
+    assert classify_affiliations(iter(["Moderna", "Moderna"])) == ([False, False], [True, True])
+    assert classify_affiliations([]) == ([], [])
+
+def test_classify_many_scans_each_distinct_affiliation_once(monkeypatch):
+    classifier = AffiliationClassifier(cache_size=0)
+    scanned = []
+    scan_many = classifier._scan_many
+    monkeypatch.setattr(classifier, "_scan_many", lambda values: scanned.extend(values) or scan_many(values))
+
+    masks = classifier.classify_many(["Acme Inc.", "Harvard University", "Acme Inc.", None, None])
+    assert scanned == ["Acme Inc.", "Harvard University", None]
+    assert masks.is_company == [True, False, True, False, False]
+    assert classifier.cache_stats()["misses"] == 0
+
+def test_classify_many_numpy_column():
+    np = pytest.importorskip("numpy")
+    column = np.array(BULK_AFFILIATIONS, dtype=object).reshape(1, -1)
+    masks = classify_affiliations(column)
+    assert masks.is_academic.dtype == bool and masks.is_academic.shape == column.shape
+    assert list(zip(masks.is_academic[0].tolist(), masks.is_company[0].tolist())) == _row_verdicts(BULK_AFFILIATIONS)
+
+def test_classify_many_arrow_column():
+    pa = pytest.importorskip("pyarrow")
+    column = pa.chunked_array([BULK_AFFILIATIONS[:5], BULK_AFFILIATIONS[5:]], type=pa.string())
+    masks = classify_affiliations(column)
+    assert masks.is_academic.type == pa.bool_()
+    assert list(zip(masks.is_academic.to_pylist(), masks.is_company.to_pylist())) == _row_verdicts(BULK_AFFILIATIONS)
+
+def test_custom_classifier_keywords():
+    classifier = AffiliationClassifier(academic_keywords=["academy"], company_keywords=["acme"])
+    assert classifier.classify("ACME Academy") == AffiliationVerdict(is_academic=True, is_company=True)
+    assert classifier.classify("Harvard University") == AffiliationVerdict(False, False)
+
+
+def test_classifier_memoizes_normalized_affiliations():
+    classifier = AffiliationClassifier(cache_size=4)
+
+    first = classifier.classify("Pfizer Inc.,  New York")
+    again = classifier.classify("PFIZER INC., New   York")
+    stats = classifier.cache_stats()
+
+    assert first == again == AffiliationVerdict(is_academic=False, is_company=True)
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+def test_classifier_cache_is_bounded():
+    classifier = AffiliationClassifier(cache_size=2)
+    for affiliation in ["Acme Inc", "Harvard University", "Moderna", "Acme Inc"]:
+        classifier.classify(affiliation)
+
+    stats = classifier.cache_stats()
+    assert stats["size"] == 2
+    assert stats["misses"] == 4  # "Acme Inc" was evicted before it came back
+
+def test_classifier_cache_can_be_disabled():
+    classifier = AffiliationClassifier(cache_size=0)
+    classifier.classify("Pfizer Inc.")
+    classifier.classify("Pfizer Inc.")
+    assert classifier.cache_stats()["hits"] == 0
+
+@pytest.mark.parametrize("affiliation, expected", [
+    ("Genentech Inc., CA, USA. John.Doe@genentech.com", "John.Doe@genentech.com"),
+    ("Pfizer (contact: a@pfizer.com; b@pfizer.com)", "a@pfizer.com"),
+    ("Harvard University", None),
+    ("", None),
+    (None, None),
+])
+def test_extract_email(affiliation, expected):
+    assert extract_email(affiliation) == expected
+
+def test_configure_affiliation_cache_resets_stats():
+    configure_affiliation_cache(8)
+    is_company_affiliation("Pfizer Inc.")
+    is_non_academic("Pfizer Inc.")
+    extract_email("Pfizer Inc. a@pfizer.com")
+
+    stats = affiliation_cache_stats()
+    assert stats["classification"]["maxsize"] == 8
+    assert (stats["classification"]["hits"], stats["classification"]["misses"]) == (1, 1)
+    assert stats["email"]["misses"] == 1
+
+    configure_affiliation_cache(DEFAULT_AFFILIATION_CACHE_SIZE)
+    assert affiliation_cache_stats()["classification"]["size"] == 0
+
+def test_trie_pattern_prefers_the_longest_word():
+    assert _trie_pattern(["pfizer", "pharma", "pharmacia"]) == "p(?:fizer|harma(?:cia)?)"
+    pattern = re.compile("(?=(" + _trie_pattern(["pharma", "pharmacia", "ma"]) + "))")
+    assert [m.group(1) for m in pattern.finditer("pharmacia ma")] == ["pharmacia", "ma", "ma"]
+
+@pytest.mark.parametrize("affiliation", [
+    "Pfizer Inc., Department of Oncology", "Princeton University", "BioGenomics Ltd",
+    "Biocenter Oulu", "Zinc Materials Lab", "Centre for Immunology", "Acme Inc.",
+])
+def test_trie_classifier_matches_keyword_search(affiliation):
+    normalized = affiliation.lower()
+    words = set(re.findall(r"[a-z]+", normalized))
+    is_academic = any(word in normalized for word in DEFAULT_DICTIONARY["academic"])
+    aliases = [alias for names in DEFAULT_DICTIONARY["companies"].values() for alias in names]
+    is_company = any(
+        (word in words) if word in DEFAULT_DICTIONARY["whole_word"] else (word in normalized)
+        for word in DEFAULT_DICTIONARY["company_indicators"] + aliases
+    )
+    assert classify_affiliation(affiliation) == AffiliationVerdict(is_academic, is_company)
+
+def test_canonical_companies_for_known_companies():
+    assert canonical_companies("Genentech Inc., a member of the Roche Group") == ("Genentech", "Roche")
+    assert canonical_companies("Acme Inc.") == ()
+    assert canonical_companies("") == ()
+
+def test_classifier_from_dictionary_maps_aliases_to_canonical_names():
+    classifier = AffiliationClassifier.from_dictionary({
+        "academic": ["university"],
+        "company_indicators": [],
+        "whole_word": ["msd"],
+        "companies": {"Merck & Co.": ["msd", "merck sharp & dohme"], "Moderna": ["modernatx"]},
+    })
+
+    assert classifier.company_names("MSD, Rahway, NJ") == ("Merck & Co.",)
+    assert classifier.company_names("Merck Sharp &  Dohme LLC") == ("Merck & Co.",)
+    assert classifier.company_names("ModernaTX, Inc. and MSD") == ("Moderna", "Merck & Co.")
+    assert classifier.company_names("Amsden University") == ()  # "msd" only as a whole word
+    assert classifier.classify("Moderna, Cambridge") == AffiliationVerdict(False, True)
+
+@pytest.fixture
+def restore_dictionary():
+    yield
+    set_affiliation_dictionary(None)
+
+def _write_dictionary(path, companies, mtime=None):
+    path.write_text(json.dumps({"companies": companies}), encoding="utf-8")
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+
+def test_load_dictionary_keeps_omitted_sections(tmp_path):
+    path = tmp_path / "dictionary.json"
+    _write_dictionary(path, {"Acme": ["acme labs"]})
+
+    dictionary = load_dictionary(str(path))
+    assert dictionary["companies"] == {"Acme": ["acme labs"]}
+    assert dictionary["academic"] == DEFAULT_DICTIONARY["academic"]
+
+@pytest.mark.parametrize("content", ['["acme"]', '{"academic": "university"}', '{"companies": {"Acme": "acme"}}', "{"])
+def test_load_dictionary_rejects_malformed_files(tmp_path, content):
+    path = tmp_path / "dictionary.json"
+    path.write_text(content, encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_dictionary(str(path))
+
+def test_load_dictionary_from_package_resource(tmp_path, monkeypatch):
+    package = tmp_path / "labdicts"
+    package.mkdir()
+    (package / "__init__.py").write_text("", encoding="utf-8")
+    _write_dictionary(package / "companies.json", {"Acme": ["acme labs"]})
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    assert load_dictionary("labdicts:companies.json")["companies"] == {"Acme": ["acme labs"]}
+
+def test_set_and_hot_reload_dictionary(tmp_path, restore_dictionary):
+    path = tmp_path / "dictionary.json"
+    _write_dictionary(path, {"Acme": ["acme labs"]}, mtime=1_000_000_000)
+
+    set_affiliation_dictionary(str(path))
+    assert get_affiliation_dictionary() == str(path)
+    assert canonical_companies("Acme Labs, Springfield") == ("Acme",)
+    assert canonical_companies("Pfizer Inc.") == ()
+    assert not reload_affiliation_dictionary()
+
+    _write_dictionary(path, {"Acme Corp": ["acme labs"]}, mtime=2_000_000_000)
+    assert reload_affiliation_dictionary()
+    assert canonical_companies("Acme Labs, Springfield") == ("Acme Corp",)
+
+    # A broken edit keeps the last good dictionary.
+    path.write_text("{", encoding="utf-8")
+    os.utime(path, ns=(3_000_000_000, 3_000_000_000))
+    assert not reload_affiliation_dictionary()
+    assert canonical_companies("Acme Labs, Springfield") == ("Acme Corp",)
+
+    set_affiliation_dictionary(None)
+    assert canonical_companies("Pfizer Inc.") == ("Pfizer",)
+
+def test_set_dictionary_keeps_configured_cache_size(tmp_path, restore_dictionary):
+    path = tmp_path / "dictionary.json"
+    _write_dictionary(path, {"Acme": []})
+    configure_affiliation_cache(8)
+    try:
+        set_affiliation_dictionary(str(path))
+        assert affiliation_cache_stats()["classification"]["maxsize"] == 8
+    finally:
+        configure_affiliation_cache(DEFAULT_AFFILIATION_CACHE_SIZE)
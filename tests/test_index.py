@@ -0,0 +1,85 @@
+import pytest
+from get_papers.src.index import PaperIndex
+from get_papers.src.parser import parse_pubmed_xml
+
+
+def _article(pmid, title, year, authors):
+    author_xml = "".join(
+        f"<Author><ForeName>{name}</ForeName><LastName>Lee</LastName>"
+        + "".join(f"<AffiliationInfo><Affiliation>{aff}</Affiliation></AffiliationInfo>" for aff in affs)
+        + "</Author>"
+        for name, affs in authors
+    )
+    return f"""
+  <PubmedArticle><MedlineCitation><PMID>{pmid}</PMID><Article>
+    <Journal><JournalIssue><PubDate><Year>{year}</Year></PubDate></JournalIssue></Journal>
+    <ArticleTitle>{title}</ArticleTitle>
+    <AuthorList>{author_xml}</AuthorList>
+  </Article></MedlineCitation></PubmedArticle>"""
+
+XML = "<PubmedArticleSet>" + "".join([
+    _article(1, "mRNA vaccine durability", 2023, [
+        ("Ann", ["Moderna Therapeutics, Cambridge, MA. ann@modernatx.com"]),
+        ("Bo", ["Harvard University", "Broad Institute"]),
+    ]),
+    _article(2, "mRNA delivery with lipid nanoparticles", 2021, [("Cy", ["Moderna Inc."])]),
+    _article(3, "Protein folding in yeast", 2023, [("Di", ["Stanford University"])]),
+    _article(4, "mRNA stability in plants", 2023, [("Ed", ["Pfizer Inc."])]),
+]) + "</PubmedArticleSet>"
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = PaperIndex(str(tmp_path / "papers.sqlite3"))
+    assert index.add_xml(XML) == 4
+    yield index
+    index.close()
+
+
+def test_index_keeps_every_author_and_affiliation(index):
+    assert len(index) == 4
+    record = index.get("1")
+    assert record["pub_date"] == "2023"
+    assert record["authors"] == [
+        {"name": "Ann Lee", "affiliations": ["Moderna Therapeutics, Cambridge, MA. ann@modernatx.com"]},
+        {"name": "Bo Lee", "affiliations": ["Harvard University", "Broad Institute"]},
+    ]
+    # Academic-only papers are indexed too.
+    assert index.get("3")["authors"][0]["affiliations"] == ["Stanford University"]
+    assert index.get("99") is None
+
+def test_index_search_combines_title_company_and_year(index):
+    def pmids(**filters):
+        return [record["pubmed_id"] for record in index.search(**filters)]
+
+    assert pmids(title="mRNA", company="Moderna", min_year=2023, max_year=2023) == ["1"]
+    assert pmids(title="mRNA") == ["1", "2", "4"]
+    assert pmids(company="Moderna") == ["1", "2"]
+    assert pmids(min_year=2023) == ["1", "3", "4"]
+    assert pmids(author="Di Lee") == ["3"]
+    assert pmids(title="mrna NOT plants", limit=1) == ["1"]
+    assert pmids(non_academic_only=True) == ["1", "2", "4"]
+
+def test_index_company_filter_is_a_literal_phrase(index):
+    assert index.search(company='Moderna" OR "Pfizer') == []
+
+def test_index_search_papers_match_parse_pubmed_xml(index):
+    assert index.search_papers() == parse_pubmed_xml(XML)
+    [paper] = index.search_papers(title="mRNA", company="Moderna", min_year=2023)
+    assert paper.pubmed_id == "1"
+    assert paper.corresponding_email == "ann@modernatx.com"
+
+def test_index_replaces_reingested_pmids(index):
+    index.add_xml("<PubmedArticleSet>" + _article(1, "Retitled", 2024, [("Ann", ["MIT"])]) + "</PubmedArticleSet>")
+
+    assert len(index) == 4
+    assert index.get("1")["title"] == "Retitled"
+    assert [record["pubmed_id"] for record in index.search(title="mRNA")] == ["2", "4"]
+    assert index.search(company="Moderna", min_year=2023) == []
+
+def test_index_persists_between_sessions(tmp_path):
+    path = str(tmp_path / "papers.sqlite3")
+    with PaperIndex(path) as index:
+        index.add_xml(XML)
+    with PaperIndex(path) as index:
+        assert [record["pubmed_id"] for record in index.search(company="Pfizer")] == ["4"]
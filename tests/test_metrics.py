@@ -0,0 +1,95 @@
+import gzip
+import io
+import json
+from unittest.mock import Mock, patch
+import pytest
+from get_papers.src.client import PubMedClient, _body_size
+from get_papers.src.metrics import Metrics, active_metrics, disable_metrics, enable_metrics
+
+
+@pytest.fixture
+def metrics():
+    yield enable_metrics()
+    disable_metrics()
+
+
+def test_metrics_are_disabled_by_default():
+    assert active_metrics() is None
+
+def test_metrics_count_and_time():
+    metrics = Metrics()
+    metrics.incr("rows_written", 3)
+    metrics.incr("rows_written")
+    metrics.observe("parse_batch", 0.5)
+    metrics.observe("parse_batch", 1.5)
+    with metrics.timer("export_batch"):
+        pass
+
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"] == {"rows_written": 4}
+    assert snapshot["timers"]["parse_batch"] == {"count": 2, "total": 2.0, "max": 1.5}
+    assert snapshot["timers"]["export_batch"]["count"] == 1
+
+def test_metrics_merge_worker_snapshot():
+    metrics = Metrics()
+    metrics.incr("articles_parsed", 2)
+    metrics.observe("parse_batch", 1.0)
+
+    worker = Metrics()
+    worker.incr("articles_parsed", 5)
+    worker.incr("papers_kept", 1)
+    worker.observe("parse_batch", 3.0)
+    metrics.merge(worker.snapshot())
+
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"] == {"articles_parsed": 7, "papers_kept": 1}
+    assert snapshot["timers"]["parse_batch"] == {"count": 2, "total": 4.0, "max": 3.0}
+
+def test_metrics_render_json_and_prometheus():
+    metrics = Metrics()
+    metrics.incr("http_requests", 2)
+    metrics.observe("http_request", 0.25)
+
+    assert json.loads(metrics.to_json())["counters"] == {"http_requests": 2}
+    text = metrics.to_prometheus()
+    assert "# TYPE get_papers_http_requests_total counter" in text
+    assert "get_papers_http_requests_total 2" in text
+    assert "get_papers_http_request_seconds_count 1" in text
+    assert "get_papers_http_request_seconds_sum 0.250000" in text
+    assert "get_papers_http_request_seconds_max 0.250000" in text
+
+@patch("get_papers.src.client.requests.Session.get")
+def test_client_records_requests(mock_get, metrics):
+    mock_get.return_value = Mock(status_code=429, content=b"{}", raw=None)
+    with PubMedClient() as client:
+        client.get("https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi")
+
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"] == {"http_errors": 1, "http_requests": 1, "response_bytes": 2}
+    assert snapshot["timers"]["esearch_request"]["count"] == 1
+    assert snapshot["timers"]["http_request"]["count"] == 1
+
+def _gzip_response(body, headers):
+    import requests
+    import urllib3
+
+    raw = urllib3.HTTPResponse(
+        body=io.BytesIO(gzip.compress(body)), headers=headers, status=200, preload_content=False
+    )
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = raw
+    response.headers = requests.structures.CaseInsensitiveDict(raw.headers)
+    return response
+
+def test_body_size_counts_compressed_bytes():
+    body = b"<PubmedArticleSet>" + b"<PubmedArticle/>" * 500 + b"</PubmedArticleSet>"
+    wire = len(gzip.compress(body))
+
+    # Chunked responses have no Content-Length; the raw stream's count is used.
+    response = _gzip_response(body, {"Content-Encoding": "gzip"})
+    assert _body_size(response) == wire
+    assert response.content == body
+
+    response = _gzip_response(body, {"Content-Encoding": "gzip", "Content-Length": str(wire)})
+    assert _body_size(response) == wire
@@ -1,5 +1,23 @@
+import io
 import pytest
-from get_papers.src.parser import parse_pubmed_xml
+from get_papers.src import parser as parser_module
+from get_papers.src.metrics import disable_metrics, enable_metrics
+from get_papers.src.parser import (
+    XML_BACKENDS,
+    iter_parse_pubmed_xml,
+    paper_from_record,
+    parse_pubmed_records,
+    parse_pubmed_xml,
+)
+
+
+@pytest.fixture(autouse=True, params=XML_BACKENDS)
+def xml_backend(request, monkeypatch):
+    """Runs every parser test against each XML backend."""
+    if request.param == "lxml":
+        pytest.importorskip("lxml")
+    monkeypatch.setattr(parser_module, "_backend", request.param)
+    return request.param
 
 MINIMAL_XML = """
 <PubmedArticleSet>
@@ -38,12 +56,13 @@ def test_parse_single_paper_with_company_affiliation():
     assert len(results) == 1
 
     paper = results[0]
-    assert paper["pubmed_id"] == "12345678"
-    assert paper["title"] == "Test Paper Title"
-    assert paper["pub_date"] == "2023"
-    assert "John Doe" in paper["non_academic_authors"]
-    assert any("genentech" in aff.lower() for aff in paper["company_affiliations"])
-    assert paper["corresponding_email"] == "john.doe@genentech.com"
+    assert paper.pubmed_id == "12345678"
+    assert paper.title == "Test Paper Title"
+    assert paper.pub_date == "2023"
+    assert "John Doe" in paper.non_academic_authors
+    assert any("genentech" in aff.lower() for aff in paper.company_affiliations)
+    assert paper.companies == ("Genentech",)
+    assert paper.corresponding_email == "john.doe@genentech.com"
 
 def test_parse_paper_with_only_academic_authors():
     xml = MINIMAL_XML.replace("Genentech Inc.", "Harvard University").replace("john.doe@genentech.com", "")
@@ -53,7 +72,7 @@ def test_parse_paper_with_only_academic_authors():
 def test_parse_paper_missing_email():
     xml = MINIMAL_XML.replace("john.doe@genentech.com", "")
     results = parse_pubmed_xml(xml)
-    assert results[0]["corresponding_email"] is None
+    assert results[0].corresponding_email is None
 
 def test_parse_paper_with_multiple_emails():
     xml = MINIMAL_XML.replace(
@@ -61,10 +80,176 @@ def test_parse_paper_with_multiple_emails():
         "john.doe@genentech.com jane.doe@genentech.com"
     )
     results = parse_pubmed_xml(xml)
-    assert results[0]["corresponding_email"] == "john.doe@genentech.com"
+    assert results[0].corresponding_email == "john.doe@genentech.com"
 
 def test_parse_paper_with_duplicate_company_affiliations():
     xml = MINIMAL_XML.replace("Genentech Inc.", "Genentech Inc. Genentech Inc.")
     results = parse_pubmed_xml(xml)
-    affiliations = results[0]["company_affiliations"]
+    affiliations = results[0].company_affiliations
     assert len(set(affiliations)) == len(affiliations)  # no duplicates
+
+def test_parsed_papers_share_interned_affiliations():
+    first, second = parse_pubmed_xml(MINIMAL_XML) + parse_pubmed_xml(MINIMAL_XML)
+    assert first is not second
+    assert first.company_affiliations[0] is second.company_affiliations[0]
+    assert first.pub_date is second.pub_date
+
+
+def _article(pmid, affiliation):
+    return f"""
+  <PubmedArticle>
+    <MedlineCitation>
+      <PMID>{pmid}</PMID>
+      <Article>
+        <ArticleTitle>Paper {pmid}</ArticleTitle>
+        <AuthorList>
+          <Author>
+            <ForeName>Ann</ForeName>
+            <LastName>Lee</LastName>
+            <AffiliationInfo><Affiliation>{affiliation}</Affiliation></AffiliationInfo>
+          </Author>
+        </AuthorList>
+      </Article>
+    </MedlineCitation>
+  </PubmedArticle>"""
+
+def test_iter_parse_matches_parse_pubmed_xml():
+    streamed = list(iter_parse_pubmed_xml(io.BytesIO(MINIMAL_XML.encode("utf-8"))))
+    assert streamed == parse_pubmed_xml(MINIMAL_XML)
+
+def test_iter_parse_from_file_path(tmp_path):
+    path = tmp_path / "efetch.xml"
+    path.write_text(MINIMAL_XML, encoding="utf-8")
+
+    results = list(iter_parse_pubmed_xml(str(path)))
+    assert [paper.pubmed_id for paper in results] == ["12345678"]
+
+def test_iter_parse_is_lazy_and_keeps_document_order():
+    xml = "<PubmedArticleSet>" + "".join(
+        _article(i, "Pfizer Inc." if i % 2 else "Harvard University") for i in range(1, 6)
+    ) + "</PubmedArticleSet>"
+
+    papers = iter_parse_pubmed_xml(io.BytesIO(xml.encode("utf-8")))
+    assert not isinstance(papers, list)
+    assert [paper.pubmed_id for paper in papers] == ["1", "3", "5"]
+
+def test_iter_parse_clears_processed_articles(monkeypatch, xml_backend):
+    xml = "<PubmedArticleSet>" + "".join(_article(i, "Pfizer Inc.") for i in range(50)) + "</PubmedArticleSet>"
+    roots = []
+    articles = []
+    real_iterparse = parser_module.ET.iterparse
+    real_parse_article = parser_module.parse_article
+
+    def tracking_iterparse(source, events):
+        for event, elem in real_iterparse(source, events=events):
+            if not roots:
+                roots.append(elem)
+            yield event, elem
+
+    def tracking_parse_article(article):
+        articles.append(article)
+        return real_parse_article(article)
+
+    monkeypatch.setattr(parser_module.ET, "iterparse", tracking_iterparse)
+    monkeypatch.setattr(parser_module, "parse_article", tracking_parse_article)
+
+    assert len(list(iter_parse_pubmed_xml(io.BytesIO(xml.encode("utf-8"))))) == 50
+    # Nothing parsed is left hanging off the tree.
+    if xml_backend == "lxml":
+        # lxml keeps the last (cleared) article in place while parsing ends.
+        assert len(articles[-1].getparent()) == 1
+    else:
+        assert len(roots[0]) == 0
+    assert all(len(article) == 0 for article in articles)
+
+def test_iter_parse_stops_on_malformed_xml():
+    xml = "<PubmedArticleSet>" + _article(1, "Pfizer Inc.") + "<PubmedArticle><broken>"
+    results = list(iter_parse_pubmed_xml(io.BytesIO(xml.encode("utf-8")), debug=True))
+    assert [paper.pubmed_id for paper in results] == ["1"]
+
+def test_parse_pubmed_xml_malformed_returns_empty():
+    assert parse_pubmed_xml("<PubmedArticleSet><PubmedArticle>") == []
+
+def test_parse_pubmed_records_keeps_every_article():
+    xml = "<PubmedArticleSet>" + "".join(
+        _article(i, "Pfizer Inc." if i % 2 else "Harvard University") for i in range(1, 5)
+    ) + "</PubmedArticleSet>"
+    records = parse_pubmed_records(xml)
+
+    assert [record["pubmed_id"] for record in records] == ["1", "2", "3", "4"]
+    assert records[1]["authors"] == [{"name": "Ann Lee", "affiliations": ["Harvard University"]}]
+    papers = [paper_from_record(record) for record in records]
+    assert [paper for paper in papers if paper is not None] == parse_pubmed_xml(xml)
+    assert parse_pubmed_records("<PubmedArticleSet><PubmedArticle>") == []
+
+def test_parse_pubmed_xml_reports_metrics():
+    xml = "<PubmedArticleSet>" + "".join(
+        _article(i, "Pfizer Inc." if i % 2 else "Harvard University") for i in range(1, 6)
+    ) + "</PubmedArticleSet>"
+    metrics = enable_metrics()
+    try:
+        parse_pubmed_xml(xml)
+        parse_pubmed_xml("<PubmedArticleSet><PubmedArticle>")
+    finally:
+        disable_metrics()
+
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"]["articles_parsed"] == 5
+    assert snapshot["counters"]["papers_kept"] == 3
+    assert snapshot["counters"]["authors_classified"] == 5
+    assert snapshot["counters"]["malformed_batches"] == 1
+    assert snapshot["timers"]["parse_batch"]["count"] == 2
+
+def _dated_article(citation_dates="", journal_date="", article_dates="", history=""):
+    return f"""
+  <PubmedArticle>
+    <MedlineCitation>
+      <PMID>1</PMID>
+      {citation_dates}
+      <Article>
+        <Journal><JournalIssue><PubDate>{journal_date}</PubDate></JournalIssue></Journal>
+        <ArticleTitle>Dated</ArticleTitle>
+        <AuthorList><Author><LastName>Lee</LastName>
+          <AffiliationInfo><Affiliation>Pfizer Inc.</Affiliation></AffiliationInfo>
+        </Author></AuthorList>
+        {article_dates}
+      </Article>
+    </MedlineCitation>
+    <PubmedData><History>{history}</History></PubmedData>
+  </PubmedArticle>"""
+
+@pytest.mark.parametrize("article, expected", [
+    (_dated_article(journal_date="<Year>2021</Year>", article_dates="<ArticleDate><Year>2020</Year></ArticleDate>"), "2021"),
+    (_dated_article(journal_date="<Year>n.d.</Year>", article_dates="<ArticleDate><Year>2020</Year></ArticleDate>"), "2020"),
+    (_dated_article(citation_dates="<DateCreated><Year>2019</Year></DateCreated>"), "2019"),
+    (_dated_article(history="<PubMedPubDate><Year>2018</Year></PubMedPubDate><PubMedPubDate><Year>2017</Year></PubMedPubDate>"), "2018"),
+    (_dated_article(journal_date="<MedlineDate>Spring 2016</MedlineDate>"), "2016"),
+    (_dated_article(), "Unknown"),
+])
+def test_single_pass_year_matches_extract_pub_year(article, expected):
+    element = parser_module.ET.fromstring(article)
+    assert parser_module.extract_pub_year(element) == expected
+    assert parse_pubmed_xml(f"<PubmedArticleSet>{article}</PubmedArticleSet>")[0].pub_date == expected
+
+def test_single_pass_skips_unrelated_subtrees():
+    article = _dated_article(journal_date="<Year>2021</Year>").replace(
+        "<PubmedData>",
+        "<PubmedData><ReferenceList><Reference><ArticleIdList><ArticleId>9</ArticleId>"
+        "</ArticleIdList></Reference></ReferenceList>",
+    ).replace(
+        "</Article>",
+        "</Article><CommentsCorrectionsList><CommentsCorrections><PMID>999</PMID>"
+        "</CommentsCorrections></CommentsCorrectionsList>",
+    )
+    paper = parse_pubmed_xml(f"<PubmedArticleSet>{article}</PubmedArticleSet>")[0]
+    assert (paper.pubmed_id, paper.title, paper.non_academic_authors) == ("1", "Dated", ("Lee",))
+
+def test_set_parser_backend_validates_name():
+    with pytest.raises(ValueError):
+        parser_module.set_parser_backend("sax")
+
+def test_set_parser_backend_requires_lxml(monkeypatch):
+    monkeypatch.setattr(parser_module, "_lxml_available", lambda: False)
+    assert parser_module.set_parser_backend("auto") == "etree"
+    with pytest.raises(ImportError):
+        parser_module.set_parser_backend("lxml")
@@ -0,0 +1,66 @@
+import pytest
+from get_papers.src.filters import set_affiliation_dictionary
+from get_papers.src.metrics import disable_metrics, enable_metrics
+from get_papers.src.pipeline import parse_batches
+
+
+def _batch(*pmids):
+    articles = "".join(f"""
+      <PubmedArticle>
+        <MedlineCitation>
+          <PMID>{pmid}</PMID>
+          <Article>
+            <ArticleTitle>Paper {pmid}</ArticleTitle>
+            <AuthorList>
+              <Author>
+                <ForeName>Ann</ForeName>
+                <LastName>Lee</LastName>
+                <AffiliationInfo><Affiliation>Moderna Therapeutics</Affiliation></AffiliationInfo>
+              </Author>
+            </AuthorList>
+          </Article>
+        </MedlineCitation>
+      </PubmedArticle>""" for pmid in pmids)
+    return f"<PubmedArticleSet>{articles}</PubmedArticleSet>"
+
+BATCHES = [_batch("1", "2"), _batch("3"), _batch(), _batch("4", "5", "6"), _batch("7")]
+
+
+def test_parse_batches_in_process():
+    papers = parse_batches(iter(BATCHES), workers=1)
+    assert not isinstance(papers, list)
+    assert [paper.pubmed_id for paper in papers] == ["1", "2", "3", "4", "5", "6", "7"]
+
+def test_parse_batches_across_processes_keeps_order():
+    papers = list(parse_batches(iter(BATCHES), workers=2, affiliation_cache_size=16))
+    assert [paper.pubmed_id for paper in papers] == ["1", "2", "3", "4", "5", "6", "7"]
+    assert papers == list(parse_batches(BATCHES, workers=1))
+
+def test_parse_batches_merges_worker_metrics():
+    metrics = enable_metrics()
+    try:
+        list(parse_batches(BATCHES, workers=2))
+    finally:
+        disable_metrics()
+
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"]["articles_parsed"] == 7
+    assert snapshot["timers"]["parse_batch"]["count"] == len(BATCHES)
+
+def test_parse_batches_workers_use_the_callers_dictionary(tmp_path):
+    path = tmp_path / "dictionary.json"
+    path.write_text('{"companies": {"Moderna Inc.": ["moderna therapeutics"]}}', encoding="utf-8")
+    set_affiliation_dictionary(str(path))
+    try:
+        papers = list(parse_batches(BATCHES, workers=2))
+    finally:
+        set_affiliation_dictionary(None)
+    assert {paper.companies for paper in papers} == {("Moderna Inc.",)}
+
+def test_parse_batches_skips_malformed_batches():
+    papers = list(parse_batches(["<PubmedArticleSet>", _batch("1")], workers=1))
+    assert [paper.pubmed_id for paper in papers] == ["1"]
+
+def test_parse_batches_rejects_bad_worker_count():
+    with pytest.raises(ValueError):
+        list(parse_batches([], workers=0))
@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from get_papers.src.ratelimit import AsyncTokenBucket, TokenBucket, ncbi_rate_limit
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_ncbi_rate_limit_depends_on_api_key():
+    assert ncbi_rate_limit(None) == 3.0
+    assert ncbi_rate_limit("secret") == 10.0
+
+def test_token_bucket_spaces_requests_evenly():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=3.0, clock=clock, sleep=clock.sleep)
+
+    for _ in range(4):
+        bucket.acquire()
+
+    # First token is available immediately, the next three wait 1/3 s each.
+    assert clock.sleeps == pytest.approx([1 / 3] * 3)
+    assert clock.now == pytest.approx(1.0)
+
+def test_token_bucket_allows_burst_up_to_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10.0, capacity=5, clock=clock, sleep=clock.sleep)
+
+    for _ in range(5):
+        bucket.acquire()
+
+    assert clock.sleeps == []
+
+def test_token_bucket_refills_over_time():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, clock=clock, sleep=clock.sleep)
+
+    bucket.acquire()
+    clock.now += 10  # Idle time never accumulates beyond capacity
+    bucket.acquire()
+    bucket.acquire()
+
+    assert clock.sleeps == pytest.approx([0.5])
+
+@pytest.mark.parametrize("rate, capacity", [(0, 1), (-1, 1), (3, 0.5)])
+def test_token_bucket_rejects_invalid_settings(rate, capacity):
+    with pytest.raises(ValueError):
+        TokenBucket(rate=rate, capacity=capacity)
+
+def test_async_token_bucket_shares_budget_between_tasks():
+    clock = FakeClock()
+
+    async def sleep(seconds):
+        clock.sleep(seconds)
+
+    async def run():
+        bucket = AsyncTokenBucket(rate=2.0, clock=clock, sleep=sleep)
+        await asyncio.gather(*(bucket.acquire() for _ in range(3)))
+
+    asyncio.run(run())
+    assert clock.sleeps == pytest.approx([0.5, 0.5])
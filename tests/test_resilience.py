@@ -0,0 +1,222 @@
+import threading
+import xml.etree.ElementTree as ET
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import Mock
+from requests.exceptions import ConnectionError, HTTPError
+from get_papers.src.metrics import disable_metrics, enable_metrics
+from get_papers.src.resilience import (
+    AdaptiveThrottle,
+    CircuitBreaker,
+    FetchPolicy,
+    Quarantine,
+    backoff_delay,
+    retry_after_seconds,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _http_error(status, headers=None):
+    return HTTPError(f"{status} error", response=Mock(status_code=status, headers=headers or {}))
+
+
+### ---------- backoff TESTS ---------- ###
+
+def test_backoff_delay_is_full_jitter_up_to_cap():
+    assert backoff_delay(0, base=0.5, rng=lambda: 1.0) == 0.5
+    assert backoff_delay(3, base=0.5, rng=lambda: 0.5) == 2.0
+    assert backoff_delay(20, base=0.5, cap=60.0, rng=lambda: 1.0) == 60.0
+    assert backoff_delay(3, rng=lambda: 0.0) == 0.0
+
+def test_backoff_delay_honours_retry_after():
+    assert backoff_delay(0, base=0.5, retry_after=7.0, rng=lambda: 1.0) == 7.0
+    assert backoff_delay(10, base=0.5, retry_after=1.0, rng=lambda: 1.0) == 60.0
+
+def test_retry_after_seconds_forms():
+    now = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+    assert retry_after_seconds(Mock(headers={"Retry-After": "3"})) == 3.0
+    assert retry_after_seconds(Mock(headers={"Retry-After": "Mon, 01 Jan 2024 12:00:10 GMT"}), now=now) == 10.0
+    assert retry_after_seconds(Mock(headers={"Retry-After": "Mon, 01 Jan 2024 11:00:00 GMT"}), now=now) == 0.0
+    assert retry_after_seconds(Mock(headers={"Retry-After": "soon"})) is None
+    assert retry_after_seconds(Mock(headers={})) is None
+    assert retry_after_seconds(None) is None
+
+
+### ---------- CircuitBreaker TESTS ---------- ###
+
+def test_circuit_breaker_opens_after_threshold_and_probes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.opens == 1
+
+    # Once the timeout has passed, one caller goes through as the probe.
+    clock.now = 10.0
+    breaker.wait()
+    assert breaker.state == "half-open"
+
+    # A failed probe reopens the circuit straight away.
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.opens == 2
+
+    clock.now = 20.0
+    breaker.wait()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+def test_circuit_breaker_blocks_until_reset_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+
+    released = threading.Event()
+    thread = threading.Thread(target=lambda: (breaker.wait(), released.set()))
+    thread.start()
+    assert not released.wait(0.01)
+    thread.join(1.0)
+    assert released.is_set()
+
+def test_circuit_breaker_counts_opens_in_metrics():
+    metrics = enable_metrics()
+    try:
+        CircuitBreaker(failure_threshold=1).record_failure()
+    finally:
+        disable_metrics()
+    assert metrics.snapshot()["counters"]["circuit_opens"] == 1
+
+
+### ---------- AdaptiveThrottle TESTS ---------- ###
+
+def test_adaptive_throttle_halves_on_errors():
+    throttle = AdaptiveThrottle(concurrency=8, request_size=200, min_request_size=50)
+
+    for _ in range(4):
+        throttle.record(False)
+    assert (throttle.concurrency, throttle.request_size) == (8, 200)
+    throttle.record(False)
+    assert (throttle.concurrency, throttle.request_size) == (4, 100)
+
+    for _ in range(5):
+        throttle.record(False)
+    for _ in range(5):
+        throttle.record(False)
+    assert (throttle.concurrency, throttle.request_size) == (1, 50)
+
+def test_adaptive_throttle_recovers_after_successes():
+    throttle = AdaptiveThrottle(concurrency=4, request_size=100, recovery=3)
+    for _ in range(5):
+        throttle.record(False)
+    assert (throttle.concurrency, throttle.request_size) == (2, 50)
+
+    for _ in range(3):
+        throttle.record(True)
+    assert (throttle.concurrency, throttle.request_size) == (3, 100)
+    for _ in range(6):
+        throttle.record(True)
+    assert (throttle.concurrency, throttle.request_size) == (4, 100)
+
+def test_adaptive_throttle_ignores_sparse_errors():
+    throttle = AdaptiveThrottle(concurrency=4, request_size=100, window=20, error_threshold=0.2)
+    for _ in range(4):
+        for _ in range(9):
+            throttle.record(True)
+        throttle.record(False)
+    assert (throttle.concurrency, throttle.request_size) == (4, 100)
+
+
+### ---------- Quarantine TESTS ---------- ###
+
+def test_quarantine_tracks_batches_and_windows():
+    quarantine = Quarantine()
+    quarantine.add(["1", "2"], _http_error(503))
+    quarantine.add(400, ConnectionError("reset"))
+
+    assert len(quarantine) == 2
+    assert ["1", "2"] in quarantine
+    assert ["1"] not in quarantine
+    assert 400 in quarantine and 0 not in quarantine
+    assert quarantine.pmids() == ["1", "2"]
+    assert [entry["retstart"] for entry in quarantine] == [None, 400]
+
+
+### ---------- FetchPolicy TESTS ---------- ###
+
+def test_fetch_policy_retries_then_succeeds():
+    sleep = Mock()
+    request = Mock(side_effect=[_http_error(429, {"Retry-After": "2"}), ConnectionError("reset"), "ok"])
+    policy = FetchPolicy(sleep=sleep, rng=lambda: 0.0)
+
+    metrics = enable_metrics()
+    try:
+        assert policy.call(request) == "ok"
+    finally:
+        disable_metrics()
+
+    assert request.call_count == 3
+    assert [call.args[0] for call in sleep.call_args_list] == [2.0, 0.0]
+    assert metrics.snapshot()["counters"]["fetch_retries"] == 2
+
+def test_fetch_policy_gives_up_after_max_attempts():
+    request = Mock(side_effect=_http_error(503))
+    policy = FetchPolicy(max_attempts=3, sleep=Mock())
+
+    with pytest.raises(HTTPError):
+        policy.call(request)
+    assert request.call_count == 3
+
+def test_fetch_policy_does_not_retry_client_errors():
+    request = Mock(side_effect=_http_error(404))
+    policy = FetchPolicy(sleep=Mock())
+
+    with pytest.raises(HTTPError):
+        policy.call(request)
+    assert request.call_count == 1
+    assert policy.breaker.state == "closed"
+
+def test_fetch_policy_guard_quarantines():
+    policy = FetchPolicy(max_attempts=1)
+
+    assert policy.guard(["7"], lambda: policy.call(Mock(side_effect=_http_error(502)))) is None
+    assert policy.guard(["8"], lambda: "<xml/>") == "<xml/>"
+    assert policy.quarantine.pmids() == ["7"]
+    assert "502" in policy.quarantine.batches[0]["error"]
+
+def test_fetch_policy_guard_refetches_malformed_responses():
+    sleep = Mock()
+    fetch = Mock(side_effect=[ET.ParseError("no element found"), "<xml/>"])
+    policy = FetchPolicy(sleep=sleep, rng=lambda: 0.0)
+
+    assert policy.guard(["7"], fetch) == "<xml/>"
+    assert fetch.call_count == 2
+    sleep.assert_called_once()
+    assert not policy.quarantine
+
+def test_fetch_policy_guard_quarantines_persistently_malformed_responses():
+    fetch = Mock(side_effect=ET.ParseError("no element found"))
+    policy = FetchPolicy(max_attempts=3, sleep=Mock())
+
+    assert policy.guard(["7"], fetch) is None
+    assert fetch.call_count == 3
+    assert policy.quarantine.pmids() == ["7"]
+
+def test_fetch_policy_keeps_throttle_across_streams():
+    policy = FetchPolicy()
+    assert policy.request_size is None
+    throttle = policy.start(4, 200)
+    assert policy.start(8, 500) is throttle
+    assert policy.request_size == 200
+
+def test_fetch_policy_rejects_bad_max_attempts():
+    with pytest.raises(ValueError):
+        FetchPolicy(max_attempts=0)
@@ -0,0 +1,33 @@
+import pickle
+from get_papers.src.types import Paper
+
+PAPER_DICT = {
+    "pubmed_id": "1",
+    "title": "Paper 1",
+    "pub_date": "2023",
+    "non_academic_authors": ["Ann Lee"],
+    "company_affiliations": ["Pfizer Inc."],
+    "corresponding_email": None,
+    "companies": ["Pfizer"],
+}
+
+
+def test_paper_round_trips_through_dict():
+    paper = Paper.from_dict(PAPER_DICT)
+    assert paper.non_academic_authors == ("Ann Lee",)
+    assert paper.companies == ("Pfizer",)
+    assert paper.to_dict() == PAPER_DICT
+
+def test_paper_has_no_instance_dict():
+    paper = Paper.from_dict(PAPER_DICT)
+    assert not hasattr(paper, "__dict__")
+
+def test_paper_equality_and_pickling():
+    paper = Paper.from_dict(PAPER_DICT)
+    assert pickle.loads(pickle.dumps(paper)) == paper
+    assert paper != Paper.from_dict(dict(PAPER_DICT, title="Other"))
+    assert "pubmed_id='1'" in repr(paper)
+
+def test_paper_from_dict_without_companies():
+    legacy = {key: value for key, value in PAPER_DICT.items() if key != "companies"}
+    assert Paper.from_dict(legacy).companies == ()